@@ -0,0 +1,290 @@
+# batchEnvironments.py
+#
+# Many games of Pacman on the same layout played in lockstep as NumPy
+# operations, to train and evaluate learning agents faster than with
+# Game.run, which plays one game at a time and copies the whole state
+# of the game after every move of every agent.
+#
+# The games are stored as arrays with a row for each game (a struct of
+# arrays): the locations and directions of Pacman and of the ghosts,
+# the scared timers, the food and capsules left (as boolean masks),
+# the scores and which games are won or lost. Each step is a move of
+# Pacman followed by a move of each ghost, in all the games at once,
+# with the rules of PacmanRules and GhostRules in pacman.py and the
+# ghosts of ghostAgents.py (RandomGhost or DirectionalGhost):
+#
+#   environment = batchEnvironments.BatchEnvironment(layout, numGhosts, games)
+#   legalActions = environment.getLegalPacmanActions()
+#   rewards = environment.step(pacmanActions)
+#   environment.reset(environment.isOver())
+#
+# The ghosts pick their moves as the ghost agents do, from a uniform
+# number each: given the same numbers, the games go exactly as in
+# the reference engine (see benchmark-scripts/batch_environment_check.py).
+#
+# The positions of the ghosts are stored in half locations, as scared
+# ghosts move at half speed, so that all the positions are integers.
+
+import random
+
+import numpy as np
+
+from game import Directions
+from pacman import GameState, SCARED_TIME, TIME_PENALTY
+
+# the directions, numbered in the order the ghost agents sample them
+# (util.sample sorts the actions by name), with STOP last
+DIRECTIONS = [Directions.EAST, Directions.NORTH, Directions.SOUTH, Directions.WEST, Directions.STOP]
+DIRECTION_IDS = { direction: directionId for directionId, direction in enumerate(DIRECTIONS) }
+STOP = DIRECTION_IDS[Directions.STOP]
+
+VECTORS = np.array([(1, 0), (0, 1), (0, -1), (-1, 0), (0, 0)])
+REVERSE = np.array([DIRECTION_IDS[Directions.WEST], DIRECTION_IDS[Directions.SOUTH], DIRECTION_IDS[Directions.NORTH],
+                    DIRECTION_IDS[Directions.EAST], STOP])
+
+# the moves of the ghosts, which cannot stop
+MOVES = len(DIRECTIONS) - 1
+
+RANDOM_GHOST = 'RandomGhost'
+DIRECTIONAL_GHOST = 'DirectionalGhost'
+
+# the points scored eating a food, a scared ghost or the last food, and lost when caught
+FOOD_SCORE = 10
+GHOST_SCORE = 200
+WIN_SCORE = 500
+LOSE_SCORE = 500
+
+# how close (in half locations) a ghost must be to Pacman to collide (COLLISION_TOLERANCE = 0.7)
+COLLISION_DISTANCE = 1
+
+
+class BatchEnvironment:
+    '''
+    Games of Pacman on the same layout, all played a step at a time.
+    '''
+
+    def __init__(self, layout, numGhosts, games, ghostType=RANDOM_GHOST, probAttack=0.8, probScaredFlee=0.8):
+        if ghostType not in [RANDOM_GHOST, DIRECTIONAL_GHOST]:
+            raise Exception('Unknown ghost ' + ghostType + ', choose ' + RANDOM_GHOST + ' or ' + DIRECTIONAL_GHOST)
+
+        self.games = games
+        self.ghostType = ghostType
+        self.probAttack = probAttack
+        self.probScaredFlee = probScaredFlee
+        self.walls = np.array(layout.walls.data, dtype=bool)
+
+        # the first state of each game, as the reference engine sets it up
+        state = GameState()
+        state.initialize(layout, numGhosts)
+        agentStates = state.data.agentStates
+        self.numGhosts = len(agentStates) - 1
+        self.pacmanStart = np.array(agentStates[0].getPosition(), dtype=int)
+        self.ghostStarts = np.array([agentState.getPosition() for agentState in agentStates[1:]], dtype=int).reshape(-1, 2) * 2
+        self.foodStart = np.array(state.data.food.data, dtype=bool)
+        self.capsulePositions = np.array(state.data.capsules, dtype=int).reshape(-1, 2)
+
+        self.pacmanPositions = np.zeros((games, 2), dtype=int)
+        self.pacmanDirections = np.zeros(games, dtype=int)
+        self.ghostPositions = np.zeros((games, self.numGhosts, 2), dtype=int)
+        self.ghostDirections = np.zeros((games, self.numGhosts), dtype=int)
+        self.scaredTimers = np.zeros((games, self.numGhosts), dtype=int)
+        self.food = np.zeros((games,) + self.foodStart.shape, dtype=bool)
+        self.foodCounts = np.zeros(games, dtype=int)
+        self.capsules = np.zeros((games, len(self.capsulePositions)), dtype=bool)
+        self.scores = np.zeros(games, dtype=int)
+        self.wins = np.zeros(games, dtype=bool)
+        self.losses = np.zeros(games, dtype=bool)
+        self.reset()
+
+        # the score change of each game in the current move
+        self.scoreChanges = np.zeros(games, dtype=int)
+
+        # seeded from the random module, so that a fixed seed (-f) fixes the ghosts too
+        self.random = np.random.RandomState(random.randrange(2 ** 32))
+
+    def reset(self, games=None):
+        '''
+        Start again the given games (a boolean mask or a list of indexes), all by default.
+        '''
+        if games is None:
+            games = slice(None)
+
+        self.pacmanPositions[games] = self.pacmanStart
+        self.pacmanDirections[games] = STOP
+        self.ghostPositions[games] = self.ghostStarts
+        self.ghostDirections[games] = STOP
+        self.scaredTimers[games] = 0
+        self.food[games] = self.foodStart
+        self.foodCounts[games] = self.foodStart.sum()
+        self.capsules[games] = True
+        self.scores[games] = 0
+        self.wins[games] = False
+        self.losses[games] = False
+
+    def isOver(self):
+        '''
+        Return the mask of the games which are won or lost.
+        '''
+        return self.wins | self.losses
+
+    def getLegalPacmanActions(self):
+        '''
+        Return the mask of the legal actions of Pacman in each game, with
+        a column for each direction (as numbered in DIRECTIONS), STOP included.
+        The games which are over have no legal actions.
+        '''
+        landings = self.pacmanPositions[:, None, :] + VECTORS[None, :, :]
+        legal = ~self.walls[landings[:, :, 0], landings[:, :, 1]]
+        legal[self.isOver()] = False
+        return legal
+
+    def step(self, pacmanActions, ghostUniforms=None):
+        '''
+        Play a move of Pacman, with the given actions (a direction id for
+        each game), and then of each ghost, in all the games which are not
+        over. The ghosts pick their moves from the given uniform numbers in
+        [0, 1), one for each game and ghost, or from random ones.
+        Return the change of the score of each game.
+        '''
+        pacmanActions = np.asarray(pacmanActions)
+        if ghostUniforms is None:
+            ghostUniforms = self.random.random_sample((self.games, self.numGhosts))
+
+        playing = np.flatnonzero(~self.isOver())
+        if not self.getLegalPacmanActions()[playing, pacmanActions[playing]].all():
+            raise Exception('Illegal action')
+
+        startScores = self.scores.copy()
+        self.movePacman(playing, pacmanActions[playing])
+
+        for ghost in range(self.numGhosts):
+            playing = np.flatnonzero(~self.isOver())
+            self.moveGhost(playing, ghost, ghostUniforms[playing, ghost])
+
+        return self.scores - startScores
+
+    def movePacman(self, games, actions):
+        '''
+        Move Pacman in the given games (PacmanRules.applyAction), eating what it finds.
+        '''
+        self.scoreChanges[games] = -TIME_PENALTY
+        self.pacmanPositions[games] += VECTORS[actions]
+        self.pacmanDirections[games] = np.where(actions == STOP, self.pacmanDirections[games], actions)
+        x, y = self.pacmanPositions[games].T
+
+        # eat the food (PacmanRules.consume)
+        eaten = self.food[games, x, y]
+        self.food[games[eaten], x[eaten], y[eaten]] = False
+        self.foodCounts[games] -= eaten
+        self.scoreChanges[games] += FOOD_SCORE * eaten
+        won = eaten & (self.foodCounts[games] == 0)
+        self.scoreChanges[games] += WIN_SCORE * won
+        self.wins[games] |= won
+
+        # eat the capsules, scaring all the ghosts
+        capsulesEaten = self.capsules[games] & (self.capsulePositions[None, :, :] == self.pacmanPositions[games, None, :]).all(axis=2)
+        self.capsules[games] &= ~capsulesEaten
+        self.scaredTimers[games[capsulesEaten.any(axis=1)]] = SCARED_TIME
+
+        # Pacman can run into any ghost
+        for ghost in range(self.numGhosts):
+            self.checkDeath(games, ghost)
+
+        self.scores[games] += self.scoreChanges[games]
+
+    def moveGhost(self, games, ghost, uniforms):
+        '''
+        Move a ghost in the given games (GhostRules.applyAction), picking
+        its move as its agent does, from a uniform number for each game.
+        '''
+        positions = self.ghostPositions[games, ghost]
+        directions = self.ghostDirections[games, ghost]
+        scared = self.scaredTimers[games, ghost] > 0
+
+        legal = self.getLegalGhostMoves(positions, directions)
+        probabilities = self.getGhostDistributions(positions, scared, legal, self.pacmanPositions[games])
+
+        # the first move whose cumulative probability reaches the number (util.sample)
+        cumulative = probabilities.cumsum(axis=1)
+        uniforms = np.minimum(uniforms, cumulative[:, -1])
+        moves = (uniforms[:, None] <= cumulative).argmax(axis=1)
+
+        # scared ghosts move half a location at a time
+        speeds = np.where(scared, 1, 2)
+        positions = positions + VECTORS[moves] * speeds[:, None]
+
+        # GhostRules.decrementTimer: when it stops being scared, the ghost goes to the nearest location
+        timers = self.scaredTimers[games, ghost]
+        positions[timers == 1] += positions[timers == 1] % 2
+        self.scaredTimers[games, ghost] = np.maximum(0, timers - 1)
+
+        self.ghostPositions[games, ghost] = positions
+        self.ghostDirections[games, ghost] = moves
+
+        self.scoreChanges[games] = 0
+        self.checkDeath(games, ghost)
+        self.scores[games] += self.scoreChanges[games]
+
+    def getLegalGhostMoves(self, positions, directions):
+        '''
+        Return the mask of the moves the ghosts at the given positions (in half
+        locations) heading in the given directions can make (GhostRules.getLegalActions):
+        they cannot stop, and cannot turn around unless they reach a dead end.
+        Between two locations they can only go on.
+        '''
+        onLocation = (positions % 2 == 0).all(axis=1)
+        landings = positions[:, None, :] // 2 + VECTORS[None, :MOVES, :]
+        legal = ~self.walls[landings[:, :, 0], landings[:, :, 1]] & onLocation[:, None]
+
+        rows = np.arange(len(positions))
+        reverse = REVERSE[directions]
+        turnsAround = (reverse != STOP) & (legal.sum(axis=1) > 1)
+        legal[rows[turnsAround], reverse[turnsAround]] = False
+
+        legal[rows[~onLocation], directions[~onLocation]] = True
+        return legal
+
+    def getGhostDistributions(self, positions, scared, legal, pacmanPositions):
+        '''
+        Return the probability of each of the legal moves of the ghosts, as
+        given by the getDistribution method of their agents.
+        '''
+        legalCounts = legal.sum(axis=1)[:, None].astype(float)
+        if self.ghostType == RANDOM_GHOST:
+            return legal / legalCounts
+
+        # DirectionalGhost: rush Pacman (or flee from it when scared) with probability
+        # bestProbability, spread over the best moves, otherwise move at random
+        speeds = np.where(scared, 1, 2)
+        landings = positions[:, None, :] + VECTORS[None, :MOVES, :] * speeds[:, None, None]
+        distances = np.abs(landings - 2 * pacmanPositions[:, None, :]).sum(axis=2)
+
+        fleeDistances = np.where(legal, distances, -1).max(axis=1)
+        rushDistances = np.where(legal, distances, np.iinfo(int).max).min(axis=1)
+        bestDistances = np.where(scared, fleeDistances, rushDistances)
+        best = legal & (distances == bestDistances[:, None])
+
+        bestProbability = np.where(scared, self.probScaredFlee, self.probAttack)[:, None]
+        probabilities = np.where(best, bestProbability / best.sum(axis=1)[:, None], 0) + \
+                        np.where(legal, (1 - bestProbability) / legalCounts, 0)
+        return probabilities / probabilities.sum(axis=1)[:, None]
+
+    def checkDeath(self, games, ghost):
+        '''
+        Resolve the collisions of Pacman with a ghost in the given games
+        (GhostRules.checkDeath): a scared ghost is eaten and goes back to
+        its start, otherwise Pacman is caught (unless it just won).
+        '''
+        distances = np.abs(self.ghostPositions[games, ghost] - 2 * self.pacmanPositions[games]).sum(axis=1)
+        collided = distances <= COLLISION_DISTANCE
+        scared = self.scaredTimers[games, ghost] > 0
+
+        eaten = games[collided & scared]
+        self.scoreChanges[eaten] += GHOST_SCORE
+        self.ghostPositions[eaten, ghost] = self.ghostStarts[ghost]
+        self.ghostDirections[eaten, ghost] = STOP
+        self.scaredTimers[eaten, ghost] = 0
+
+        caught = games[collided & ~scared & ~self.wins[games]]
+        self.scoreChanges[caught] -= LOSE_SCORE
+        self.losses[caught] = True
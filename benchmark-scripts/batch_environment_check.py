@@ -0,0 +1,175 @@
+# Check that the games of the batch environment (batchEnvironments.py)
+# go exactly as in the reference engine, and compare their speed.
+#
+# The same games are played in the batch environment and with the
+# GameState of pacman.py and the ghost agents of ghostAgents.py: Pacman
+# makes random legal moves, and the ghosts pick their moves from the
+# same uniform numbers in both (the ghost agents draw them from the
+# random module, which is fed the numbers of the batch environment).
+# After every step the positions, directions, scared timers, food,
+# capsules, scores and outcomes of all the games are compared.
+#
+# Run from the root of the project:
+#
+#     python benchmark-scripts/batch_environment_check.py [layout] [games] [steps]
+#
+# where layout is the layout played (default mediumClassic), games the
+# number of games played in lockstep (default 64) and steps the max
+# number of steps of each game (default 200).
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import batchEnvironments
+import ghostAgents
+import layout
+import util
+from pacman import GameState
+
+layoutName = sys.argv[1] if len(sys.argv) > 1 else 'mediumClassic'
+games = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+steps = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+# the ghosts of the layouts played by default by pacman.py (-k 4)
+NUM_GHOSTS = 4
+
+
+class UniformsQueue:
+    '''
+    Stand in for the random module of util, giving the ghost
+    agents the uniform numbers of the batch environment.
+    '''
+
+    def __init__(self):
+        self.uniforms = []
+
+    def random(self):
+        return self.uniforms.pop(0)
+
+
+def getDifferences(environment, game, state):
+    '''
+    Return the names of the fields of the given game
+    which differ from the given reference state.
+    '''
+    agentStates = state.data.agentStates
+    fields = { 'pacman position': (tuple(environment.pacmanPositions[game]), agentStates[0].getPosition()),
+               'pacman direction': (batchEnvironments.DIRECTIONS[environment.pacmanDirections[game]],
+                                    agentStates[0].getDirection()),
+               'ghost positions': ([tuple(position / 2.0) for position in environment.ghostPositions[game]],
+                                   [agentState.getPosition() for agentState in agentStates[1:]]),
+               'ghost directions': ([batchEnvironments.DIRECTIONS[direction] for direction in environment.ghostDirections[game]],
+                                    [agentState.getDirection() for agentState in agentStates[1:]]),
+               'scared timers': (environment.scaredTimers[game].tolist(), [agentState.scaredTimer for agentState in agentStates[1:]]),
+               'food': (environment.food[game].tolist(), state.data.food.data),
+               'capsules': ([tuple(capsule) for capsule in environment.capsulePositions[environment.capsules[game]]],
+                            state.data.capsules),
+               'score': (environment.scores[game], state.getScore()),
+               'outcome': ((environment.wins[game], environment.losses[game]), (state.isWin(), state.isLose())) }
+    return [name for name, (value, reference) in sorted(fields.items()) if value != reference]
+
+
+def checkGames(world, ghostType):
+    '''
+    Play the games in both engines, and return the number of
+    steps played and the number of fields which differed.
+    '''
+    environment = batchEnvironments.BatchEnvironment(world, NUM_GHOSTS, games, ghostType)
+    ghosts = [getattr(ghostAgents, ghostType)(index + 1) for index in range(environment.numGhosts)]
+    states = [GameState() for _ in range(games)]
+    for state in states:
+        state.initialize(world, NUM_GHOSTS)
+
+    queue = UniformsQueue()
+    moduleRandom = util.random
+    util.random = queue
+    actionsRandom = np.random.RandomState(0)
+    uniformsRandom = np.random.RandomState(1)
+    played = 0
+    differences = 0
+
+    try:
+        for step in range(steps):
+            legal = environment.getLegalPacmanActions()
+            playing = np.flatnonzero(legal.any(axis=1))
+            if len(playing) == 0:
+                break
+
+            actions = np.zeros(games, dtype=int)
+            for game in playing:
+                actions[game] = actionsRandom.choice(np.flatnonzero(legal[game]))
+            uniforms = uniformsRandom.random_sample((games, environment.numGhosts))
+            environment.step(actions, uniforms)
+
+            for game in playing:
+                state = states[game].generateSuccessor(0, batchEnvironments.DIRECTIONS[actions[game]])
+                for ghost in ghosts:
+                    if state.isWin() or state.isLose():
+                        break
+                    queue.uniforms = [uniforms[game, ghost.index - 1]]
+                    state = state.generateSuccessor(ghost.index, ghost.getAction(state))
+                states[game] = state
+
+                mismatches = getDifferences(environment, game, state)
+                if len(mismatches) > 0:
+                    print 'game %d step %d differs in %s' % (game, step, ', '.join(mismatches))
+                differences += len(mismatches)
+            played += len(playing)
+    finally:
+        util.random = moduleRandom
+
+    return played, differences
+
+
+def timeSteps(world, ghostType):
+    '''
+    Return the steps per second (a move of Pacman and of each ghost)
+    played in the batch environment and in the reference engine.
+    '''
+    environment = batchEnvironments.BatchEnvironment(world, NUM_GHOSTS, games, ghostType)
+    actionsRandom = np.random.RandomState(0)
+
+    played = 0
+    start = time.time()
+    for step in range(steps):
+        legal = environment.getLegalPacmanActions()
+        # a random legal action in each game, the games over are started again
+        actions = (actionsRandom.random_sample(legal.shape) * legal).argmax(axis=1)
+        played += legal.any(axis=1).sum()
+        environment.step(actions)
+        environment.reset(environment.isOver())
+    batchSpeed = played / (time.time() - start)
+
+    ghosts = [getattr(ghostAgents, ghostType)(index + 1) for index in range(environment.numGhosts)]
+    state = GameState()
+    state.initialize(world, NUM_GHOSTS)
+    startState = state
+
+    played = 0
+    start = time.time()
+    while played < min(games * steps, 2000):
+        state = state.generateSuccessor(0, actionsRandom.choice(state.getLegalPacmanActions()))
+        for ghost in ghosts:
+            if state.isWin() or state.isLose():
+                break
+            state = state.generateSuccessor(ghost.index, ghost.getAction(state))
+        if state.isWin() or state.isLose():
+            state = startState
+        played += 1
+    referenceSpeed = played / (time.time() - start)
+
+    return batchSpeed, referenceSpeed
+
+
+world = layout.getLayout(layoutName)
+print "%-18s%12s%14s%22s%22s" % ("ghosts", "steps", "differences", "batch steps / s", "reference steps / s")
+
+for ghostType in [batchEnvironments.RANDOM_GHOST, batchEnvironments.DIRECTIONAL_GHOST]:
+    played, differences = checkGames(world, ghostType)
+    batchSpeed, referenceSpeed = timeSteps(world, ghostType)
+    print "%-18s%12d%14d%22.0f%22.0f" % (ghostType, played, differences, batchSpeed, referenceSpeed)
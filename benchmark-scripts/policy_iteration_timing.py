@@ -0,0 +1,121 @@
+# Compare the time per move of policy iteration and modified policy
+# iteration with the one of value iteration on the vectorized engine,
+# both stopped at the EPSILON of the agent (the default) and run until
+# the values change less than CONVERGED_EPSILON, and count the moves in
+# which each solver picks a different move than the converged value iteration.
+#
+# For each layout a game is played by a reference agent (value iteration
+# run to convergence), and in every state visited the move is chosen by
+# each configuration and timed, so that all of them are compared on exactly
+# the same states. The time of a move includes laying out the rewards and
+# choosing the move, not only the solve. Requires numpy.
+#
+# Run from the root of the project:
+#
+#     python benchmark-scripts/policy_iteration_timing.py [discountFactor] [moves] [layout ...]
+#
+# where discountFactor defaults to 0.99, moves is the max number of moves
+# played on each layout (default 50), and the layouts default to
+# originalClassic and the largest layouts in the layouts folder whose
+# locations can all be reached (without discount, the values of the
+# locations Pacman cannot reach, e.g. in bigCorners, never converge).
+# The times vary from run to run, so the ratios between the configurations
+# are more meaningful than the times.
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import layout
+import pacman
+import ghostAgents
+import mdpAgents
+from mdpAgents import MDPAgent
+
+discountFactor = float(sys.argv[1]) if len(sys.argv) > 1 else 0.99
+maxMoves = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+layoutNames = sys.argv[3:] or ['originalClassic', 'bigMaze', 'openMaze']
+
+# the max change in the values of the converged value iteration
+CONVERGED_EPSILON = 1e-7
+
+
+class ConvergedMDPAgent(MDPAgent):
+    EPSILON = CONVERGED_EPSILON
+
+
+# the ghosts move at random, seeded so that every run visits the same states
+random.seed(0)
+
+# the configurations compared, the first one is the reference agent
+configurations = [('valueIteration (converged)', ConvergedMDPAgent, { 'engine': MDPAgent.VECTORIZED_ENGINE }),
+                  ('valueIteration', MDPAgent, { 'engine': MDPAgent.VECTORIZED_ENGINE }),
+                  ('policyIteration', MDPAgent, { 'solver': MDPAgent.POLICY_ITERATION_SOLVER }),
+                  ('modifiedPolicyIteration', MDPAgent, { 'solver': MDPAgent.MODIFIED_POLICY_ITERATION_SOLVER })]
+
+# the move chosen by the last call of getBestNextMove, before api.makeMove
+# replaces it with a random one some of the times
+chosenMoves = []
+getBestNextMove = mdpAgents.getBestNextMove
+
+
+def recordBestNextMove(*arguments):
+    bestMove = getBestNextMove(*arguments)
+    chosenMoves.append(bestMove)
+    return bestMove
+
+
+mdpAgents.getBestNextMove = recordBestNextMove
+
+
+def getStartingState(layoutName):
+    world = layout.getLayout(layoutName)
+    state = pacman.GameState()
+    state.initialize(world, world.getNumGhosts())
+    return state
+
+
+def timeSolvers(layoutName):
+    '''
+    Return the average milliseconds per move of each configuration in the
+    states visited playing on the given layout, and the number of moves in
+    which each one chose a different move than the reference agent.
+    '''
+    state = getStartingState(layoutName)
+    agents = [agentClass(discountFactor=discountFactor, **arguments) for label, agentClass, arguments in configurations]
+    ghosts = [ghostAgents.RandomGhost(index) for index in range(1, state.getNumAgents())]
+    times = [0.0] * len(agents)
+    differentMoves = [0] * len(agents)
+
+    # the first move sets up the world, which is not timed
+    actions = [agent.getAction(state) for agent in agents]
+    moves = 0
+
+    while moves < maxMoves and not (state.isWin() or state.isLose()):
+        del chosenMoves[:]
+        for index, agent in enumerate(agents):
+            start = time.time()
+            actions[index] = agent.getAction(state)
+            times[index] += time.time() - start
+        differentMoves = [count + (move != chosenMoves[0]) for count, move in zip(differentMoves, chosenMoves)]
+        moves += 1
+
+        # the reference agent decides how the game goes on
+        state = state.generateSuccessor(0, actions[0])
+        for ghost in ghosts:
+            if state.isWin() or state.isLose():
+                break
+            state = state.generateSuccessor(ghost.index, ghost.getAction(state))
+
+    return [1000 * total / max(moves, 1) for total in times], differentMoves
+
+
+print "ms per move (moves different from the converged value iteration), discount factor %g" % discountFactor
+print "%-24s" % "layout" + "".join(["%30s" % label for label, agentClass, arguments in configurations])
+
+for layoutName in layoutNames:
+    milliseconds, differentMoves = timeSolvers(layoutName)
+    print "%-24s" % layoutName + "".join(["%30s" % ("%.2f (%d)" % result) for result in zip(milliseconds, differentMoves)])
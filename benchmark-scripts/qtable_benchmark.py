@@ -0,0 +1,114 @@
+# Compare the Q-tables of the QLearnAgent (see qTables.py) on the
+# memory they take and on how fast the agent reads and updates them.
+#
+# First the agent is trained with each Q-table on the same games
+# (the random seed is fixed), timing the time spent in the agent.
+# Then each Q-table is filled with the given number of states, each
+# with a value for 4 actions, and timed on the lookups and updates
+# the agent makes every move: the best action of a random state and
+# the update of the value of one of its actions.
+#
+# Run from the root of the project:
+#
+#     python benchmark-scripts/qtable_benchmark.py [games] [states]
+#
+# where games is the number of training games played on smallGrid
+# (default 2000) and states the number of states the Q-tables are
+# filled with (default 200000). The array Q-table requires numpy.
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pacman
+import qTables
+from game import Directions
+
+games = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+states = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+# the lookups and updates timed on the filled Q-tables
+OPERATIONS = 200000
+
+# the actions of the states the Q-tables are filled with
+actions = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+
+
+def getMemory(qTable):
+    '''
+    Return the bytes taken by the given Q-table: its containers, its keys
+    and its values, counting each object once. The directions are shared
+    with the game, so they are not counted.
+    '''
+    seen = set(id(action) for action in actions)
+    objects = [qTable.__dict__]
+    memory = 0
+
+    while len(objects) > 0:
+        item = objects.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        memory += getattr(item, 'nbytes', 0) + sys.getsizeof(item)
+
+        if isinstance(item, dict):
+            objects.extend(item.keys())
+            objects.extend(item.values())
+        elif isinstance(item, tuple):
+            objects.extend(item)
+
+    return memory
+
+
+def timeTraining(qTableName):
+    '''
+    Return the seconds spent in the agent while training with the given
+    Q-table, and the number of states it has values for.
+    '''
+    args = pacman.readCommand(['-p', 'QLearnAgent', '-l', 'smallGrid', '-q', '-f', '-x', str(games), '-n', str(games),
+                               '-a', 'qTable=' + qTableName])
+    agent = args['pacman']
+
+    spent = [0.0]
+    for name in ['getAction', 'final']:
+        def timed(state, method=getattr(agent, name)):
+            start = time.time()
+            result = method(state)
+            spent[0] += time.time() - start
+            return result
+        setattr(agent, name, timed)
+
+    pacman.runGames(**args)
+    return spent[0], agent.QTable.getStateCount()
+
+
+def timeOperations(qTableName):
+    '''
+    Return the memory of the given Q-table filled with the states, and
+    the lookups and updates per second it makes on random states.
+    '''
+    qTable = qTables.getQTable(qTableName)
+    for stateKey in xrange(states):
+        for action in actions:
+            qTable.setValue(stateKey, action, random.random())
+
+    stateKeys = [random.randrange(states) for _ in xrange(OPERATIONS)]
+    start = time.time()
+    for stateKey in stateKeys:
+        action, value = qTable.getBestAction(stateKey, actions)
+        qTable.setValue(stateKey, action, value * 0.5)
+
+    return getMemory(qTable), OPERATIONS / (time.time() - start)
+
+
+print "%-8s%16s%16s%20s%20s%20s" % ("Q-table", "training (s)", "states", "memory (MB)", "bytes per state", "operations / s")
+
+for qTableName in sorted(qTables.qTables):
+    random.seed(0)
+    trainingTime, trainingStates = timeTraining(qTableName)
+    memory, operations = timeOperations(qTableName)
+    print "%-8s%16.2f%16d%20.1f%20.1f%20.0f" % (qTableName, trainingTime, trainingStates, memory / 1e6,
+                                               memory / float(states), operations)
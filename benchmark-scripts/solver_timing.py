@@ -0,0 +1,87 @@
+# Compare the time per move of the solvers of the MDPAgent: value
+# iteration on dicts (the default), prioritized sweeping, and value
+# iteration on the vectorized engine (requires numpy).
+#
+# For each layout a game is played by a reference agent (value iteration
+# on dicts), and in every state visited the move is chosen by each
+# configuration and timed, so that all of them are compared on exactly
+# the same states. The time of a move includes laying out the rewards
+# and choosing the move, not only the solve.
+#
+# Run from the root of the project:
+#
+#     python benchmark-scripts/solver_timing.py [moves] [layout ...]
+#
+# where moves is the max number of moves played on each layout (default 50)
+# and the layouts default to originalClassic and the largest layouts in
+# the layouts folder. The times vary from run to run, so the ratios
+# between the configurations are more meaningful than the times.
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import layout
+import pacman
+import ghostAgents
+from mdpAgents import MDPAgent
+
+maxMoves = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+layoutNames = sys.argv[2:] or ['originalClassic', 'bigMaze', 'bigCorners', 'openMaze']
+
+# the ghosts move at random, seeded so that every run visits the same states
+random.seed(0)
+
+# the configurations compared, the first one is the reference agent
+configurations = [('valueIteration (dict)', { 'engine': MDPAgent.DICT_ENGINE }),
+                  ('prioritizedSweeping', { 'solver': MDPAgent.PRIORITIZED_SWEEPING_SOLVER }),
+                  ('valueIteration (vectorized)', { 'engine': MDPAgent.VECTORIZED_ENGINE })]
+
+
+def getStartingState(layoutName):
+    world = layout.getLayout(layoutName)
+    state = pacman.GameState()
+    state.initialize(world, world.getNumGhosts())
+    return state
+
+
+def timeSolvers(layoutName):
+    '''
+    Return the average milliseconds per move of each configuration
+    in the states visited playing on the given layout.
+    '''
+    state = getStartingState(layoutName)
+    agents = [MDPAgent(**arguments) for label, arguments in configurations]
+    ghosts = [ghostAgents.RandomGhost(index) for index in range(1, state.getNumAgents())]
+    times = [0.0] * len(agents)
+
+    # the first move sets up the world, which is not timed
+    actions = [agent.getAction(state) for agent in agents]
+    moves = 0
+
+    while moves < maxMoves and not (state.isWin() or state.isLose()):
+        for index, agent in enumerate(agents):
+            start = time.time()
+            actions[index] = agent.getAction(state)
+            times[index] += time.time() - start
+        moves += 1
+
+        # the reference agent decides how the game goes on
+        state = state.generateSuccessor(0, actions[0])
+        for ghost in ghosts:
+            if state.isWin() or state.isLose():
+                break
+            state = state.generateSuccessor(ghost.index, ghost.getAction(state))
+
+    return [1000 * total / max(moves, 1) for total in times]
+
+
+print "ms per move"
+print "%-24s" % "layout" + "".join(["%30s" % label for label, arguments in configurations])
+
+for layoutName in layoutNames:
+    milliseconds = timeSolvers(layoutName)
+    print "%-24s" % layoutName + "".join(["%30.2f" % value for value in milliseconds])
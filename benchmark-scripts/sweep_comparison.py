@@ -0,0 +1,88 @@
+# Compare the number of value iteration sweeps needed by each sweep
+# of the MDPAgent (jacobi, gaussSeidel, orderedGaussSeidel) and by
+# prioritized sweeping on all the layouts in the layouts folder.
+# For prioritized sweeping the number of updates is converted into 
+# the equivalent number of full sweeps.
+#
+# For each layout a game is played by a reference agent (jacobi sweep),
+# and in every state visited the map is solved with each configuration, 
+# so that all of them are compared on exactly the same states.
+#
+# Run from the root of the project:
+#
+#     python benchmark-scripts/sweep_comparison.py [engine] [moves]
+#
+# where engine is 'dict' or 'vectorized' (default) and moves is the max
+# number of moves played on each layout (default 50). Layouts with
+# locations Pacman cannot reach, or without Pacman, are skipped as the
+# agent does not support them.
+
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import layout
+import pacman
+import ghostAgents
+from mdpAgents import MDPAgent
+
+engine = sys.argv[1] if len(sys.argv) > 1 else MDPAgent.VECTORIZED_ENGINE
+maxMoves = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+# the configurations compared, the first one is the reference agent
+configurations = [(sweep, { 'sweep': sweep }) for sweep in MDPAgent.SWEEPS] + \
+                 [(MDPAgent.PRIORITIZED_SWEEPING_SOLVER, { 'solver': MDPAgent.PRIORITIZED_SWEEPING_SOLVER })]
+
+
+def getStartingState(layoutName):
+    world = layout.getLayout(layoutName)
+    state = pacman.GameState()
+    state.initialize(world, world.getNumGhosts())
+    return state
+
+
+def compareSweeps(layoutName):
+    '''
+    Return the total number of sweeps of each configuration in the
+    states visited playing on the given layout.
+    '''
+    state = getStartingState(layoutName)
+    agents = [MDPAgent(engine=engine, **arguments) for label, arguments in configurations]
+    ghosts = [ghostAgents.RandomGhost(index) for index in range(1, state.getNumAgents())]
+
+    for move in range(maxMoves):
+        if state.isWin() or state.isLose():
+            break
+
+        actions = [agent.getAction(state) for agent in agents]
+
+        # the reference agent (jacobi) decides how the game goes on
+        state = state.generateSuccessor(0, actions[0])
+        for ghost in ghosts:
+            if state.isWin() or state.isLose():
+                break
+            state = state.generateSuccessor(ghost.index, ghost.getAction(state))
+
+    return [sum(agent.sweepsPerMove) for agent in agents]
+
+
+layoutsFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'layouts')
+layoutNames = sorted([os.path.basename(path)[:-4] for path in glob.glob(os.path.join(layoutsFolder, '*.lay'))])
+
+print "%-24s" % "layout" + "".join(["%20s" % label for label, arguments in configurations])
+
+totals = [0] * len(configurations)
+for layoutName in layoutNames:
+    try:
+        sweeps = compareSweeps(layoutName)
+    except (KeyError, IndexError):
+        # the agent expects every accessible location to be reachable
+        # and Pacman to be on the map, which is not the case in a few layouts
+        print "%-24s" % layoutName + "%20s" % "not supported"
+        continue
+    totals = [total + count for total, count in zip(totals, sweeps)]
+    print "%-24s" % layoutName + "".join(["%20.1f" % count for count in sweeps])
+
+print "%-24s" % "TOTAL" + "".join(["%20.1f" % total for total in totals])
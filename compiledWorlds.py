@@ -0,0 +1,143 @@
+# compiledWorlds.py
+#
+# The static data the MDPAgent derives from a layout, compiled once
+# and saved to disk.
+#
+# At the start of a run the agent works out the accessible locations
+# from the walls, the moves of each location, the dead ends, the
+# transition model of the world (mdpSolvers.WorldModel) and the
+# distances between all the locations (mazeDistances.DistanceTable).
+# None of them ever changes for a layout, so the first run on a layout
+# saves them as arrays in a cache folder, and later runs memory-map
+# those arrays instead of computing them again.
+#
+# The compiled world of a layout is keyed by a hash of its walls, so
+# when a .lay file changes its walls, the world is compiled again:
+#
+#   compiledWorld = compiledWorlds.loadCompiledWorld(walls, moves, traversalMoves, cacheFolder)
+#   if compiledWorld is None:
+#       compiledWorld = compiledWorlds.CompiledWorld(deadEnds, worldModel, distanceTable)
+#       compiledWorlds.saveCompiledWorld(compiledWorld, walls, cacheFolder)
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import mazeDistances
+import mdpSolvers
+
+# changed whenever the files of a compiled world change,
+# so that the worlds compiled before are not loaded
+FORMAT_VERSION = 1
+
+# the arrays a compiled world is made of, each saved in its own file
+ARRAYS = ['locations', 'successors', 'deadEnds', 'distances']
+
+
+# the worlds already loaded, keyed by the hash of their walls,
+# so that games on the same layout share them
+compiledWorlds = {}
+
+
+class CompiledWorld:
+    '''
+    The static data of a layout.
+
+    The locations are given integer ids as in the world model (their
+    position in the accessible map), the moves of each location are
+    the ones whose intended outcome in the transition model lands on
+    another location, and the dead ends are the locations with one move.
+    '''
+
+    def __init__(self, deadEnds, worldModel, distanceTable):
+        self.accessibleMap = worldModel.locations
+        self.deadEnds = deadEnds
+        self.worldModel = worldModel
+        self.distanceTable = distanceTable
+
+        mainSuccessors = worldModel.successors[:, :, 0].tolist()
+        self.movesMap = { location: [move for move, landingId in zip(worldModel.moves, mainSuccessors[locationId])
+                                     if landingId != locationId]
+                          for locationId, location in enumerate(self.accessibleMap) }
+
+    def getArrays(self):
+        '''
+        Return the arrays the world is saved as, keyed by their name.
+        '''
+        return { 'locations': np.array(self.accessibleMap, dtype=np.int32),
+                 'successors': self.worldModel.successors,
+                 'deadEnds': self.worldModel.toIds(self.deadEnds),
+                 'distances': self.distanceTable.distances }
+
+
+def getWallsHash(walls):
+    '''
+    Return the hash identifying the layout with the given walls.
+    '''
+    return hashlib.md5(repr(sorted(walls))).hexdigest()
+
+
+def getCompiledWorldPath(walls, cacheFolder):
+    '''
+    Return the folder where the world with the given walls
+    is saved in the cache folder.
+    '''
+    return os.path.join(cacheFolder, 'world-%d-%s' % (FORMAT_VERSION, getWallsHash(walls)))
+
+
+def loadCompiledWorld(walls, moves, traversalMoves, cacheFolder):
+    '''
+    Return the compiled world with the given walls, memory-mapping its
+    arrays from the cache folder, or None if it has not been saved there.
+    The moves must be the ones the world was compiled with.
+    '''
+    wallsHash = getWallsHash(walls)
+
+    if wallsHash not in compiledWorlds:
+        compiledWorldPath = getCompiledWorldPath(walls, cacheFolder)
+        if not os.path.isdir(compiledWorldPath):
+            return None
+
+        arrays = { name: np.load(os.path.join(compiledWorldPath, name + '.npy'), mmap_mode='r') for name in ARRAYS }
+
+        accessibleMap = [tuple(location) for location in arrays['locations'].tolist()]
+        worldModel = mdpSolvers.WorldModel(accessibleMap, None, moves, traversalMoves, arrays['successors'])
+        distanceTable = mazeDistances.DistanceTable(accessibleMap, arrays['distances'])
+        deadEnds = [accessibleMap[locationId] for locationId in arrays['deadEnds'].tolist()]
+
+        compiledWorlds[wallsHash] = CompiledWorld(deadEnds, worldModel, distanceTable)
+
+        # the agents asking for the model or the distances of the same world share them too
+        mdpSolvers.worldModels.setdefault(tuple(accessibleMap), worldModel)
+        mazeDistances.distanceTables.setdefault(tuple(distanceTable.locations), distanceTable)
+
+    return compiledWorlds[wallsHash]
+
+
+def saveCompiledWorld(compiledWorld, walls, cacheFolder):
+    '''
+    Save the compiled world with the given walls in the cache folder.
+    The arrays are written in a temporary folder which is then renamed,
+    so that a run never loads a world which is only partly saved.
+    '''
+    compiledWorldPath = getCompiledWorldPath(walls, cacheFolder)
+    if os.path.isdir(compiledWorldPath):
+        return
+
+    if not os.path.isdir(cacheFolder):
+        os.makedirs(cacheFolder)
+
+    temporaryPath = tempfile.mkdtemp(dir=cacheFolder)
+    for name, array in compiledWorld.getArrays().items():
+        np.save(os.path.join(temporaryPath, name + '.npy'), array)
+
+    try:
+        os.rename(temporaryPath, compiledWorldPath)
+    except OSError:
+        # another run saved the same world in the meantime
+        shutil.rmtree(temporaryPath)
+
+    compiledWorlds[getWallsHash(walls)] = compiledWorld
@@ -1,142 +1,188 @@
+# doubleValueITerationMapGhostsAndFood.py
+#
+# A getValueIterationMap for the variants of the MDPAgent splitting the map
+# in two: the food is solved on its own taking the best move, the ghosts and
+# the dead ends on their own taking the worst move, and the two maps are summed.
+# Both are solved by the value iteration shared by all the variants, with the
+# rewards, the discount factor and epsilon of the agent passed in (see
+# the foodAndGhosts map split in mapSplits.py).
+#
+# The food map only changes when food is eaten, while the ghosts map changes
+# whenever Pacman or a ghost moves, so each map is cached in a dict the map
+# split keeps between the moves (see mapSplits.py) and solved again only
+# when its own inputs change. If the agent has a world model (numpy),
+# the two maps are solved and kept as arrays indexed by location id, and their
+# sum can be returned as an array, for callers which only read a few values:
+#
+#   values = getValueIterationMap(..., agent, cache, asArray=True)
 
-def getValueIterationMap(accessibleMap,        
+import mdpAgents
+
+# the vectorized solver needs numpy, the dict one works without it
+try:
+    import mdpSolvers
+except ImportError:
+    mdpSolvers = None
+
+
+def getValueIterationMap(accessibleMap,
                             movesMap,
-                            distancesMap,              
-                            pacman, 
+                            distancesMap,
+                            pacman,
                             activeGhosts,
-                            edibleGhosts,             
-                            food,        
+                            edibleGhosts,
+                            food,
                             isSmallGrid,
                             deadEnds,
                             initialFoodCount,
-                            allowedDistanceForActiveGhosts=MDPAgent.ACTIVE_GHOSTS_MAX_ALLOWED_DISTANCE,
-                            allowedDistanceForEdibleGhosts=MDPAgent.EDIBLE_GHOSTS_MAX_ALLOWED_DISTANCE,
-                            foodReward = MDPAgent.FOOD_REWARD,   
-                            moveReward = MDPAgent.MOVE_REWARD,  
-                            activeGhostReward = MDPAgent.ACTIVE_GHOST_REWARD,
-                            edibleGhostReward = MDPAgent.EDIBLE_GHOST_REWARD,
-                            pacmanReward = MDPAgent.PACMAN_REWARD,      
-                            deadEndReward = MDPAgent.DEAD_END_REWARD,
-                            discountFactor = MDPAgent.DISCOUNT_FACTOR,
-                            epsilon = 0.05
+                            agent,
+                            cache,
+                            successorLocations = None,
+                            asArray = False,
+                            statistics = None
                         ):
     '''
-    Return the value iteration map. Epsilon is the threshold, if the max change in the map 
+    Return the value iteration map. Epsilon is the threshold, if the max change in the map
     is below that number, we stop iterating (to improve performance).
-    minAllowedScoreChange prevents location to update their scores by an amount which is 
-    too small. 
+    The rewards, the discount factor and epsilon are the ones of the agent.
+    The food map and the ghosts map computed in the previous moves are kept
+    in the cache dict, and each is solved again only when one of its own 
+    inputs has changed. If the agent has a world model, the maps are kept 
+    as arrays indexed by location id, and if asArray is True their sum is 
+    returned as such an array rather than as a dict.
+    If a statistics dict is given, the statistics of the maps solved in this 
+    move are stored in it as the ones of a single solve (see combineStatistics).
     '''
-    foodValueIterationMap = getFoodValueIterationMap(accessibleMap,
-                                                     movesMap,
-                                                     distancesMap,
-                                                     pacman,
-                                                     food,
-                                                     initialFoodCount,
-                                                     foodReward
-                                                    )
-                                                    
-    ghostsValueIterationMap = getGhostsValueIterationMap(accessibleMap,
-                                                     movesMap,
-                                                     distancesMap,
-                                                     pacman,
-                                                     activeGhosts,
-                                                     edibleGhosts,
-                                                     deadEnds
-                                                    )
-
-    valueIterationMap = {location: ghostsValueIterationMap[location] + foodValueIterationMap[location] for location in accessibleMap}
+    foodReward = agent.FOOD_REWARD
+    moveReward = agent.MOVE_REWARD
+    activeGhostReward = agent.ACTIVE_GHOST_REWARD
+    edibleGhostReward = agent.EDIBLE_GHOST_REWARD
+    pacmanReward = agent.PACMAN_REWARD
+    deadEndReward = agent.DEAD_END_REWARD
+    discountFactor = agent.DISCOUNT_FACTOR
+    epsilon = agent.EPSILON
+
+    worldModel = agent.worldModel
+    # the statistics of the maps solved in this move
+    solvesStatistics = []
+
+    # the maps cached for another world cannot be reused
+    if cache.get('accessibleMap') is not accessibleMap:
+        cache.clear()
+        cache['accessibleMap'] = accessibleMap
+
+    foodKey = (frozenset(food), initialFoodCount, foodReward, moveReward, discountFactor, epsilon)
+    if cache.get('foodKey') != foodKey:
+        cache['foodValues'] = getFoodValueIterationMap(accessibleMap,
+                                                       movesMap,
+                                                       food,
+                                                       initialFoodCount,
+                                                       foodReward,
+                                                       moveReward,
+                                                       discountFactor,
+                                                       epsilon,
+                                                       successorLocations,
+                                                       worldModel,
+                                                       getSolveStatistics(solvesStatistics))
+        cache['foodKey'] = foodKey
+
+    # pacman is part of the ghosts map, which gives a reward to its location
+    ghostsKey = (pacman, tuple(activeGhosts), tuple(edibleGhosts), tuple(deadEnds),
+                 activeGhostReward, edibleGhostReward, deadEndReward, pacmanReward,
+                 moveReward, discountFactor, epsilon)
+    if cache.get('ghostsKey') != ghostsKey:
+        cache['ghostsValues'] = getGhostsValueIterationMap(accessibleMap,
+                                                           movesMap,
+                                                           pacman,
+                                                           activeGhosts,
+                                                           edibleGhosts,
+                                                           deadEnds,
+                                                           activeGhostReward,
+                                                           edibleGhostReward,
+                                                           deadEndReward,
+                                                           pacmanReward,
+                                                           moveReward,
+                                                           discountFactor,
+                                                           epsilon,
+                                                           successorLocations,
+                                                           worldModel,
+                                                           getSolveStatistics(solvesStatistics))
+        cache['ghostsKey'] = ghostsKey
+
+    if statistics is not None:
+        statistics.update(combineStatistics(solvesStatistics))
+
+    foodValues, ghostsValues = cache['foodValues'], cache['ghostsValues']
+
+    if worldModel is not None:
+        values = ghostsValues + foodValues
+        return values if asArray else worldModel.toMap(values)
+
+    valueIterationMap = {location: ghostsValues[location] + foodValues[location] for location in accessibleMap}
     return valueIterationMap
 
 
-def getFoodValueIterationMap(accessibleMap,        
+def getFoodValueIterationMap(accessibleMap,
                             movesMap,
-                            distancesMap,              
-                            pacman,             
-                            food,       
+                            food,
                             initialFoodCount,
-                            foodReward = MDPAgent.FOOD_REWARD,   
-                            moveReward = MDPAgent.MOVE_REWARD,  
-                            pacmanReward = MDPAgent.PACMAN_REWARD,   
-                            discountFactor = MDPAgent.DISCOUNT_FACTOR,
-                            epsilon = 0.05
+                            foodReward,
+                            moveReward,
+                            discountFactor,
+                            epsilon,
+                            successorLocations = None,
+                            worldModel = None,
+                            statistics = None
                         ):
-    
+
     # initialise value iteration map
     oldValueIterationMap = { location : 0 for location in accessibleMap }
 
-    scoreableMap = [ location for location in accessibleMap ]
-
     # The value of food increase as less food remains
     ## MEDIUM GRID SETTINGS
     foodReward *= initialFoodCount / (len(food) + 0.0)
 
-    # Create the next value iteration map
-    newValueIterationMap = {}
-    
     # Update the old map in food and ghosts locations
     for foodLocation in food: oldValueIterationMap[foodLocation] += foodReward
 
     ## MEDIUM CLASSIC SETTINGS
     # pacman should try to always change location
-    # oldValueIterationMap[pacman] = pacmanReward 
-
-    # This is used to determine the end of the 
-    # value iteration loop
-    maxUpdate = epsilon + 1
+    # oldValueIterationMap[pacman] = pacmanReward
 
-    while maxUpdate > epsilon:
-        maxUpdate = 0
-        
-        for scoreableLocation in scoreableMap:
+    # the utility of staying still is one of the options
+    return solveMap(oldValueIterationMap,
+                    movesMap,
+                    accessibleMap,
+                    moveReward,
+                    epsilon,
+                    discountFactor,
+                    successorLocations,
+                    'max',
+                    worldModel,
+                    statistics)
 
-            locationValue = bellmanEquation(moveReward, 
-                                            scoreableLocation, 
-                                            oldValueIterationMap, 
-                                            movesMap, 
-                                            distancesMap,
-                                            utilitiesDealerFunction=max, 
-                                            includeNoMove=True)    
 
-            locationValueUpdate = abs(locationValue - oldValueIterationMap[scoreableLocation])
-
-            maxUpdate = max(maxUpdate, locationValueUpdate)
-            
-            newValueIterationMap[scoreableLocation] = locationValue
-
-        # update old value iteration map
-        for key, newValue in newValueIterationMap.items():
-            oldValueIterationMap[key] = newValue
-
-        newValueIterationMap = {}
-
-    return oldValueIterationMap
-
-
-def getGhostsValueIterationMap(accessibleMap,        
+def getGhostsValueIterationMap(accessibleMap,
                             movesMap,
-                            distancesMap,              
-                            pacman, 
+                            pacman,
                             activeGhosts,
-                            edibleGhosts, 
+                            edibleGhosts,
                             deadEnds,
-                            allowedDistanceForActiveGhosts=MDPAgent.ACTIVE_GHOSTS_MAX_ALLOWED_DISTANCE,
-                            allowedDistanceForEdibleGhosts=MDPAgent.EDIBLE_GHOSTS_MAX_ALLOWED_DISTANCE,
-                            moveReward = MDPAgent.MOVE_REWARD,  
-                            activeGhostReward = MDPAgent.ACTIVE_GHOST_REWARD,
-                            edibleGhostReward = MDPAgent.EDIBLE_GHOST_REWARD,
-                            pacmanReward = MDPAgent.PACMAN_REWARD,      
-                            deadEndReward = MDPAgent.DEAD_END_REWARD,
-                            discountFactor = MDPAgent.DISCOUNT_FACTOR,
-                            epsilon = 0.05
+                            activeGhostReward,
+                            edibleGhostReward,
+                            deadEndReward,
+                            pacmanReward,
+                            moveReward,
+                            discountFactor,
+                            epsilon,
+                            successorLocations = None,
+                            worldModel = None,
+                            statistics = None
                         ):
-    
+
     # initialise value iteration map
     oldValueIterationMap = { location : 0 for location in accessibleMap }
-    scoreableMap = [ location for location in accessibleMap ]
 
-    # Create the next value iteration map
-    newValueIterationMap = {}
-    
     # Update the old map in food and ghosts locations
     for ghostLocation in activeGhosts: oldValueIterationMap[ghostLocation] += activeGhostReward
     for ghostLocation in edibleGhosts: oldValueIterationMap[ghostLocation] += edibleGhostReward
@@ -144,35 +190,78 @@ def getGhostsValueIterationMap(accessibleMap,
 
     ## MEDIUM CLASSIC SETTINGS
     # pacman should try to always change location
-    oldValueIterationMap[pacman] = pacmanReward 
+    oldValueIterationMap[pacman] = pacmanReward
 
-    # This is used to determine the end of the 
-    # value iteration loop
-    maxUpdate = epsilon + 1
+    # the utility of staying still is one of the options
+    return solveMap(oldValueIterationMap,
+                    movesMap,
+                    accessibleMap,
+                    moveReward,
+                    epsilon,
+                    discountFactor,
+                    successorLocations,
+                    'min',
+                    worldModel,
+                    statistics)
 
-    while maxUpdate > epsilon:
-        maxUpdate = 0
-        
-        for scoreableLocation in scoreableMap:
 
-            locationValue = bellmanEquation(moveReward, 
-                                            scoreableLocation, 
-                                            oldValueIterationMap, 
-                                            movesMap, 
-                                            distancesMap,
-                                            utilitiesDealerFunction=min,
-                                            includeNoMove=True)    
-
-            locationValueUpdate = abs(locationValue - oldValueIterationMap[scoreableLocation])
+def solveMap(oldValueIterationMap,
+             movesMap,
+             updatableLocations,
+             moveReward,
+             epsilon,
+             discountFactor,
+             successorLocations,
+             backup,
+             worldModel,
+             statistics=None):
+    '''
+    Solve the map with value iteration, counting staying still as one of
+    the moves. With a world model the map is solved by the vectorized
+    solver, which gives the same values, and returned as an array.
+    '''
+    if worldModel is None:
+        return mdpAgents.valueIterationFunction(oldValueIterationMap,
+                                                movesMap,
+                                                updatableLocations,
+                                                moveReward,
+                                                epsilon,
+                                                discountFactor,
+                                                successorLocations,
+                                                statistics,
+                                                backup=backup,
+                                                includeNoMove=True)
 
-            maxUpdate = max(maxUpdate, locationValueUpdate)
+    return mdpSolvers.vectorizedValueIterationFunction(oldValueIterationMap,
+                                                       worldModel,
+                                                       updatableLocations,
+                                                       moveReward,
+                                                       epsilon,
+                                                       discountFactor,
+                                                       statistics,
+                                                       backup=backup,
+                                                       includeNoMove=True,
+                                                       asArray=True)
 
-            newValueIterationMap[scoreableLocation] = locationValue
 
-        # update old value iteration map
-        for key, newValue in newValueIterationMap.items():
-            oldValueIterationMap[key] = newValue
+def getSolveStatistics(solvesStatistics):
+    '''
+    Return a new statistics dict for a map solved in this move,
+    appended to the list of the statistics of the move.
+    '''
+    statistics = {}
+    solvesStatistics.append(statistics)
+    return statistics
 
-        newValueIterationMap = {}
 
-    return oldValueIterationMap
+def combineStatistics(solvesStatistics):
+    '''
+    Return the statistics of the maps solved in a move as the ones of a 
+    single solve: the sweeps and the backups of the maps are summed, the 
+    max update is the largest one, and the move converged if every map did.
+    If no map was solved (both came from the cache) nothing was updated.
+    '''
+    return { 'sweeps': sum(statistics['sweeps'] for statistics in solvesStatistics),
+             'backups': sum(statistics['backups'] for statistics in solvesStatistics),
+             'maxUpdate': max([statistics['maxUpdate'] for statistics in solvesStatistics] + [0.0]),
+             'converged': all(statistics['converged'] for statistics in solvesStatistics) }
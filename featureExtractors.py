@@ -0,0 +1,117 @@
+# featureExtractors.py
+#
+# The features the ApproximateQAgent in mlLearningAgents.py estimates
+# the value of its actions from, as a weighted sum of them.
+#
+# Unlike the key of a state in the Q-table of the QLearnAgent, the
+# features tell how good a state is in terms which carry over to the
+# states never seen (how far the food, the ghosts and the capsules
+# are), so the agent needs a weight for each feature only, whatever the
+# size of the layout and however long it trained.
+#
+# The features of all the legal actions are computed together, each
+# from the location the action leads Pacman to, as a matrix with a row
+# for each action, reading the distances from the distance table of
+# the layout (see mazeDistances.py):
+#
+#   featureExtractor = featureExtractors.FeatureExtractor()
+#   features = featureExtractor.getFeatures(state, actions)
+#   qValues = features.dot(weights)
+
+import numpy as np
+
+import mazeDistances
+from game import Actions
+from pacman import SCARED_TIME
+from util import nearestPoint
+
+# the features of an action, the columns of the features matrix:
+#
+#   bias                 always 1
+#   foodDistance         the distance to the closest food, over the largest distance in the layout
+#   eatsFood             1 if the action eats a food
+#   ghostsNearby         the fraction of the ghosts which are not scared and at most one move away
+#   ghostCloseness       1 / (1 + the distance to the closest ghost which is not scared)
+#   scaredGhostCloseness 1 / (1 + the distance to the closest scared ghost which can be
+#                        reached before it stops being scared)
+#   capsuleCloseness     1 / (1 + the distance to the closest capsule)
+#   scaredTime           the time left to the ghost scared the longest, over the time they are scared for
+FEATURES = ['bias', 'foodDistance', 'eatsFood', 'ghostsNearby', 'ghostCloseness', 'scaredGhostCloseness',
+            'capsuleCloseness', 'scaredTime']
+
+
+class FeatureExtractor:
+    '''
+    Compute the features of the actions of Pacman in the states of a layout.
+    '''
+
+    def __init__(self):
+        self.walls = None
+
+    def setUpLayout(self, walls):
+        '''
+        Get the distance table of the layout with the given walls.
+        '''
+        self.walls = walls
+        self.distanceTable = mazeDistances.getDistanceTable(walls.asList(False))
+        reachable = self.distanceTable.distances[self.distanceTable.distances != mazeDistances.UNREACHABLE]
+        self.maxDistance = max(1, int(reachable.max()))
+
+    def getInitialWeights(self):
+        return np.zeros(len(FEATURES))
+
+    def getFeatures(self, state, actions):
+        '''
+        Return the matrix of the features of the given actions in the given
+        state, with a row for each action and a column for each feature.
+        '''
+        # each state holds its own copy of the layout (and Grid has no !=)
+        walls = state.getWalls()
+        if not walls == self.walls:
+            self.setUpLayout(walls)
+
+        locationIds = self.distanceTable.locationIds
+        food = state.getFood()
+        pacman = state.getPacmanPosition()
+        landings = [nearestPoint(Actions.getSuccessor(pacman, action)) for action in actions]
+
+        # the distances from the location each action leads to
+        distances = self.distanceTable.distances[[locationIds[landing] for landing in landings]].astype(float)
+
+        features = np.zeros((len(actions), len(FEATURES)))
+        features[:, 0] = 1
+        # (no food is left only when the game is won, the distance is capped anyway)
+        features[:, 1] = np.minimum(getClosestDistances(distances, food.asList(), locationIds), self.maxDistance) / self.maxDistance
+        features[:, 2] = [food[x][y] for x, y in landings]
+
+        ghostStates = state.getGhostStates()
+        activeGhosts = [nearestPoint(ghostState.getPosition()) for ghostState in ghostStates if ghostState.scaredTimer == 0]
+        scaredGhosts = [ghostState for ghostState in ghostStates if ghostState.scaredTimer > 0]
+
+        if len(activeGhosts) > 0:
+            activeGhostDistances = distances[:, [locationIds[ghost] for ghost in activeGhosts]]
+            features[:, 3] = (activeGhostDistances <= 1).sum(axis=1) / float(len(ghostStates))
+            features[:, 4] = 1 / (1 + activeGhostDistances.min(axis=1))
+
+        if len(scaredGhosts) > 0:
+            scaredGhostDistances = distances[:, [locationIds[nearestPoint(ghostState.getPosition())]
+                                                 for ghostState in scaredGhosts]]
+            # the ghosts which will not be scared anymore when reached do not count
+            scaredTimers = np.array([ghostState.scaredTimer for ghostState in scaredGhosts])
+            scaredGhostDistances[scaredGhostDistances >= scaredTimers] = np.inf
+            features[:, 5] = 1 / (1 + scaredGhostDistances.min(axis=1))
+            features[:, 7] = scaredTimers.max() / float(SCARED_TIME)
+
+        features[:, 6] = 1 / (1 + getClosestDistances(distances, state.getCapsules(), locationIds))
+
+        return features
+
+
+def getClosestDistances(distances, locations, locationIds):
+    '''
+    Return, for each row of the distances, the distance to the closest
+    of the given locations (infinite if there are none).
+    '''
+    if len(locations) == 0:
+        return np.full(len(distances), np.inf)
+    return distances[:, [locationIds[location] for location in locations]].min(axis=1)
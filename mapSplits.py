@@ -0,0 +1,138 @@
+# mapSplits.py
+#
+# Map splits choosing how the MDPAgent in mdpAgents.py splits the map it
+# solves at every move. Without a split (the default) the whole map laid out
+# by the reward layout of the agent (see rewardLayouts.py) is solved at once.
+#
+#   ghostRegions  - the region around each ghost is solved on its own first,
+#                   with the utilities of its moves combined by
+#                   ACTIVE_GHOSTS_BACKUP (or, if edible, EDIBLE_GHOSTS_BACKUP),
+#                   and its values are added to the rewards of the whole map,
+#                   which is solved then ("mdpAgents AVG fixed ghosts.py").
+#   foodAndGhosts - the food and the ghosts are solved in two separate maps,
+#                   each kept between the moves and solved again only when
+#                   its own inputs change, and the two maps are summed (see
+#                   doubleValueITerationMapGhostsAndFood.py). The maps lay out
+#                   their own rewards, so the reward layout is not used
+#                   (DualMapMDPAgent in mdpAgentsMEDIUMCLASSIC.py).
+#
+# e.g.
+#
+#   python pacman.py -p MDPAgent -l smallGrid -a rewardLayout=scaledFood,mapSplit=ghostRegions
+
+import mdpAgents
+import doubleValueITerationMapGhostsAndFood as dualMaps
+
+
+class GhostRegionsMapSplit:
+    '''
+    Solve the region within ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE steps from
+    each active ghost (EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE if edible) on its
+    own, starting from the rewards of the map, add the values of all the
+    regions to the rewards and solve the whole map. Once one food is left
+    on the small grid, the regions of the active ghosts only extend
+    LAST_FOOD_GHOSTS_DISTANCE steps.
+    '''
+
+    # how the utilities of the moves are combined in the region around each ghost
+    ACTIVE_GHOSTS_BACKUP = 'avg'
+    EDIBLE_GHOSTS_BACKUP = 'min'
+    # the steps of the regions of the active ghosts once one food is left on the small grid
+    LAST_FOOD_GHOSTS_DISTANCE = 2
+
+    def getValueIterationMap(self, agent, pacman, activeGhosts, edibleGhosts, food, statistics):
+        '''
+        Return the value iteration map of the move, storing the
+        statistics of the solve of the whole map in statistics.
+        '''
+        rewardLayout = agent.rewardLayout
+        rewardsMap, updatableLocations = rewardLayout.getRewardsMap(agent, pacman, activeGhosts, edibleGhosts, food)
+
+        activeGhostsDistance = agent.ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE
+        if agent.isSmallGrid and len(food) == 1:
+            activeGhostsDistance = self.LAST_FOOD_GHOSTS_DISTANCE
+
+        regions = [(activeGhosts, activeGhostsDistance, self.ACTIVE_GHOSTS_BACKUP),
+                   (edibleGhosts, agent.EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE, self.EDIBLE_GHOSTS_BACKUP)]
+
+        # all the regions are solved from the rewards, which
+        # only get the values of the regions afterwards
+        regionsMap = {}
+        for ghosts, stepsLimit, backup in regions:
+            for ghost in ghosts:
+                ghostRegionMap = mdpAgents.getElementValueIterationMap(ghost,
+                                                                       rewardsMap,
+                                                                       agent.movesMap,
+                                                                       stepsLimit,
+                                                                       agent.MOVE_REWARD,
+                                                                       agent.EPSILON,
+                                                                       agent.DISCOUNT_FACTOR,
+                                                                       backup,
+                                                                       agent.distanceTable)
+                for location, value in ghostRegionMap.items():
+                    regionsMap[location] = regionsMap.get(location, 0) + value
+
+        for location, value in regionsMap.items():
+            rewardsMap[location] += value
+
+        valueIterationMap = mdpAgents.solveRewardsMap(rewardsMap, updatableLocations, food, agent, statistics)
+        return rewardLayout.adjustValues(agent, valueIterationMap)
+
+
+class FoodAndGhostsMapSplit:
+    '''
+    Solve the food and the ghosts in two separate maps, the food taking
+    the best move and the ghosts the worst one, and sum them (see
+    doubleValueITerationMapGhostsAndFood.py). Each map is kept between
+    the moves and solved again only when its own inputs change.
+    '''
+
+    def __init__(self):
+        # the food and ghosts maps of the previous moves, with the inputs they were solved from
+        self.valueIterationMapsCache = {}
+
+    def getValueIterationMap(self, agent, pacman, activeGhosts, edibleGhosts, food, statistics):
+        '''
+        Return the sum of the food and ghosts maps. With a world model
+        the sum is an array, and only the values of the locations
+        Pacman can land on (all the move is chosen from) are read.
+        '''
+        values = dualMaps.getValueIterationMap(agent.accessibleMap,
+                                               agent.movesMap,
+                                               agent.distancesMap,
+                                               pacman,
+                                               activeGhosts,
+                                               edibleGhosts,
+                                               food,
+                                               agent.isSmallGrid,
+                                               agent.deadEnds,
+                                               agent.initialFoodCount,
+                                               agent,
+                                               self.valueIterationMapsCache,
+                                               successorLocations=mdpAgents.getSuccessorLocations(agent.worldModel),
+                                               asArray=agent.worldModel is not None,
+                                               statistics=statistics)
+        if agent.worldModel is None:
+            return values
+
+        landingLocations = [pacman] + [mdpAgents.sumTuples(pacman, move) for move in agent.movesMap[pacman]]
+        return { location: values[agent.worldModel.locationIds[location]] for location in landingLocations }
+
+
+GHOST_REGIONS_SPLIT = 'ghostRegions'
+FOOD_AND_GHOSTS_SPLIT = 'foodAndGhosts'
+
+splits = { GHOST_REGIONS_SPLIT: GhostRegionsMapSplit,
+           FOOD_AND_GHOSTS_SPLIT: FoodAndGhostsMapSplit }
+
+
+def getMapSplit(name):
+    '''
+    Return a new map split of the given kind (see the top of this file),
+    or None if no name is given, so that the whole map is solved at once.
+    '''
+    if name is None:
+        return None
+    if name not in splits:
+        raise Exception('Unknown map split ' + name + ', choose one of ' + ', '.join(sorted(splits)))
+    return splits[name]()
@@ -0,0 +1,218 @@
+# mazeDistances.py
+#
+# The maze distance (number of moves along the shortest path) between
+# every pair of accessible locations of a layout.
+#
+# The agents used to run a Breadth First Search every time they needed
+# a distance: from Pacman at every move, and again from every ghost and
+# every dead end. Here all the searches are run once per layout, all
+# together as NumPy operations, and stored in a matrix of uint16, so
+# that any distance afterwards is a lookup.
+#
+# Any agent can build the table of its layout from the accessible
+# locations, e.g. from the state of the game:
+#
+#   distanceTable = mazeDistances.getDistanceTable(state.getWalls().asList(False))
+#   distanceTable.getDistance(pacman, ghost)
+#
+# Tables are cached by layout, so repeated games on the same layout
+# share the same table. If a cache folder is given, the tables are also
+# saved there and loaded by later runs.
+
+import hashlib
+import os
+
+import numpy as np
+
+# the distance stored for the locations which cannot be reached
+UNREACHABLE = np.iinfo(np.uint16).max
+
+moves = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+# the tables already built, keyed by the accessible locations
+# of their layout, so that games on the same layout share them
+distanceTables = {}
+
+
+class DistanceTable:
+    '''
+    The distances between all the pairs of accessible locations.
+
+    Each location is given an integer id (its position in the locations
+    list, which is sorted), and distances[id1, id2] is the number of moves
+    needed to go from location id1 to location id2 (UNREACHABLE if there is
+    no path between them).
+    '''
+
+    def __init__(self, locations, distances=None):
+        self.locations = sorted(locations)
+        self.locationIds = { location: locationId for locationId, location in enumerate(self.locations) }
+        self.distances = getAllPairsDistances(self.locations, self.locationIds) if distances is None else distances
+
+    def getDistance(self, location1, location2):
+        '''
+        Return the number of moves needed to go from location1 to location2,
+        None if location2 cannot be reached.
+        '''
+        distance = self.distances[self.locationIds[location1], self.locationIds[location2]]
+        return None if distance == UNREACHABLE else int(distance)
+
+    def getDistancesMap(self, startingLocations, limit=float("inf")):
+        '''
+        Return the distance of each location from the closest of the starting
+        locations as a DistancesMap, which can be used as the dict
+        { location: distance } built by a Breadth First Search from them.
+        '''
+        startingIds = [self.locationIds[location] for location in startingLocations]
+
+        if len(startingIds) == 0:
+            distances = np.full(len(self.locations), UNREACHABLE, dtype=np.uint16)
+        elif len(startingIds) == 1:
+            distances = self.distances[startingIds[0]]
+        else:
+            distances = self.distances[startingIds].min(axis=0)
+
+        return DistancesMap(self, distances.tolist(), limit)
+
+    def getClosestDistances(self, startingLocations, locations):
+        '''
+        Return the distance of each of the given locations from the closest
+        of the starting locations (None if none can be reached), reading 
+        only the distances of those locations rather than of the whole map.
+        '''
+        if len(startingLocations) == 0:
+            return [None] * len(locations)
+
+        startingIds = [self.locationIds[location] for location in startingLocations]
+        ids = [self.locationIds[location] for location in locations]
+        distances = self.distances[np.ix_(startingIds, ids)].min(axis=0)
+        return [None if distance == UNREACHABLE else distance for distance in distances.tolist()]
+
+    def getLocationsWithinDistance(self, location, limit):
+        '''
+        Return the locations that can be reached from the given one
+        within the limit, as a list of (location, distance) pairs.
+        '''
+        distances = self.distances[self.locationIds[location]]
+        closeIds = np.flatnonzero(distances <= limit)
+        return zip([self.locations[closeId] for closeId in closeIds.tolist()],
+                   distances[closeIds].tolist())
+
+
+class DistancesMap:
+    '''
+    A read only view of the distances of the locations from some starting
+    locations, behaving like the dict { location: distance } holding only
+    the locations reachable within the limit.
+    '''
+
+    def __init__(self, distanceTable, distances, limit):
+        self.distanceTable = distanceTable
+        self.distances = distances
+        self.limit = min(limit, UNREACHABLE - 1)
+
+    def get(self, location, default=None):
+        locationId = self.distanceTable.locationIds.get(location)
+        if locationId is None or self.distances[locationId] > self.limit:
+            return default
+        return self.distances[locationId]
+
+    def __getitem__(self, location):
+        distance = self.get(location)
+        if distance is None:
+            raise KeyError(location)
+        return distance
+
+    def __contains__(self, location):
+        return self.get(location) is not None
+
+    def items(self):
+        return [(location, distance) for location, distance in zip(self.distanceTable.locations, self.distances)
+                if distance <= self.limit]
+
+    def keys(self):
+        return [location for location, distance in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.items())
+
+
+def getAllPairsDistances(locations, locationIds):
+    '''
+    Return the matrix of the distances between all the pairs of locations,
+    running a Breadth First Search from every location at the same time:
+    at each step the frontier of every search (a row of a boolean matrix)
+    is moved to the neighbours of its locations.
+    '''
+    size = len(locations)
+
+    # neighbours[id, moveIndex] is the id of the location reached performing
+    # the move, or id itself if the move leads into a wall
+    neighbours = np.empty((size, len(moves)), dtype=np.int32)
+    for locationId, location in enumerate(locations):
+        for moveIndex, move in enumerate(moves):
+            neighbour = (location[0] + move[0], location[1] + move[1])
+            neighbours[locationId, moveIndex] = locationIds.get(neighbour, locationId)
+
+    distances = np.full((size, size), UNREACHABLE, dtype=np.uint16)
+    frontier = np.eye(size, dtype=bool)
+    visited = frontier.copy()
+    distances[frontier] = 0
+
+    distance = 0
+    while frontier.any():
+        distance += 1
+
+        # a location is reached by a search if any of its neighbours is in its frontier
+        reached = np.zeros((size, size), dtype=bool)
+        for moveIndex in range(len(moves)):
+            reached |= frontier[:, neighbours[:, moveIndex]]
+
+        frontier = reached & ~visited
+        visited |= frontier
+        distances[frontier] = distance
+
+    return distances
+
+
+def getCacheFilePath(locations, cacheFolder):
+    '''
+    Return the file where the table of the given (sorted) locations
+    is saved in the cache folder.
+    '''
+    layoutHash = hashlib.md5(repr(locations)).hexdigest()
+    return os.path.join(cacheFolder, 'distances-' + layoutHash + '.npy')
+
+
+def getDistanceTable(accessibleLocations, cacheFolder=None):
+    '''
+    Return the distance table of the layout with the given accessible
+    locations, building it only the first time the layout is seen.
+    If a cache folder is given, the table is loaded from it when it has
+    been saved there before, otherwise it is built and saved there.
+    '''
+    locations = sorted(accessibleLocations)
+    key = tuple(locations)
+
+    if key not in distanceTables:
+        distances = None
+
+        if cacheFolder is not None:
+            cacheFilePath = getCacheFilePath(locations, cacheFolder)
+            if os.path.exists(cacheFilePath):
+                distances = np.load(cacheFilePath)
+
+        distanceTable = DistanceTable(locations, distances)
+
+        if cacheFolder is not None and distances is None:
+            if not os.path.isdir(cacheFolder):
+                os.makedirs(cacheFolder)
+            np.save(cacheFilePath, distanceTable.distances)
+
+        distanceTables[key] = distanceTable
+
+    return distanceTables[key]
@@ -28,22 +28,18 @@
 # The agent here is was written by Simon Parsons, based on the code in
 # pacmanAgents.py
 
-from pacman import Directions
-from game import Agent
-import api
-import random
-import game
-import math
-import itertools
-import copy
+# This version of the agent only sets its own rewards and how its map is laid out
+# and solved, it is solved by the MDPAgent of mdpAgents.py (see rewardLayouts.py
+# and mapSplits.py)
 
+import mdpAgents
 
-class MDPAgent(Agent):
-    DEBUG = True
 
-    ACTIVE_GHOSTS_MAX_ALLOWED_DISTANCE = 9
-    EDIBLE_GHOSTS_MAX_ALLOWED_DISTANCE = 3 # None
-    DEADEND_MAX_ALLOWED_DISTANCE = 1
+class MDPAgent(mdpAgents.MDPAgent):
+
+    ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE = 9
+    EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE = 3 # None
+    DEADEND_MIN_ALLOWED_DISTANCE = 1
 
     # Rewards
     ACTIVE_GHOST_REWARD = -100.0
@@ -58,753 +54,25 @@ class MDPAgent(Agent):
     DEAD_END_REWARD = -15
     DISCOUNT_FACTOR = 0.9
     EPSILON = 0.05
-    moves = [
-        (1, 0),     # East
-        (-1, 0),    # West
-        (0, 1),     # North
-        (0, -1)     # South
-    ]
-
-    traversalMoves = {
-        (1, 0):  [(0, 1), (0, -1)],    # East
-        (-1, 0): [(0, 1), (0, -1)],    # West
-        (0, 1):  [(1, 0), (-1, 0)],    # North
-        (0, -1): [(1, 0), (-1, 0)]    # South
-    }
-
-    moveToDirection = {
-        (1, 0)  : Directions.EAST,
-        (-1, 0) : Directions.WEST,
-        (0, 1)  : Directions.NORTH,
-        (0, -1) : Directions.SOUTH,
-        (0, 0)  : Directions.STOP
-    }
-
-    def __init__(self):
-        self.firstMove = True
-        self.requestedMove_operatedMove_pair = [] # (requested, operated)
-        self.previousPosition = None
-        
-        # STATIC ELEMENTS
-        # list of all the locations pacman has access to
-        self.accessibleMap = []
-        # list of all the locations surrounded by 3 walls
-        self.deadEnds = []
-        self.initialFoodCount = 0
-
-        # the type is { location: moves[] }
-        self.movesMap = {}  
-        self.walls = []
-        
-        # DYNAMIC ELEMENTS
-        self.ghostsStates = []
+    SMALL_GRID_SETTINGS = { 'ACTIVE_GHOST_REWARD': -0.8,
+                            'FOOD_REWARD': 1.0,
+                            'PACMAN_REWARD': -10.0,
+                            'MOVE_REWARD': -0.01,
+                            'DEAD_END_REWARD': -15.0,
+                            'LAST_FOOD_REWARD': 17.0,
+                            'DISCOUNT_FACTOR': 0.99,
+                            'EPSILON': 0.1 }
+
+    # the food is worth more as less of it is left, the ghosts are fixed, 
+    # the future is discounted more the further a location is from pacman,
+    # and on the small grid the regions around the ghosts are solved first
+    REWARD_LAYOUT = 'scaledFood'
+    MAP_SPLIT = 'ghostRegions'
+    DISTANCE_DISCOUNTS = True
 
-        # includes capsules
-        self.food = []
-
-    # Gets run after an MDPAgent object is created and once there is
-    # game state to access.
-    def registerInitialState(self, state):
-        print "Running registerInitialState for MDPAgent!"
-        print "I'm at:"
-        print api.whereAmI(state)
-        
-    # This is what gets run in between multiple games
-    def final(self, state):
-        print "Looks like the game just ended!"
-
-    
     def setUpWorld(self, state):
-        '''
-        This method sets up the knowledge of the agent about 
-        static data of the world. This method deals this data will 
-        never change throughout the execution of the game in the same
-        world, it is intended to be called only once not to waste 
-        resources.
-        '''        
-        food = api.food(state)
-        capsules = api.capsules(state)
-        self.food = food + capsules
-        self.walls = api.walls(state)
-        self.accessibleMap = getNonWallLocations(self.walls, state)
-        self.movesMap = getMapMoves(self.accessibleMap)
-        self.isSmallGrid = len(capsules) == 0
-        self.deadEnds = getDeadEnds(self.accessibleMap, self.movesMap)
-        self.initialFoodCount = len(self.food)
-
-        if self.isSmallGrid:
-            self.GHOSTS_MAX_ALLOWED_DISTANCE = 5
-            self.ACTIVE_GHOST_REWARD = -0.8
-            self.FOOD_REWARD = 1.0
-            self.PACMAN_REWARD = -10.0
-            self.MOVE_REWARD = -0.01
-            self.DEAD_END_REWARD = -15.0
-            self.LAST_FOOD_REWARD = -self.DEAD_END_REWARD + 2.0
-            self.DISCOUNT_FACTOR = 0.99
-            self.EPSILON = 0.1
-
-
-    def getAction(self, state):
-
-        # One time operations
-        if self.firstMove:
-            self.setUpWorld(state)
-            # prevent this method from being called again
-            self.firstMove = False
-
-        # Operations to be performed at the beginning of every action
-        food = api.food(state)
-        capsules = api.capsules(state)
-        self.food = food + capsules
-
-        # Updates related to pacman
-        pacman = api.whereAmI(state)
-        self.distancesMap = getLocationsDistanceStartingLocation(pacman, self.movesMap)
-
-        # Ghosts related updates
-        self.ghostsStates = api.ghostStates(state)
-
-        activeGhosts, edibleGhosts = getActiveAndEdibleGhostsLocations(self.ghostsStates, self.distancesMap)
-
-        riskyActiveGhosts, riskyEdibleGhosts = getRiskyGhosts(activeGhosts, edibleGhosts, self.distancesMap)
-        
-        valueIterationMap = getValueIterationMap(self.accessibleMap, 
-                                                        self.movesMap, 
-                                                        self.distancesMap,
-                                                        pacman, 
-                                                        activeGhosts, #riskyActiveGhosts,
-                                                        edibleGhosts, #riskyEdibleGhosts,
-                                                        self.food, 
-                                                        self.isSmallGrid,
-                                                        self.deadEnds,
-                                                        self.initialFoodCount,
-                                                        self
-                                                    )
-
-        bestMove = getBestNextMove(self.moves, 
-                                    pacman, 
-                                    valueIterationMap, 
-                                    self.movesMap, 
-                                    self.distancesMap, 
-                                   )
-
-
-        bestDirection = self.moveToDirection[ bestMove ]
-
-        return api.makeMove(bestDirection, api.legalActions(state))
-
-
-
-
-
-
-
-
-
-###############
-#             #   
-#  FUNCTIONS  #
-#             #   
-###############
-def avg( list ):
-    '''
-    Return the average value of a list
-    '''
-    return sum(list) / (0.0 + len(list))
-
-
-def sumTuples( tuple1, tuple2 ):
-    return tuple([(i + j) for i, j in zip(tuple1, tuple2)])
-
-
-def manhattanDistance( xy1, xy2 ):
-    '''
-    Return the manhattan distance between two points
-    '''
-    return abs( xy1[0] - xy2[0]) + abs(xy1[1] - xy2[1] )
-
-
-def getDeadEnds(accessibleMap, movesMap):
-    '''
-    Given the list of the accessible locations on the map,
-    return a list of locations surrounded by 3 walls.
-    '''
-    deadEnds = [location for location in accessibleMap if len(movesMap[location]) == 1]
-    return deadEnds
-
-
-def getRiskyGhosts(activeGhosts,
-                   edibleGhosts, 
-                   distancesMap, 
-                   allowedDistanceForActiveGhosts=MDPAgent.ACTIVE_GHOSTS_MAX_ALLOWED_DISTANCE,
-                   allowedDistanceForEdibleGhosts=MDPAgent.EDIBLE_GHOSTS_MAX_ALLOWED_DISTANCE
-                ):
-    '''
-    Given active and edible ghosts, and a distance map,
-    return a the ghosts considered risky, that is, too close
-    to pacman. The max allowed distance varies based on the ghost
-    state {active, edible}.
-    '''
-    # 1 -> ghost is edible
-    # 0 -> ghost is active
-    riskyActiveGhosts = filter(lambda ghost: distancesMap[ghost] <= allowedDistanceForActiveGhosts, activeGhosts) 
-    riskyEdibleGhosts = filter(lambda ghost: distancesMap[ghost] <= allowedDistanceForEdibleGhosts, edibleGhosts) 
-
-    return riskyActiveGhosts, riskyEdibleGhosts
-
-
-def getActiveAndEdibleGhostsLocations(ghostsStates, distancesMap):
-    '''
-    Given the ghost states return 2 lists, respectively
-    the list containing active ghosts and the one containing
-    edible ghosts. The distances map is used in the case 
-    a ghost is not amid 2 locations, the closest one to pacman is
-    considered as its position.
-    '''
-    activeGhosts = []
-    edibleGhosts = []
-
-    IS_EDIBLE = 1
-    # 1 -> ghost is edible
-    # 0 -> ghost is active
-
-    for ghostState in ghostsStates:
-        ghost = ghostState[0]
-        status = ghostState[1]
-        if status == IS_EDIBLE:
-            # As edible ghosts may have locations (a, b) as (x.5, y) 
-            # we consider both locations as x.5 + 0.5 and x.5 - 0.5.
-            adjacentGhostLocations = getAdjacentGhostLocationsIfLocationNotOnMap(ghost)
-            adjacentGhostLocationsDistances = {distancesMap[ghost]: ghost for ghost in adjacentGhostLocations} 
-
-            # Only the location which is closer to pacman is taken into account.
-            closestGhostDistance = min(adjacentGhostLocationsDistances.keys())
-            edibleGhostLocation = adjacentGhostLocationsDistances[closestGhostDistance]
-            edibleGhosts.append(edibleGhostLocation)
-        
-        else:
-            activeGhosts.append(ghost)
-
-    return activeGhosts, edibleGhosts
-
-
-def findDistanceToClosestGhostWithinAllowedSteps(startingLocation, movesMap, ghosts, stepsLimit=5):
-    ''' 
-    Using Breadth First Search, decide if any of the given ghosts is reachable
-    within n steps from the starting location where n = stepsLimit.
-    The method returns -1 if none of the ghosts is reachable within 
-    the steps limit, otherwise it returns the distance to the closest ghost.
-    '''
-
-    NO_GHOST_FOUND = -1
-
-    # if the list is empty the ghost cannot be found
-    if ghosts == []:
-        return NO_GHOST_FOUND
-
-    # if a ghost is in the starting location its distance is 0
-    if startingLocation in ghosts: 
-        return 0 
-
-    visitedLocations = {startingLocation}    
-    unvisitedLocations = {startingLocation}
-
-    # iterate once for each step within the admissible distance
-    for step in range(1, stepsLimit + 1):
-        # find the locations reachable from the current unvisited locations
-        reachableLocations = map(lambda location: 
-                                map(lambda move: sumTuples(location, move), movesMap[location]),
-                             unvisitedLocations)
-
-        # transform into a set to remove duplicates
-        reachableLocations = { location for locations in reachableLocations for location in locations }
-
-        # remove locations already visited
-        newUnvisitedLocations = filter(lambda location: not location in visitedLocations, reachableLocations)
-
-        # check if a ghost is in any of the new unvisited locations
-        for ghost in ghosts:
-            if ghost in newUnvisitedLocations:
-                return step
-
-        visitedLocations.update(unvisitedLocations)
-        unvisitedLocations = newUnvisitedLocations
-    
-    # no ghost has been found within the steps limit
-    return NO_GHOST_FOUND
-        
-
-def getLocationsDistanceStartingLocation(startingLocation, movesMap, limit=float("inf")):
-    '''
-    Return the distance of each location from a starting location
-    as a dict { location: distance }. 
-    The distance can be limited if a number is passed
-    as a parameter a steps limit
-    '''
-
-    currentDistance = 0
-
-    visitedLocations = { startingLocation: currentDistance }
-
-    unvisitedLocations = { startingLocation }
-
-    while len(unvisitedLocations) > 0 and currentDistance < limit:
-        
-        currentDistance += 1
-
-        # find the locations reachable from the current unvisited locations
-        reachableLocations = map(lambda location: 
-                                map(lambda move: sumTuples(location, move), movesMap[location]),
-                             unvisitedLocations)
-
-        # transform into a set to remove duplicates
-        reachableLocations = { location for locations in reachableLocations for location in locations }
-
-        newUnvisitedLocations = filter(lambda location: not location in visitedLocations, reachableLocations)
-
-        # each new unvisited location must be 1 step away from the previous locations
-        for newLocation in newUnvisitedLocations:
-            visitedLocations[newLocation] = currentDistance
-
-        unvisitedLocations = newUnvisitedLocations
-    
-    return visitedLocations
-
-
-def getAdjacentGhostLocationsIfLocationNotOnMap(ghost):
-    '''
-    As edible ghosts may have locations (a, b) as (x.5, y) 
-    this method returns both locations as x.5 + 0.5 and x.5 - 0.5
-    when the ghost is an mid state. If the ghost is at the centre
-    of a location, that location is returned as an array.
-    ( the same applies to y )
-    '''
-    x = ghost[0]
-    y = ghost[1]
-    xs = [x] if x % 1 == 0 else [x + 0.5, x - 0.5]
-    ys = [y] if y % 1 == 0 else [y + 0.5, y - 0.5]
-    return [location for location in itertools.product(xs, ys)]
-
-
-def getValueIterationMap(accessibleMap,        
-                            movesMap,
-                            distancesMap,              
-                            pacman, 
-                            activeGhosts,
-                            edibleGhosts,             
-                            food,        
-                            isSmallGrid,
-                            deadEnds,
-                            initialFoodCount,
-                            agent
-                        ):
-    '''
-    Return the value iteration map. Epsilon is the threshold, if the max change in the map 
-    is below that number, we stop iterating (to improve performance).
-    minAllowedScoreChange prevents location to update their scores by an amount which is 
-    too small. 
-    '''
-    allowedDistanceForActiveGhosts=agent.ACTIVE_GHOSTS_MAX_ALLOWED_DISTANCE
-    allowedDistanceForEdibleGhosts=agent.EDIBLE_GHOSTS_MAX_ALLOWED_DISTANCE
-    allowedDistanceForDeadends=agent.DEADEND_MAX_ALLOWED_DISTANCE
-    foodReward=agent.FOOD_REWARD   
-    moveReward=agent.MOVE_REWARD  
-    activeGhostReward=agent.ACTIVE_GHOST_REWARD
-    edibleGhostReward=agent.EDIBLE_GHOST_REWARD
-    pacmanReward=agent.PACMAN_REWARD      
-    deadEndReward=agent.DEAD_END_REWARD
-    discountFactor=agent.DISCOUNT_FACTOR
-    epsilon=agent.EPSILON
-
-    # initialise value iteration map
-    oldValueIterationMap = { location : 0 for location in accessibleMap }
-
-    # The value of food increase as less food remains
-    ## MEDIUM GRID SETTINGS
-    foodReward *= initialFoodCount / (len(food) - 0.0)
-    
-    # A list of locations with variable score is created 
-    # removing the food and ghosts from the map.
-    nonScoreableLocations = edibleGhosts + activeGhosts
-
-    if isSmallGrid and len(food) == 1:
-        foodReward = agent.LAST_FOOD_REWARD
-        allowedDistanceForActiveGhosts = 2
-        nonScoreableLocations.append(food[0])
-
-    scoreableLocations = [ location for location in accessibleMap if location not in nonScoreableLocations ]
-
-
-    # Update the old map in food and ghosts locations
-    for foodLocation in food: oldValueIterationMap[foodLocation] += foodReward
-    for ghostLocation in activeGhosts: oldValueIterationMap[ghostLocation] += activeGhostReward
-    for ghostLocation in edibleGhosts: oldValueIterationMap[ghostLocation] += edibleGhostReward
-    for deadEnd in deadEnds: oldValueIterationMap[deadEnd] += deadEndReward
-    # pacman should try to always change location
-    oldValueIterationMap[pacman] += pacmanReward 
-
-    temporaryValueIterationMap = { location : 0 for location in accessibleMap }
-
-    if isSmallGrid:
-        for ghost in activeGhosts:
-            ghostIterationMap = elementValueIterationMap(ghost, 
-                                                        movesMap, 
-                                                        allowedDistanceForActiveGhosts, 
-                                                        oldValueIterationMap, 
-                                                        moveReward, 
-                                                        epsilon, 
-                                                        discountFactor,
-                                                        utilitiesSelectorFunction=avg
-                                                        ) 
-            for location in ghostIterationMap:
-                temporaryValueIterationMap[location] += ghostIterationMap[location]
-                      
-        for ghost in edibleGhosts:
-            ghostIterationMap = elementValueIterationMap(ghost, 
-                                                        movesMap, 
-                                                        allowedDistanceForEdibleGhosts, 
-                                                        oldValueIterationMap, 
-                                                        moveReward, 
-                                                        epsilon, 
-                                                        discountFactor,
-                                                        utilitiesSelectorFunction=min
-                                                        ) 
-            for location in ghostIterationMap:
-                temporaryValueIterationMap[location] += ghostIterationMap[location]
-
-        for deadEnd in deadEnds:
-            deadendIterationMap = elementValueIterationMap(deadEnd, 
-                                                                    movesMap, 
-                                                                    allowedDistanceForDeadends, 
-                                                                    oldValueIterationMap, 
-                                                                    moveReward, 
-                                                                    epsilon, 
-                                                                    discountFactor,
-                                                                    utilitiesSelectorFunction=min
-                                                                    ) 
-            # for location in deadendIterationMap:
-            #     temporaryValueIterationMap[location] += deadendIterationMap[location]
-
-        for foodElement in food:
-            foodIterationMap = elementValueIterationMap(foodElement, 
-                                                        movesMap, 
-                                                        5, 
-                                                        oldValueIterationMap, 
-                                                        moveReward, 
-                                                        epsilon, 
-                                                        discountFactor,
-                                                        utilitiesSelectorFunction=max
-                                                        ) 
-            # for location in foodIterationMap:
-            #     temporaryValueIterationMap[location] += foodIterationMap[location]
-
-        for location in temporaryValueIterationMap:
-            oldValueIterationMap[location] += temporaryValueIterationMap[location]
-
-        NO_MOVE = (0, 0)
-        ## MEDIUM CLASSIC SETTINGS
-        # reduce the initial score of pacman's adjacent location (and 
-        # pacman's location itself) based on how closer they are to ghosts
-        # for move in movesMap[pacman] + [NO_MOVE]:
-        #     newLocation = sumTuples(pacman, move)
-        #     closestActiveGhostDistance = findDistanceToClosestGhostWithinAllowedSteps(newLocation, movesMap, activeGhosts, allowedDistanceForActiveGhosts)
-        #     closestEdibleGhostDistance = findDistanceToClosestGhostWithinAllowedSteps(newLocation, movesMap, edibleGhosts, allowedDistanceForEdibleGhosts)
-            
-        #     closestActiveGhostReward = getGhostRewardBasedOnDistance(closestActiveGhostDistance, activeGhostReward)
-        #     closestEdibleGhostReward = getGhostRewardBasedOnDistance(closestEdibleGhostDistance, edibleGhostReward)
-
-        #     lowestGhostReward = min(closestActiveGhostReward, closestEdibleGhostReward)
-        #     oldValueIterationMap[newLocation] += lowestGhostReward**9
-
-
-    return valueIterationFunction(oldValueIterationMap, 
-                                    movesMap, 
-                                    distancesMap, 
-                                    scoreableLocations, 
-                                    moveReward, 
-                                    epsilon, 
-                                    discountFactor
-                                    ) 
-
-
-def elementValueIterationMap(element, movesMap, stepsLimit, valueIterationMap, moveReward, epsilon, discountFactor, utilitiesSelectorFunction=min):
-    elementDistancesMap = getLocationsDistanceStartingLocation(element, movesMap, limit=stepsLimit)
-    oldElementValueIterationMap = { location: valueIterationMap[location] for location in valueIterationMap if location in elementDistancesMap.keys()}
-    elementMovesMap = { location: [] for location in elementDistancesMap}
-    for location in elementMovesMap:
-        for move in movesMap[location]:
-            if sumTuples(location, move) in elementMovesMap:
-                elementMovesMap[location].append(move)
-    return valueIterationFunction(oldElementValueIterationMap, 
-                                                elementMovesMap, 
-                                                elementDistancesMap, 
-                                                elementDistancesMap.keys(), 
-                                                moveReward, 
-                                                epsilon,
-                                                discountFactor,
-                                                utilitiesSelectorFunction=utilitiesSelectorFunction
-                                                ) 
-
-
-def valueIterationFunction(oldValueIterationMap, 
-                            movesMap, 
-                            distancesMap, 
-                            scoreableLocations, 
-                            moveReward, 
-                            epsilon, 
-                            discountFactor,
-                            utilitiesSelectorFunction=max):
-    # This is used to determine the end of the 
-    # value iteration loop
-    maxUpdate = epsilon + 1
-
-    while maxUpdate > epsilon:
-
-        # initialise the next value iteration map
-        newValueIterationMap = {}
-        maxUpdate = 0
-        
-        for scoreableLocation in scoreableLocations:
-            locationValue = bellmanEquation(moveReward, 
-                                            scoreableLocation, 
-                                            oldValueIterationMap, 
-                                            movesMap, 
-                                            distancesMap, 
-                                            discountFactor,
-                                            utilitiesSelectorFunction=utilitiesSelectorFunction)    
-            locationValueUpdate = abs(locationValue - oldValueIterationMap[scoreableLocation])
-            maxUpdate = max(maxUpdate, locationValueUpdate)
-
-            # if locationValueUpdate < epsilon:
-            #     locationValue = oldValueIterationMap[scoreableLocation]
-            newValueIterationMap[scoreableLocation] = locationValue
-
-        # update old value iteration map
-        for key, newValue in newValueIterationMap.items():
-            oldValueIterationMap[key] = newValue
-        
-    if MDPAgent.DEBUG:
-        l = ""
-        for i in range(9, 0, -1):
-            for j in range(1, 19):
-                l+= str(oldValueIterationMap[(j, i)])[:5] if (j,i) in oldValueIterationMap else '-'*5
-                l+= " | "
-            l+="\n"
-        print l
-
-    return oldValueIterationMap 
-
-
-def getGhostRewardBasedOnDistance(distance, reward):
-    '''
-    Return the reward associated to a ghost adjusted according
-    to its distance. If the distance is -1 (that is, the ghost is not 
-    located or too distant) the reward is 0.
-    '''
-    # ghost is not close enough
-    if distance == -1:
-        return 0
-    elif distance == 0:
-        # ghost is on the location; to avoid division by 0
-        # we set it 0 + epsilon (an arbitrarily small number)
-        distance = 0.01
-    
-    return reward / distance
-
-
-def getBestNextMove(moves, 
-                    pacman, 
-                    valueIterationMap, 
-                    movesMap,
-                    distancesMap
-                  ):
-    '''
-    Given pacman's location and the valueIterationMap,
-    Calculates and return the best move for pacman.
-    If a given move gets pacman closer to a ghost, such a move is penalised
-    based on how close the ghost would be given that move.
-        e.g. If the best move is NORTH the function returns (0, 1)
-    '''
-
-    ## CHANGE
-    if False:
-        # This is a dict of the form 
-        # { pacmanAdjacentLocation: distanceToClosestGhost }.
-        # Pacman location itself can be included here if any risky ghosts
-        # can be reached from such a location.
-        # only risky ghosts appear here.
-        locationToGhostsDistances = {}
-
-        # If pacman is close enough to a ghost, add pacman's location 
-        # and that distance to the locationToGhostsDistances.
-        # If there are not risky ghosts, set the value to -1.
-        locationToGhostsDistances[pacman] = min(riskyGhosts.values()) if len(riskyGhosts) > 0 else -1
-
-        # This loop aim is to populate locationToGhostsDistances, hence, we only
-        # consider the moves that will get pacman to a different location
-        for move in movesMap[pacman]:
-            newLocation = sumTuples(pacman, move)
-            closestGhostDistance = findDistanceToClosestGhostWithinAllowedSteps(newLocation, movesMap, ghosts, maxAllowedSteps)
-            locationToGhostsDistances[newLocation] = closestGhostDistance
-    
-
-    # This is a list containing all the policies in the 
-    # form (score, (x, y))
-    policies = []
-
-    # This loop aim is to populate the policies list, as such, we consider all the moves
-    # here, even if they would result in pacman hitting the wall.
-    for move in moves:
-        expectedUtility = getMoveUtility(pacman, move, valueIterationMap, movesMap)
-        # newMoveLocation = sumTuples(pacman, move) if move in movesMap[pacman] else pacman
-        
-        ## CHANGE
-        if False:
-            closestGhostDistance = locationToGhostsDistances[newMoveLocation]
-
-            # a move ending up in a ghost location is terrible
-            if closestGhostDistance == 0:
-                expectedUtility += ghostReward * 2
-            # if the closest ghost is risky
-            elif closestGhostDistance != -1:
-                # the factor "2" is used to obtain 
-                # better results
-                delta = ghostReward * 2 / closestGhostDistance
-                expectedUtility += delta
-
-        policies.append((expectedUtility, move))
-
-    # get the first policy (the one with the highest score), which is a 
-    # tuple (score, move), and from it get the second element, which 
-    # is the best move
-    bestMove = sorted(policies, reverse=True)[0][1]
-
-    if MDPAgent.DEBUG:
-        print MDPAgent.moveToDirection[bestMove]
-    return bestMove
-
-
-def bellmanEquation(reward, 
-                    location, 
-                    valueIterationMap, 
-                    movesMap, 
-                    distancesMap, 
-                    discountFactor,
-                    moves=MDPAgent.moves, 
-                    utilitiesSelectorFunction=max
-                ):
-    '''
-    Return the result of Bellman's equation.
-    '''
-    utilities = []
-    for move in moves:
-        moveUtility = getMoveUtility(location, move, valueIterationMap, movesMap)
-        utilities.append(moveUtility)
-    
-    ## CHANGE
-    # expectedUtility = max(utilities)
-    expectedUtility = utilitiesSelectorFunction(utilities)
-    return reward + pow(discountFactor, distancesMap[location]) * expectedUtility
-
-
-def getMoveUtility(location, move, valueIterationMap, movesMap):
-    '''
-    Given a location and a move, calculate the values you would obtain
-    trying to perform that move keeping into account that you only have 80%
-    chance to actually perform that move, and return their sum. 
-    The list returned is a 3-value vectors wherein the elements in order are:
-        1) expected value from making the decided move;
-        2 & 3) expected values from making a traversal move.
-    '''
-    values = []
-
-    # main move value
-    values.append(getLocationUtility(location, move, valueIterationMap, movesMap) * .8)
-
-    for traversalMove in MDPAgent.traversalMoves[move]:
-        values.append(getLocationUtility(location, traversalMove, valueIterationMap, movesMap) * .1)
-
-    return sum(values)
-
-
-def getLocationUtility(startingLocation, 
-                       move,    
-                       valueIterationMap, 
-                       movesMap
-                    ):
-    '''
-    Given a location and a move, calculate the value you
-    would obtain performing that move from that location (which could result
-    in hitting the wall).
-    This value takes into account ghosts, which influence the score 
-    based on their distance from the landing location.
-    '''
-
-    NO_MOVE = (0, 0)
-
-    # find out the landinding location given the starting location and the move
-    operatedMove = move if move in movesMap[startingLocation] else NO_MOVE
-
-    landingLocation = sumTuples(startingLocation, operatedMove)
-
-    # sum the value of the location with the totalGhostsRewards and then
-    # multiply by the probability of landing on that location
-    return valueIterationMap[landingLocation]
-
-
-def getVisitbaleWidthAndHeight(state):
-    '''
-    Return a tuple (x, y) of the top-most right-most
-    location in the map
-    '''
-    topRightCorner = max(api.walls(state))
-
-    # the corners belong to the walls, so in a map 4 x 4
-    # the top right corner is (3, 3), but it's a wall, so the map is
-    # 2 x 2 from the agent perspective, so the width is 3 - 1
-    return (topRightCorner[0] - 1, topRightCorner[1] - 1)
-
-
-def getMapLocations(mapWidth, mapHeight):
-    '''
-    Return a list of all the locations in the map
-    '''
-    widthArray = range(1, mapWidth + 1)
-    heightArray = range(1, mapHeight + 1)
-    return [element for element in itertools.product(heightArray, widthArray)]
-
-
-def getNonWallLocations(walls, state):
-    '''
-    Return a list of non-wall locations
-    '''
-    width, height = getVisitbaleWidthAndHeight(state)
-    mapLocationsMatrix = getMapLocations(height, width)
-    return [x for x in mapLocationsMatrix if x not in walls]
-
-
-def getLegalMoves(accessibleMap, location):
-    '''
-    Given a location and the accessibleMap, 
-    Return the moves that can be made from there
-        e.g. [(1, 0), (-1, 0)]
-        Pacman can only move EAST or WEST
-    '''
-    return [move for move in MDPAgent.moves if sumTuples(location, move) in accessibleMap]
-
+        mdpAgents.MDPAgent.setUpWorld(self, state)
 
-def getMapMoves(accessibleMap):
-    '''
-    Return a dictionary of the possible moves for each location
-    in the form {location: moves[]}
-        e.g. { (6, 5): [(1, 0), (-1, 0)]} 
-        the only moves are going either EAST or WEST
-    '''
-    return {location: getLegalMoves(accessibleMap, location) for location in accessibleMap}
-    '''
-    Return a dictionary of the possible moves for each location
-    in the form {location: moves[]}
-        e.g. { (6, 5): [(1, 0), (-1, 0)]} 
-        the only moves are going either EAST or WEST
-    '''
-    return {location: getLegalMoves(accessibleMap, location) for location in accessibleMap}
\ No newline at end of file
+        # the regions around the ghosts are only solved on the small grid
+        if not self.isSmallGrid:
+            self.mapSplit = None
@@ -31,18 +31,41 @@
 from pacman import Directions
 from game import Agent
 import api
+import heapq
 import itertools
+import mapSplits
+import rewardLayouts
+import solverDiagnostics
+import time
+import util
+
+# the vectorized engine, the distance table and the compiled worlds 
+# need numpy, the dict engine and the searches work without it
+try:
+    import mdpSolvers
+    import mazeDistances
+    import compiledWorlds
+except ImportError:
+    mdpSolvers = None
+    mazeDistances = None
+    compiledWorlds = None
 
 
 class MDPAgent(Agent):
     ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE = 7
     EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE = 3
     DEADEND_MIN_ALLOWED_DISTANCE = 1
+    # how fast the halos around ghosts and dead ends fade with the distance
+    HALO_DISCOUNT_FACTOR = 0.7
 
     # rewards
     ACTIVE_GHOST_REWARD = -5.0
     EDIBLE_GHOST_REWARD = -2.0
     FOOD_REWARD = 1.0
+    # the last food of the small grid (see rewardLayouts.RewardLayout)
+    LAST_FOOD_REWARD = 16.0
+    # the locations without food (see rewardLayouts.GhostDistancesRewardLayout)
+    NO_FOOD_REWARD = 0.0
     MOVE_REWARD = -0.04
 
     # this is used to prompt him to make move
@@ -50,6 +73,55 @@ class MDPAgent(Agent):
     DEAD_END_REWARD = -15.0
     DISCOUNT_FACTOR = 0.95
     EPSILON = 0.05
+    # the constants replaced on the small grid when the world is set up
+    SMALL_GRID_SETTINGS = { 'ACTIVE_GHOST_REWARD': -2.5 }
+    # the locations of the small grid Pacman can get trapped in, if None the 
+    # dead ends (see rewardLayouts.GhostsDetectionRewardLayout)
+    TRAP_LOCATIONS = None
+
+    # engines available to run value iteration
+    DICT_ENGINE = 'dict'
+    VECTORIZED_ENGINE = 'vectorized'
+    ENGINES = [DICT_ENGINE, VECTORIZED_ENGINE]
+
+    # ways of sweeping the map in value iteration
+    JACOBI_SWEEP = 'jacobi'
+    GAUSS_SEIDEL_SWEEP = 'gaussSeidel'
+    ORDERED_GAUSS_SEIDEL_SWEEP = 'orderedGaussSeidel'
+    SWEEPS = [JACOBI_SWEEP, GAUSS_SEIDEL_SWEEP, ORDERED_GAUSS_SEIDEL_SWEEP]
+
+    # algorithms available to solve the MDP
+    VALUE_ITERATION_SOLVER = 'valueIteration'
+    PRIORITIZED_SWEEPING_SOLVER = 'prioritizedSweeping'
+    POLICY_ITERATION_SOLVER = 'policyIteration'
+    MODIFIED_POLICY_ITERATION_SOLVER = 'modifiedPolicyIteration'
+    SOLVERS = [VALUE_ITERATION_SOLVER, PRIORITIZED_SWEEPING_SOLVER, 
+               POLICY_ITERATION_SOLVER, MODIFIED_POLICY_ITERATION_SOLVER]
+    # the solvers available only with numpy
+    VECTORIZED_SOLVERS = [POLICY_ITERATION_SOLVER, MODIFIED_POLICY_ITERATION_SOLVER]
+
+    # the sweeps evaluating each policy in modified policy iteration
+    EVALUATION_SWEEPS = 10
+
+    # the backups of prioritized sweeping between two checks of the deadline
+    DEADLINE_CHECK_BACKUPS = 32
+    # how much the bound of a location queued by prioritized sweeping must
+    # grow for it to be queued again with the new priority
+    REQUEUE_FACTOR = 2.0
+
+    # how the utilities of the moves of a location are combined in its 
+    # backup: taking the best one, their average or the worst one
+    MAX_BACKUP = 'max'
+    AVERAGE_BACKUP = 'avg'
+    MIN_BACKUP = 'min'
+    BACKUPS = [MAX_BACKUP, AVERAGE_BACKUP, MIN_BACKUP]
+
+    # the defaults of the agent arguments choosing how the map is laid out 
+    # and solved, so that each version of the agent only sets its own
+    REWARD_LAYOUT = 'halos'
+    MAP_SPLIT = None
+    BACKUP = MAX_BACKUP
+    DISTANCE_DISCOUNTS = False
 
     moves = [
         (1, 0),     # East
@@ -73,7 +145,154 @@ class MDPAgent(Agent):
         (0, 0)  : Directions.STOP
     }
 
-    def __init__(self):
+    def __init__(self, engine=DICT_ENGINE, warmStart=False, sweep=JACOBI_SWEEP, solver=VALUE_ITERATION_SOLVER, 
+                 timeBudget=None, radius=None, distanceCache=None, discountFactor=None,
+                 evaluationSweeps=EVALUATION_SWEEPS, backup=None, worldCache=None, ghostScenarios=None, diagnostics=None,
+                 rewardLayout=None, mapSplit=None, distanceDiscounts=None):
+        # solver    - the algorithm solving the MDP, either 'valueIteration', 
+        #             'prioritizedSweeping', which only updates the locations 
+        #             whose successors changed value, 'policyIteration', which 
+        #             evaluates each policy solving a linear system, or 
+        #             'modifiedPolicyIteration', which evaluates each policy 
+        #             with a few sweeps (engine and sweep only apply to 
+        #             value iteration, policy iteration requires numpy)
+        # evaluationSweeps - the sweeps evaluating each policy in
+        #             modified policy iteration
+        # discountFactor - the discount factor of the MDP, up to 1.0 (DISCOUNT_FACTOR
+        #             if None). Policy iteration at 1.0 requires a negative MOVE_REWARD
+        # engine    - the implementation of value iteration to use, either 
+        #             'dict' or 'vectorized' (which requires numpy)
+        # warmStart - if True, value iteration starts from the values
+        #             computed in the previous move rather than from the rewards
+        # sweep     - how each sweep of value iteration updates the map:
+        #             'jacobi' computes the new values from the ones of the 
+        #             previous sweep, 'gaussSeidel' updates the values in place,
+        #             'orderedGaussSeidel' updates them in place starting from 
+        #             the locations closest to food
+        # timeBudget - the max time (in milliseconds) each move should take, when
+        #             it runs out the solver stops and the move is chosen from 
+        #             the values computed so far. If None the solver always 
+        #             runs until convergence
+        # radius    - if given, only the locations within this number of steps
+        #             from Pacman are solved, the ones just outside get a value 
+        #             estimated from their distance to the closest food. If None 
+        #             the whole map is solved
+        # distanceCache - a folder where the distance table of each layout
+        #             is saved, so that later runs load it rather than 
+        #             computing it again. If None the tables are only kept 
+        #             in memory
+        # worldCache - a folder where the static data of each layout (the 
+        #             accessible locations, their moves, the dead ends, the 
+        #             transition model and the distance table) is saved, so 
+        #             that later runs memory-map it rather than computing it 
+        #             again (requires numpy). If None it is computed in every run
+        # backup    - how the utilities of the moves are combined when a location
+        #             is updated: 'max' (Bellman's equation), 'avg' or 'min'. 
+        #             Policy iteration only supports 'max'. If None it is BACKUP
+        # rewardLayout - how the rewards of the map are laid out at every move,
+        #             and which locations keep their reward (see rewardLayouts.py).
+        #             If None it is REWARD_LAYOUT, the halos
+        # mapSplit  - how the map is split to be solved: 'ghostRegions' or
+        #             'foodAndGhosts' (see mapSplits.py). If None it is MAP_SPLIT,
+        #             by default the whole map is solved at once
+        # distanceDiscounts - if True, the utility of each location is discounted
+        #             by the discount factor to the power of its distance from 
+        #             Pacman, rather than by the discount factor (value iteration 
+        #             only). If None it is DISTANCE_DISCOUNTS
+        # ghostScenarios - if given, a ghost amid 2 locations is considered in
+        #             both rather than only in the one closest to Pacman: the map 
+        #             of each place the ghosts might be in is solved (all of them 
+        #             together by value iteration, with numpy) and the values of 
+        #             the maps are combined with this backup ('max', 'avg' or 
+        #             'min'). It cannot be combined with warmStart. If None only
+        #             the closest locations are considered
+        # diagnostics - where to send a record of how the solver converged in 
+        #             each move: 'memory', or a .csv or .jsonl file. A summary of
+        #             the records is printed at the end of the games. If None
+        #             nothing is recorded
+        #
+        # These values are passed from the command line, 
+        # e.g. -a engine=vectorized,warmStart=True,sweep=orderedGaussSeidel,timeBudget=50,radius=10
+        # The other versions of the agent (e.g. mdpAgentsSMALLGrid.py) only set 
+        # their own constants and defaults.
+        if backup is None:
+            backup = self.BACKUP
+        if discountFactor is None:
+            discountFactor = self.DISCOUNT_FACTOR
+        if rewardLayout is None:
+            rewardLayout = self.REWARD_LAYOUT
+        if mapSplit is None:
+            mapSplit = self.MAP_SPLIT
+        if distanceDiscounts is None:
+            distanceDiscounts = self.DISTANCE_DISCOUNTS
+        if solver not in self.SOLVERS:
+            raise Exception('Unknown solver ' + solver + ', choose one of ' + ', '.join(self.SOLVERS))
+        if engine not in self.ENGINES:
+            raise Exception('Unknown engine ' + engine + ', choose one of ' + ', '.join(self.ENGINES))
+        if engine == self.VECTORIZED_ENGINE and mdpSolvers is None:
+            raise Exception('The ' + engine + ' engine requires numpy')
+        if solver in self.VECTORIZED_SOLVERS and mdpSolvers is None:
+            raise Exception('The ' + solver + ' solver requires numpy')
+        if sweep not in self.SWEEPS:
+            raise Exception('Unknown sweep ' + sweep + ', choose one of ' + ', '.join(self.SWEEPS))
+        if backup not in self.BACKUPS:
+            raise Exception('Unknown backup ' + backup + ', choose one of ' + ', '.join(self.BACKUPS))
+        if solver in self.VECTORIZED_SOLVERS and backup != self.MAX_BACKUP:
+            raise Exception('The ' + solver + ' solver only supports the ' + self.MAX_BACKUP + ' backup')
+        self.engine = engine
+        self.warmStart = parseBoolean(warmStart)
+        self.sweep = sweep
+        self.solver = solver
+        self.backup = backup
+        self.timeBudget = None if timeBudget is None else float(timeBudget)
+        self.radius = None if radius is None else int(radius)
+        if self.radius is not None and self.radius < 1:
+            raise Exception('The radius must be at least 1, so that Pacman can compare his moves')
+        self.distanceCache = distanceCache
+        if worldCache is not None and compiledWorlds is None:
+            raise Exception('The world cache requires numpy')
+        self.worldCache = worldCache
+        self.DISCOUNT_FACTOR = float(discountFactor)
+        if not 0 < self.DISCOUNT_FACTOR <= 1:
+            raise Exception('The discount factor must be greater than 0 and at most 1')
+        if self.radius is not None and self.DISCOUNT_FACTOR == 1:
+            raise Exception('The radius requires a discount factor lower than 1 to estimate the values outside it')
+        # the worst move can keep Pacman away from the rewards forever,
+        # and then without discount the values never stop decreasing
+        if self.backup == self.MIN_BACKUP and self.DISCOUNT_FACTOR == 1:
+            raise Exception('The ' + self.MIN_BACKUP + ' backup requires a discount factor lower than 1 to converge')
+        if solver == self.POLICY_ITERATION_SOLVER and self.DISCOUNT_FACTOR == 1 and self.MOVE_REWARD >= 0:
+            raise Exception('The ' + solver + ' solver requires a discount factor lower than 1 ' + 
+                            'when moving has no cost (MOVE_REWARD is not negative)')
+        self.evaluationSweeps = int(evaluationSweeps)
+        if self.evaluationSweeps < 1:
+            raise Exception('The evaluation sweeps must be at least 1')
+        self.rewardLayout = rewardLayouts.getRewardLayout(rewardLayout)
+        self.mapSplit = mapSplits.getMapSplit(mapSplit)
+        if mapSplit == mapSplits.FOOD_AND_GHOSTS_SPLIT:
+            if solver != self.VALUE_ITERATION_SOLVER or self.radius is not None or self.warmStart:
+                raise Exception('The ' + mapSplit + ' map split solves its own maps by value iteration, ' + 
+                                'without a radius or warmStart')
+        self.distanceDiscounts = parseBoolean(distanceDiscounts)
+        if self.distanceDiscounts and solver != self.VALUE_ITERATION_SOLVER:
+            raise Exception('The distance discounts are only supported by value iteration')
+        if ghostScenarios is not None:
+            if ghostScenarios not in self.BACKUPS:
+                raise Exception('Unknown ghost scenarios backup ' + ghostScenarios + ', choose one of ' + ', '.join(self.BACKUPS))
+            if mdpSolvers is None:
+                raise Exception('The ghost scenarios require numpy')
+            if solver != self.VALUE_ITERATION_SOLVER or self.radius is not None:
+                raise Exception('The ghost scenarios are only solved by value iteration, without a radius')
+            if self.warmStart:
+                raise Exception('The ghost scenarios cannot be warm started, the scenarios change at every move')
+            if not self.rewardLayout.HALOS or self.mapSplit is not None or self.distanceDiscounts:
+                raise Exception('The ghost scenarios are only solved with the halos, ' + 
+                                'without a map split or distance discounts')
+        self.ghostScenarios = ghostScenarios
+        self.diagnostics = None
+        if diagnostics is not None:
+            self.diagnostics = solverDiagnostics.Diagnostics(solverDiagnostics.getSink(diagnostics))
+
         self.firstMove = True
         self.requestedMove_operatedMove_pair = [] # (requested, operated)
         self.previousPosition = None
@@ -83,16 +302,62 @@ class MDPAgent(Agent):
         self.accessibleMap = []
         # list of all the locations surrounded by 3 walls
         self.deadEnds = []
+        # whether the world is the small grid, with its own settings
+        self.isSmallGrid = False
 
         # the type is { location: moves[] }
         self.movesMap = {}  
+        # the map numbered for prioritized sweeping, with the landing
+        # locations and the predecessors of each location (see getSweepingModel)
+        self.sweepingModel = None
         self.walls = []
+        # the transition model of the world shared by all the
+        # value iteration engines (only available with numpy)
+        self.worldModel = None
+        # the distances between all the locations, used instead of
+        # searching the map every time (only available with numpy)
+        self.distanceTable = None
+        # the halos of ghosts and dead ends of every location, keyed by their
+        # distance limit, and the sum of the halos of all the dead ends, which 
+        # never changes (only available with numpy)
+        self.haloKernels = None
+        self.deadEndsLayer = None
+        # the arrays the rewards and the updatable locations are assembled in 
+        # at every move, and the mask of the food locations with the amount of
+        # food it refers to (only available with numpy)
+        self.rewards = None
+        self.updatable = None
+        self.foodMask = None
+        self.foodMaskSize = None
         
         # DYNAMIC ELEMENTS
         self.ghostsStates = []
 
         # includes capsules
-        self.food = []
+        self.food = set()
+        self.capsules = set()
+        # the food (and capsules) at the start of the game
+        self.initialFoodCount = 0
+        # Pacman's location when the food was last sensed (None if
+        # the food must be read again from the whole map)
+        self.foodSensedAt = None
+
+        # the values of the previous move, used to warm start value iteration
+        self.previousValueIterationMap = None
+
+        # the distance of each location from the closest food, used to 
+        # estimate the values outside the radius, and the food it refers to
+        self.foodDistancesMap = None
+        self.foodDistancesFood = None
+
+        # the number of sweeps value iteration took in each move of the game
+        self.sweepsPerMove = []
+        # the number of moves of the game in which the solver ran out of time
+        self.unconvergedMoves = 0
+        # the time by which the current move must be chosen (None if there is no limit)
+        self.deadline = None
+        # the statistics of the solver in the current move
+        self.solverStatistics = None
 
 
     # Gets run after an MDPAgent object is created and once there is
@@ -106,6 +371,28 @@ class MDPAgent(Agent):
     def final(self, state):
         print "Looks like the game just ended!"
 
+        if len(self.sweepsPerMove) > 0:
+            print "Value iteration sweeps per move: %.2f (%d moves)" % (sum(self.sweepsPerMove) / float(len(self.sweepsPerMove)), 
+                                                                        len(self.sweepsPerMove))
+        if self.timeBudget is not None:
+            print "Moves stopped by the time budget: %d" % self.unconvergedMoves
+        if self.diagnostics is not None:
+            self.diagnostics.endGame()
+
+        # the values of the last move are meaningless in the next game
+        self.previousValueIterationMap = None
+        self.foodDistancesMap = None
+        self.foodDistancesFood = None
+        self.foodMaskSize = None
+        self.foodSensedAt = None
+        self.sweepsPerMove = []
+        self.unconvergedMoves = 0
+
+    # This is run once all the games have been played
+    def printSummary(self):
+        if self.diagnostics is not None:
+            self.diagnostics.printSummary()
+
     
     def setUpWorld(self, state):
         '''
@@ -115,18 +402,86 @@ class MDPAgent(Agent):
         world, as such, it is intended to be called only once.
         '''        
         self.walls = api.walls(state)
-        self.accessibleMap = getNonWallLocations(self.walls, state)
-        self.movesMap = getMapMoves(self.accessibleMap)
+
+        compiledWorld = None
+        if self.worldCache is not None:
+            compiledWorld = compiledWorlds.loadCompiledWorld(self.walls, self.moves, self.traversalMoves, self.worldCache)
+
+        if compiledWorld is not None:
+            self.accessibleMap = compiledWorld.accessibleMap
+            self.movesMap = compiledWorld.movesMap
+            self.deadEnds = compiledWorld.deadEnds
+            self.worldModel = compiledWorld.worldModel
+            self.distanceTable = compiledWorld.distanceTable
+        else:
+            self.accessibleMap = getNonWallLocations(self.walls, state)
+            self.movesMap = getMapMoves(self.accessibleMap)
+            self.deadEnds = getDeadEnds(self.accessibleMap, self.movesMap)
+            self.worldModel, self.distanceTable = getWorldModelAndDistanceTable(self.accessibleMap, 
+                                                                                self.movesMap, 
+                                                                                self.distanceCache)
+            if self.worldCache is not None:
+                compiledWorld = compiledWorlds.CompiledWorld(self.deadEnds, self.worldModel, self.distanceTable)
+                compiledWorlds.saveCompiledWorld(compiledWorld, self.walls, self.worldCache)
+
         self.isSmallGrid = len(self.accessibleMap) < 30
-        self.deadEnds = getDeadEnds(self.accessibleMap, self.movesMap)
+        self.sweepingModel = getSweepingModel(self.movesMap)
 
         if self.isSmallGrid:
-            self.ACTIVE_GHOST_REWARD = -2.5 
-            self.LAST_FOOD_REWARD = 16.0
+            for name, value in self.SMALL_GRID_SETTINGS.items():
+                setattr(self, name, value)
+
+        if mdpSolvers is not None:
+            limits = { self.ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE, 
+                       self.EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE, 
+                       self.DEADEND_MIN_ALLOWED_DISTANCE }
+            self.haloKernels = { limit: mdpSolvers.HaloKernels(self.worldModel, 
+                                                               self.distanceTable, 
+                                                               limit, 
+                                                               self.HALO_DISCOUNT_FACTOR) 
+                                 for limit in limits }
+            self.deadEndsLayer = self.haloKernels[self.DEADEND_MIN_ALLOWED_DISTANCE].getLayer(self.deadEnds, 
+                                                                                              self.DEAD_END_REWARD)
+            self.rewards = self.worldModel.toArray({ location: 0 for location in self.accessibleMap })
+            self.updatable = self.worldModel.toMask(self.accessibleMap)
+            self.foodMask = self.worldModel.toMask([])
+
+
+    def senseFood(self, state, pacman):
+        '''
+        Update the food (and capsules) the agent knows about. 
+        Food and capsules can only be eaten by Pacman, and Pacman moves one 
+        location per move, so the only ones that can disappear between two 
+        moves are those where Pacman is now: they are removed without
+        reading the whole map again. The map is only read on the first 
+        move of a game, or if the food known does not match the state 
+        (Pacman is not next to where the food was last sensed, or he is
+        on a capsule and the capsules do not match). The food and the
+        capsules are kept as sets, so that removing one takes constant time.
+        '''
+        isInSync = (self.foodSensedAt is not None and
+                    util.manhattanDistance(self.foodSensedAt, pacman) <= 1)
+
+        if isInSync:
+            self.food.discard(pacman)
+            # the capsules are only read when one may have been eaten
+            if pacman in self.capsules:
+                self.capsules.remove(pacman)
+                isInSync = len(self.capsules) == len(api.capsules(state))
+
+        if not isInSync:
+            capsules = api.capsules(state)
+            self.capsules = set(capsules)
+            self.food = set(api.food(state) + capsules)
+
+        self.foodSensedAt = pacman
 
 
     def getAction(self, state):
 
+        if self.timeBudget is not None:
+            self.deadline = time.time() + self.timeBudget / 1000.0
+
         # one time operations
         if self.firstMove:
             self.setUpWorld(state)
@@ -134,18 +489,26 @@ class MDPAgent(Agent):
             self.firstMove = False
 
         # operations to be performed at the beginning of every action
-        food = api.food(state)
-        capsules = api.capsules(state)
-        self.food = food + capsules
+        pacman = api.whereAmI(state)
+        isFirstMoveOfGame = self.foodSensedAt is None
+        self.senseFood(state, pacman)
+        if isFirstMoveOfGame:
+            self.initialFoodCount = len(self.food)
 
         # updates related to pacman
-        pacman = api.whereAmI(state)
-        self.distancesMap = getLocationsDistanceFromStartingLocation(pacman, self.movesMap)
+        self.distancesMap = getLocationsDistanceFromStartingLocation(pacman, self.movesMap, 
+                                                                     distanceTable=self.distanceTable)
 
         # updates related to ghosts
         self.ghostsStates = api.ghostStates(state)
 
         activeGhosts, edibleGhosts = getActiveAndEdibleGhostsLocations(self.ghostsStates, self.distancesMap)
+
+        ghostsScenarios = None
+        if self.ghostScenarios is not None:
+            ghostsScenarios = getGhostsScenarios(self.ghostsStates)
+
+        solveStart = time.time()
         
         valueIterationMap = getValueIterationMap(self.accessibleMap, 
                                                  self.movesMap, 
@@ -156,13 +519,28 @@ class MDPAgent(Agent):
                                                  self.food, 
                                                  self.isSmallGrid,
                                                  self.deadEnds,
-                                                 self)
+                                                 self,
+                                                 ghostsScenarios)
+
+        solveTime = (time.time() - solveStart) * 1000
+        moveStatistics = {}
 
         bestMove = getBestNextMove(self.moves, 
                                    pacman, 
                                    valueIterationMap, 
                                    self.movesMap, 
-                                   self.distancesMap)
+                                   self.distancesMap,
+                                   getSuccessorLocations(self.worldModel),
+                                   moveStatistics,
+                                   self.rewardLayout.getLandingPenalties(self, pacman))
+
+        if self.diagnostics is not None:
+            self.diagnostics.record(self.solverStatistics['sweeps'],
+                                    self.solverStatistics['maxUpdate'],
+                                    self.solverStatistics['backups'],
+                                    solveTime,
+                                    moveStatistics['margin'],
+                                    self.solverStatistics['converged'])
 
         bestDirection = self.moveToDirection[ bestMove ]
 
@@ -181,10 +559,33 @@ class MDPAgent(Agent):
 #  FUNCTIONS  #
 #             #   
 ###############
+def parseBoolean(value):
+    '''
+    Return the boolean value of an agent argument, which is 
+    a string when passed from the command line (e.g. 'True').
+    '''
+    return str(value).lower() in ['true', '1', 'yes']
+
+
 def sumTuples(tuple1, tuple2):
     return tuple([(i + j) for i, j in zip(tuple1, tuple2)])
 
 
+def getWorldModelAndDistanceTable(accessibleMap, movesMap, distanceCache=None):
+    '''
+    Return the transition model of the world (see mdpSolvers.WorldModel)
+    and the distances between all its locations (see mazeDistances.DistanceTable), 
+    both shared by all the agents playing on the same layout, or (None, None) 
+    if numpy is not installed, in which case the map is searched instead.
+    '''
+    if mdpSolvers is None:
+        return None, None
+
+    worldModel = mdpSolvers.getWorldModel(accessibleMap, movesMap, MDPAgent.moves, MDPAgent.traversalMoves)
+    distanceTable = mazeDistances.getDistanceTable(accessibleMap, distanceCache)
+    return worldModel, distanceTable
+
+
 def getDeadEnds(accessibleMap, movesMap):
     '''
     Given the list of the accessible locations on the map,
@@ -228,12 +629,35 @@ def getActiveAndEdibleGhostsLocations(ghostsStates, distancesMap):
     return activeGhosts, edibleGhosts
 
 
-def findDistanceToClosestGhostWithinAllowedSteps(startingLocation, movesMap, ghosts, stepsLimit=5):
+def getGhostsScenarios(ghostsStates):
+    '''
+    Given the ghosts' states, return the places the ghosts might be in
+    as a list of (activeGhosts, edibleGhosts) pairs. A ghost amid 2 
+    locations (which happens only when it is edible) might be in either 
+    of them, so there is a scenario for each combination of the locations 
+    of these ghosts (only one if no ghost is amid 2 locations).
+    '''
+    IS_EDIBLE = 1
+
+    ghostsLocations = [getAdjacentGhostLocationsIfLocationNotOnMap(ghostState[0]) for ghostState in ghostsStates]
+    statuses = [ghostState[1] for ghostState in ghostsStates]
+
+    scenarios = []
+    for locations in itertools.product(*ghostsLocations):
+        activeGhosts = [ghost for ghost, status in zip(locations, statuses) if status != IS_EDIBLE]
+        edibleGhosts = [ghost for ghost, status in zip(locations, statuses) if status == IS_EDIBLE]
+        scenarios.append((activeGhosts, edibleGhosts))
+
+    return scenarios
+
+
+def findDistanceToClosestGhostWithinAllowedSteps(startingLocation, movesMap, ghosts, stepsLimit=5, distanceTable=None):
     ''' 
     Using Breadth First Search, decide if any of the given ghosts is reachable
     within n steps from the starting location where n = stepsLimit.
     The method returns -1 if none of the ghosts is reachable within 
     the steps limit, otherwise it returns the distance to the closest ghost.
+    If a distanceTable is given, the distances are looked up there instead.
     '''
 
     NO_GHOST_FOUND = -1
@@ -242,6 +666,11 @@ def findDistanceToClosestGhostWithinAllowedSteps(startingLocation, movesMap, gho
     if ghosts == []:
         return NO_GHOST_FOUND
 
+    if distanceTable is not None:
+        distancesMap = distanceTable.getDistancesMap([startingLocation], limit=stepsLimit)
+        ghostsDistances = [distancesMap[ghost] for ghost in ghosts if ghost in distancesMap]
+        return min(ghostsDistances) if len(ghostsDistances) > 0 else NO_GHOST_FOUND
+
     # if a ghost is in the starting location its distance is 0
     if startingLocation in ghosts: 
         return 0 
@@ -291,16 +720,29 @@ def getAdjacentGhostLocationsIfLocationNotOnMap(ghost):
     return [location for location in itertools.product(xs, ys)]
 
 
-def getLocationsDistanceFromStartingLocation(startingLocation, movesMap, limit=float("inf")):
+def getLocationsDistanceFromStartingLocation(startingLocation, movesMap, limit=float("inf"), distanceTable=None):
     '''
     Return the distance of each location from a starting location
     as a dict { location: distance_from_starting_location }. 
     The distance can be limited to a max steps limit by passing
     the optional parameter "limit", otherwise the whole map is inspected.
     '''
+    return getLocationsDistanceFromStartingLocations([startingLocation], movesMap, limit, distanceTable)
+
+
+def getLocationsDistanceFromStartingLocations(startingLocations, movesMap, limit=float("inf"), distanceTable=None):
+    '''
+    Same as getLocationsDistanceFromStartingLocation, but the distance
+    of each location is the one from the closest of the starting locations.
+    If a distanceTable is given, the distances are read from it (as a 
+    mazeDistances.DistancesMap) rather than searching the map.
+    '''
+    if distanceTable is not None:
+        return distanceTable.getDistancesMap(startingLocations, limit)
+
     currentDistance = 0
-    visitedLocations = { startingLocation: currentDistance }
-    unvisitedLocations = { startingLocation }
+    visitedLocations = { startingLocation: currentDistance for startingLocation in startingLocations }
+    unvisitedLocations = set(startingLocations)
 
     while len(unvisitedLocations) > 0 and currentDistance < limit:
         
@@ -334,77 +776,515 @@ def getValueIterationMap(accessibleMap,
                          food,        
                          isSmallGrid,
                          deadEnds,
-                         agent):
+                         agent,
+                         ghostsScenarios=None):
     '''
     Return the value iteration map. Epsilon is a threshold and, if the max change in the map 
     is below that number, we stop iterating (to improve performance).
+    The rewards are laid out by the reward layout of the agent (see rewardLayouts.py),
+    and if the agent has a map split (see mapSplits.py) the split solves the map.
+    If more than one scenario of the places the ghosts might be in is given (see 
+    getGhostsScenarios), the given ghosts are ignored and the map combines the 
+    maps of all the scenarios (see getScenariosValueIterationMap).
     '''
-    allowedDistanceForActiveGhosts=agent.ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE
-    allowedDistanceForEdibleGhosts=agent.EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE
-    allowedDistanceForDeadends=agent.DEADEND_MIN_ALLOWED_DISTANCE
-    foodReward=agent.FOOD_REWARD   
-    moveReward=agent.MOVE_REWARD  
-    activeGhostReward=agent.ACTIVE_GHOST_REWARD
-    edibleGhostReward=agent.EDIBLE_GHOST_REWARD
-    pacmanReward=agent.PACMAN_REWARD      
-    deadEndReward=agent.DEAD_END_REWARD
-    discountFactor=agent.DISCOUNT_FACTOR
-    epsilon=agent.EPSILON
-
-    if isSmallGrid and len(food) == 1:
-        foodReward = agent.LAST_FOOD_REWARD
-     
-    # deadEnds are risky, but if Pacman is too close it could be wrong
-    # to tell him to leave
-    deadEndIsAdjacent = lambda deadEnd: distancesMap[deadEnd] == 1 
-    adjacentDeadEnds = filter(deadEndIsAdjacent, deadEnds)
-    if len(adjacentDeadEnds) > 0:
-        deadEndReward = 0
-
-    preValueIterationMap = { location : 0 for location in accessibleMap }
-
-    # active ghosts, edible ghosts and deadEnds are
-    # dangerous for Pacman, so, for each of these elements, create a
-    # halo of negative rewards which is weaker the further
-    # the location is from the dangerous element
+    rewardLayout = agent.rewardLayout
+    statistics = {}
+
+    if agent.mapSplit is not None:
+        valueIterationMap = agent.mapSplit.getValueIterationMap(agent, pacman, activeGhosts, edibleGhosts, food, statistics)
+        recordSolve(agent, valueIterationMap, statistics)
+        return valueIterationMap
+
+    if not assemblesRewardArrays(agent):
+        preValueIterationMap, updatableLocations = rewardLayout.getRewardsMap(agent, pacman, activeGhosts, edibleGhosts, food)
+        valueIterationMap = solveRewardsMap(preValueIterationMap, updatableLocations, food, agent, statistics)
+        valueIterationMap = rewardLayout.adjustValues(agent, valueIterationMap)
+        recordSolve(agent, valueIterationMap, statistics)
+        return valueIterationMap
+
+    foodReward, activeGhostReward, edibleGhostReward, deadEndReward, pacmanReward = rewardLayout.getRewards(agent, pacman, food)
+
+    if ghostsScenarios is not None and len(ghostsScenarios) > 1:
+        valueIterationMap = getScenariosValueIterationMap(pacman,
+                                                          ghostsScenarios,
+                                                          food,
+                                                          foodReward,
+                                                          activeGhostReward,
+                                                          edibleGhostReward,
+                                                          deadEndReward,
+                                                          pacmanReward,
+                                                          agent.MOVE_REWARD,
+                                                          agent.EPSILON,
+                                                          agent.DISCOUNT_FACTOR,
+                                                          agent,
+                                                          statistics)
+        recordSolve(agent, valueIterationMap, statistics)
+        return valueIterationMap
+
+    # a list of locations with non updatable score is created 
+    nonUpdatableLocations = rewardLayout.getFixedLocations(agent, activeGhosts, edibleGhosts, food)
+
+    if agent.radius is not None:
+        # only the locations the solver reads are in the map, the ones within
+        # the radius and, with an estimate of their value, the ones just outside it
+        preValueIterationMap, updatableLocations = getRadiusRewardsMap(pacman,
+                                                                       activeGhosts,
+                                                                       edibleGhosts,
+                                                                       food,
+                                                                       nonUpdatableLocations,
+                                                                       foodReward,
+                                                                       activeGhostReward,
+                                                                       edibleGhostReward,
+                                                                       deadEndReward,
+                                                                       pacmanReward,
+                                                                       agent.MOVE_REWARD,
+                                                                       agent.DISCOUNT_FACTOR,
+                                                                       agent)
+    else:
+        # the map is assembled in the arrays of the agent, and only
+        # turned into a dict if the solver cannot work on the arrays
+        rewards, updatable = getRewardArrays(pacman,
+                                             activeGhosts,
+                                             edibleGhosts,
+                                             food,
+                                             nonUpdatableLocations,
+                                             foodReward,
+                                             activeGhostReward,
+                                             edibleGhostReward,
+                                             deadEndReward,
+                                             pacmanReward,
+                                             agent)
+        if solvesRewardArrays(agent):
+            preValueIterationMap = rewards
+            updatableLocations = updatable
+        else:
+            preValueIterationMap = agent.worldModel.toMap(rewards)
+            updatableLocations = agent.worldModel.toLocations(updatable)
+
+    valueIterationMap = solveRewardsMap(preValueIterationMap, updatableLocations, food, agent, statistics)
+    recordSolve(agent, valueIterationMap, statistics)
+
+    return valueIterationMap
+
+
+def assemblesRewardArrays(agent):
+    '''
+    Return True if the rewards of the move are assembled in the arrays of 
+    the agent (which needs numpy), i.e. they are made of the halos.
+    '''
+    return agent.rewards is not None and agent.rewardLayout.HALOS
+
+
+def solveRewardsMap(preValueIterationMap, updatableLocations, food, agent, statistics):
+    '''
+    Solve the map of the rewards of the move with the solver chosen by the agent,
+    and return the values, storing the statistics of the solver in statistics.
+    The map starts from the values of the previous move if the agent warm starts.
+    If the agent has a radius and the map is a dict with all the locations, only 
+    the ones within the radius are solved, using an estimate of the value of 
+    the ones just outside it (see getRadiusRewardsMap for the map with only 
+    those locations).
+    '''
+    moveReward = agent.MOVE_REWARD
+    discountFactor = agent.DISCOUNT_FACTOR
+    epsilon = agent.EPSILON
+
+    if agent.warmStart and agent.previousValueIterationMap is not None:
+        preValueIterationMap = getWarmStartMap(preValueIterationMap, 
+                                               agent.previousValueIterationMap, 
+                                               updatableLocations)
+
+    # only solve the locations within the radius, using an estimate
+    # of the value of the locations just outside it
+    if agent.radius is not None and not assemblesRewardArrays(agent):
+        distancesMap = agent.distancesMap
+        updatableLocationsSet = set(updatableLocations)
+        updatableLocations = [ location for location in updatableLocations 
+                               if distancesMap.get(location, agent.radius + 1) <= agent.radius ]
+        updateFoodDistancesMap(agent, food, agent.movesMap)
+        foodReward = agent.rewardLayout.getFoodReward(agent, food)
+        boundaryLocations = [ location for location, distance in distancesMap.items() 
+                              if distance == agent.radius + 1 and location in updatableLocationsSet ]
+        for location in boundaryLocations:
+            preValueIterationMap[location] = getHorizonValue(agent.foodDistancesMap.get(location), 
+                                                             foodReward, 
+                                                             moveReward, 
+                                                             discountFactor)
+
+    if agent.solver == MDPAgent.PRIORITIZED_SWEEPING_SOLVER:
+        return prioritizedSweepingFunction(preValueIterationMap,
+                                           agent.sweepingModel,
+                                           updatableLocations,
+                                           moveReward,
+                                           epsilon,
+                                           discountFactor,
+                                           statistics,
+                                           agent.deadline,
+                                           agent.backup)
+
+    if agent.solver in MDPAgent.VECTORIZED_SOLVERS:
+        evaluationSweeps = None
+        if agent.solver == MDPAgent.MODIFIED_POLICY_ITERATION_SOLVER:
+            evaluationSweeps = agent.evaluationSweeps
+
+        return mdpSolvers.policyIterationFunction(preValueIterationMap,
+                                                  agent.worldModel,
+                                                  updatableLocations,
+                                                  moveReward,
+                                                  epsilon,
+                                                  discountFactor,
+                                                  statistics,
+                                                  evaluationSweeps,
+                                                  agent.deadline,
+                                                  updateMap=True)
+
+    return solveWithValueIteration(preValueIterationMap,
+                                   agent.movesMap,
+                                   updatableLocations,
+                                   food,
+                                   moveReward,
+                                   epsilon,
+                                   discountFactor,
+                                   agent,
+                                   statistics)
+
+
+def recordSolve(agent, valueIterationMap, statistics):
+    '''
+    Store in the agent the statistics of the solver in the current
+    move, and the values computed, to warm start the next move.
+    '''
+    agent.sweepsPerMove.append(statistics['sweeps'])
+    if not statistics['converged']:
+        agent.unconvergedMoves += 1
+    agent.solverStatistics = statistics
+    agent.previousValueIterationMap = valueIterationMap
+
+
+def getScenariosValueIterationMap(pacman,
+                                  ghostsScenarios,
+                                  food,
+                                  foodReward,
+                                  activeGhostReward,
+                                  edibleGhostReward,
+                                  deadEndReward,
+                                  pacmanReward,
+                                  moveReward,
+                                  epsilon,
+                                  discountFactor,
+                                  agent,
+                                  statistics):
+    '''
+    Return the value iteration map hedging over the places the ghosts might be in.
+    The rewards of each scenario are assembled as in getRewardArrays, all the
+    scenarios are solved together by value iteration (so that it takes about 
+    as long as solving one), and the values each location has in the 
+    scenarios are combined as chosen by the agent (see selectUtility).
+    '''
+    rewardsBatch = []
+    updatableBatch = []
+
+    for activeGhosts, edibleGhosts in ghostsScenarios:
+        rewards, updatable = getRewardArrays(pacman,
+                                             activeGhosts,
+                                             edibleGhosts,
+                                             food,
+                                             edibleGhosts + activeGhosts + list(food),
+                                             foodReward,
+                                             activeGhostReward,
+                                             edibleGhostReward,
+                                             deadEndReward,
+                                             pacmanReward,
+                                             agent)
+        # the arrays of the agent are filled again for the next scenario
+        rewardsBatch.append(rewards.copy())
+        updatableBatch.append(updatable.copy())
+
+    values = mdpSolvers.batchedValueIterationFunction(rewardsBatch,
+                                                      agent.worldModel,
+                                                      updatableBatch,
+                                                      moveReward,
+                                                      epsilon,
+                                                      discountFactor,
+                                                      statistics,
+                                                      agent.deadline,
+                                                      agent.backup)
+
+    # each row of the transposed array holds the values of a location in all the scenarios
+    return agent.worldModel.toMap(mdpSolvers.combineUtilities(values.T, agent.ghostScenarios))
+
+
+def getRewardArrays(pacman,
+                    activeGhosts,
+                    edibleGhosts,
+                    food,
+                    nonUpdatableLocations,
+                    foodReward,
+                    activeGhostReward,
+                    edibleGhostReward,
+                    deadEndReward,
+                    pacmanReward,
+                    agent):
+    '''
+    Fill the arrays of the agent (indexed by location id of the world model) 
+    with the same rewards the dict version of getValueIterationMap builds, 
+    and with the updatable locations, and return them as (rewards, updatable).
+    The halos are added from the kernels precomputed by the agent, the
+    dead ends as a single layer (unless their reward is 0), and the food 
+    from the food mask of the agent, which only changes when food is eaten.
+    '''
+    worldModel = agent.worldModel
+    rewards = agent.rewards
+    updatable = agent.updatable
+
+    activeGhostsKernels = agent.haloKernels[agent.ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE]
+    edibleGhostsKernels = agent.haloKernels[agent.EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE]
+
+    rewards.fill(0)
     for ghost in activeGhosts:
-        ghostIterationMap = getGradientMap(ghost, activeGhostReward, movesMap, allowedDistanceForActiveGhosts) 
-        for location in ghostIterationMap:
-            preValueIterationMap[location] += ghostIterationMap[location]
-                    
+        activeGhostsKernels.addHalo(rewards, ghost, activeGhostReward)
     for ghost in edibleGhosts:
-        ghostIterationMap = getGradientMap(ghost, edibleGhostReward, movesMap, allowedDistanceForEdibleGhosts) 
-        for location in ghostIterationMap:
-            preValueIterationMap[location] += ghostIterationMap[location]
+        edibleGhostsKernels.addHalo(rewards, ghost, edibleGhostReward)
+
+    if deadEndReward != 0:
+        rewards += agent.deadEndsLayer
+
+    updateFoodMask(agent, food)
+    rewards[agent.foodMask] += foodReward
+    rewards[worldModel.locationIds[pacman]] += pacmanReward
+
+    updatable.fill(True)
+    updatable[worldModel.toIds(nonUpdatableLocations)] = False
+
+    return rewards, updatable
+
+
+def getRadiusRewardsMap(pacman,
+                        activeGhosts,
+                        edibleGhosts,
+                        food,
+                        nonUpdatableLocations,
+                        foodReward,
+                        activeGhostReward,
+                        edibleGhostReward,
+                        deadEndReward,
+                        pacmanReward,
+                        moveReward,
+                        discountFactor,
+                        agent):
+    '''
+    Return the map with the same rewards getRewardArrays assembles, but only
+    for the locations within the radius of the agent from Pacman and the ring
+    just outside it (the only ones the solver reads), found in the row of 
+    Pacman in the distance table, and the updatable locations, the ones within
+    the radius which are not in nonUpdatableLocations (e.g. food and ghosts), 
+    as (rewardsMap, updatableLocations). The updatable locations of the ring 
+    take the estimate of their value given by getHorizonValue. So a move takes the same time
+    however large the layout is.
+    '''
+    worldModel = agent.worldModel
+    radiusLocations = agent.distanceTable.getLocationsWithinDistance(pacman, agent.radius + 1)
+    rewardsMap = { location: 0.0 for location, _ in radiusLocations }
 
-    for deadEnd in deadEnds:
-        deadendIterationMap = getGradientMap(deadEnd, deadEndReward, movesMap, allowedDistanceForDeadends) 
-        for location in deadendIterationMap:
-            preValueIterationMap[location] += deadendIterationMap[location]
+    activeGhostsKernels = agent.haloKernels[agent.ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE]
+    edibleGhostsKernels = agent.haloKernels[agent.EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE]
+
+    for ghost in activeGhosts:
+        activeGhostsKernels.addHaloToMap(rewardsMap, ghost, activeGhostReward)
+    for ghost in edibleGhosts:
+        edibleGhostsKernels.addHaloToMap(rewardsMap, ghost, edibleGhostReward)
+
+    if deadEndReward != 0:
+        for location in rewardsMap:
+            rewardsMap[location] += agent.deadEndsLayer.item(worldModel.locationIds[location])
+
+    nonUpdatableLocations = set(nonUpdatableLocations)
+    updatableLocations = []
+    boundaryLocations = []
+
+    for location, distance in radiusLocations:
+        if location in food:
+            rewardsMap[location] += foodReward
+        if location in nonUpdatableLocations:
+            continue
+        elif distance <= agent.radius:
+            updatableLocations.append(location)
+        else:
+            boundaryLocations.append(location)
 
+    rewardsMap[pacman] += pacmanReward
 
-    # Update the value map in food locations
-    for foodLocation in food: preValueIterationMap[foodLocation] += foodReward
-    # Update the map in Pacman's location
-    preValueIterationMap[pacman] += pacmanReward 
-    
-    
-    # a list of locations with non updatable score is created 
-    nonUpdatableLocations = edibleGhosts + activeGhosts + food
+    # only the distances of the ring from the food are read
+    foodDistances = agent.distanceTable.getClosestDistances(list(food), boundaryLocations)
+    for location, foodDistance in zip(boundaryLocations, foodDistances):
+        rewardsMap[location] = getHorizonValue(foodDistance, foodReward, moveReward, discountFactor)
 
-    # define the locations with updatable score considering all the locations
-    # in the map that are not included in the nonUpdatableLocations list
-    updatableLocations = [ location for location in accessibleMap if location not in nonUpdatableLocations ]
+    return rewardsMap, updatableLocations
+
+
+def updateFoodMask(agent, food):
+    '''
+    Update the mask of the food locations stored by the agent. As food
+    can only be eaten, it only needs to be set again when the amount
+    of food changes.
+    '''
+    if agent.foodMaskSize != len(food):
+        agent.foodMask.fill(False)
+        agent.foodMask[agent.worldModel.toIds(food)] = True
+        agent.foodMaskSize = len(food)
+
+
+def solvesRewardArrays(agent):
+    '''
+    Return True if the solver chosen by the agent works on the reward arrays
+    directly, i.e. it needs no values from the previous move, no radius and
+    no order of the updatable locations.
+    '''
+    if agent.warmStart or agent.radius is not None:
+        return False
+    if agent.solver in MDPAgent.VECTORIZED_SOLVERS:
+        return True
+    return (agent.solver == MDPAgent.VALUE_ITERATION_SOLVER and
+            agent.engine == MDPAgent.VECTORIZED_ENGINE and 
+            agent.sweep == MDPAgent.JACOBI_SWEEP)
+
+
+def solveWithValueIteration(preValueIterationMap,
+                            movesMap,
+                            updatableLocations,
+                            food,
+                            moveReward,
+                            epsilon,
+                            discountFactor,
+                            agent,
+                            statistics):
+    '''
+    Run value iteration with the engine and the sweep chosen by the agent.
+    '''
+    # the blocks of locations updated in place one after the other,
+    # None means every location is updated from the values of the previous sweep
+    sweepBlocks = None
+    if agent.sweep == MDPAgent.GAUSS_SEIDEL_SWEEP:
+        sweepBlocks = getColumnsSweepBlocks(updatableLocations)
+    elif agent.sweep == MDPAgent.ORDERED_GAUSS_SEIDEL_SWEEP:
+        sweepBlocks = getDistanceSweepBlocks(updatableLocations, food, movesMap, agent.distanceTable)
+
+    # the future of each location is discounted more the further it is from Pacman
+    discountsMap = None
+    if agent.distanceDiscounts:
+        discountsMap = getDistanceDiscountsMap(agent.distancesMap, discountFactor)
+
+    if agent.engine == MDPAgent.VECTORIZED_ENGINE:
+        return mdpSolvers.vectorizedValueIterationFunction(preValueIterationMap,
+                                                           agent.worldModel,
+                                                           updatableLocations,
+                                                           moveReward,
+                                                           epsilon,
+                                                           discountFactor,
+                                                           statistics,
+                                                           sweepBlocks,
+                                                           agent.deadline,
+                                                           agent.backup,
+                                                           discountsMap,
+                                                           updateMap=True)
+
+    # the dict engine updates one location at a time, so 
+    # in place the blocks are just the order of the updates
+    if sweepBlocks is not None:
+        updatableLocations = [location for block in sweepBlocks for location in block]
 
     return valueIterationFunction(preValueIterationMap, 
                                   movesMap,
                                   updatableLocations, 
                                   moveReward, 
                                   epsilon, 
-                                  discountFactor) 
+                                  discountFactor,
+                                  getSuccessorLocations(agent.worldModel),
+                                  statistics,
+                                  inPlace=sweepBlocks is not None,
+                                  deadline=agent.deadline,
+                                  backup=agent.backup,
+                                  discountsMap=discountsMap) 
 
 
-def getGradientMap(element, elementReward, movesMap, stepsLimit, discountFactor=0.7):
+def updateFoodDistancesMap(agent, food, movesMap):
+    '''
+    Update the distance of each location from the closest food stored
+    by the agent. As food can only be eaten, the distances only need
+    to be computed again when the amount of food changes.
+    '''
+    if agent.foodDistancesFood is None or len(agent.foodDistancesFood) != len(food):
+        agent.foodDistancesMap = getLocationsDistanceFromStartingLocations(food, movesMap, 
+                                                                           distanceTable=agent.distanceTable)
+        agent.foodDistancesFood = list(food)
+
+
+def getHorizonValue(foodDistance, foodReward, moveReward, discountFactor):
+    '''
+    Estimate the value of a location which is not solved, given its 
+    distance from the closest food. This is the value of the location 
+    if Pacman could walk straight to the food with no ghosts around:
+        moveReward * (1 + discountFactor + ... + discountFactor^(d-1)) + discountFactor^d * foodReward
+    If no food can be reached, the value is the one of moving forever.
+    '''
+    if foodDistance is None:
+        return moveReward / (1 - discountFactor)
+
+    discount = discountFactor ** foodDistance
+    return moveReward * (1 - discount) / (1 - discountFactor) + discount * foodReward
+
+
+def getColumnsSweepBlocks(updatableLocations):
+    '''
+    Return the updatable locations grouped by column (x coordinate), 
+    keeping the order of the map.
+    '''
+    columns = {}
+    for location in updatableLocations:
+        columns.setdefault(location[0], []).append(location)
+    return [columns[x] for x in sorted(columns.keys())]
+
+
+def getDistanceSweepBlocks(updatableLocations, sources, movesMap, distanceTable=None):
+    '''
+    Return the updatable locations grouped by their distance from the 
+    closest source (e.g. food), the closest ones first. As value flows 
+    from the rewards outwards, updating the locations in this order lets
+    each sweep carry the rewards further than a sweep in map order.
+    Locations which cannot be reached from any source are updated last.
+    '''
+    distancesMap = getLocationsDistanceFromStartingLocations(sources, movesMap, distanceTable=distanceTable)
+    unreachableDistance = len(updatableLocations) + 1
+
+    blocks = {}
+    for location in updatableLocations:
+        blocks.setdefault(distancesMap.get(location, unreachableDistance), []).append(location)
+    return [blocks[distance] for distance in sorted(blocks.keys())]
+
+
+def getWarmStartMap(rewardMap, previousValueIterationMap, updatableLocations):
+    '''
+    Return the map value iteration should start from, given the values
+    computed in the previous move. 
+    The value of an updatable location at convergence does not depend on its 
+    own reward (which is only its starting value), so the previous values are 
+    kept, and only the non updatable locations (food and ghosts, the only
+    rewards that can change the solution) are set to their current reward.
+    Since food and ghosts move at most one location per move, the previous 
+    values are close to the solution and fewer sweeps are needed.
+    The updatable locations with no previous value (e.g. the ones which were 
+    outside the radius) start from their reward.
+    '''
+    startingMap = dict(rewardMap)
+
+    for location in updatableLocations:
+        if location in previousValueIterationMap:
+            startingMap[location] = previousValueIterationMap[location]
+
+    return startingMap
+
+
+def getGradientMap(element, elementReward, movesMap, stepsLimit, discountFactor=0.7, distanceTable=None):
     '''
     Given a an element on the map and its reward, consider a
     halo of locations reachable within a steps limit and assign them a value.
@@ -415,28 +1295,109 @@ def getGradientMap(element, elementReward, movesMap, stepsLimit, discountFactor=
     The element location is included in this dict, and the value 
     will be equal to the reward of the element itself.
     The function returns a dict { location: value }.
+    If a distanceTable is given, the halo is read from it instead of searching the map.
 
     '''
+    if distanceTable is not None:
+        return { location: (discountFactor**distance)*elementReward 
+                 for location, distance in distanceTable.getLocationsWithinDistance(element, stepsLimit) }
+
     # computing the distance of cells from the element
     elementDistancesMap = getLocationsDistanceFromStartingLocation(element, movesMap, limit=stepsLimit)
     elementGradientValueMap = { location: (discountFactor**elementDistancesMap[location])*elementReward for location in elementDistancesMap.keys() }
     return elementGradientValueMap
 
 
+def getDistanceDiscountsMap(distancesMap, discountFactor):
+    '''
+    Given the distance of each location from a starting location (e.g. Pacman),
+    return the dict { location: discountFactor ^ distance }, which discounts
+    the future more the further the location is from the starting location.
+    '''
+    return { location: discountFactor**distance for location, distance in distancesMap.items() }
+
+
+def getRegionMovesMap(movesMap, region):
+    '''
+    Return the moves map of a region of the map, only keeping the moves
+    which do not leave the region, so that the region can be solved on 
+    its own as if it were surrounded by walls.
+    '''
+    return { location: [move for move in movesMap[location] if sumTuples(location, move) in region] 
+             for location in region }
+
+
+def getElementValueIterationMap(element, 
+                                valueIterationMap, 
+                                movesMap, 
+                                stepsLimit, 
+                                moveReward, 
+                                epsilon, 
+                                discountFactor, 
+                                backup=MDPAgent.MAX_BACKUP,
+                                distanceTable=None):
+    '''
+    Solve on its own the region of the map within stepsLimit from an
+    element (e.g. a ghost), starting from the values the map has there.
+    Each location of the region is discounted by discountFactor ^ distance
+    from the element. The values of the region are returned as a new dict 
+    { location: value }, the map is left unchanged.
+    '''
+    elementDistancesMap = getLocationsDistanceFromStartingLocation(element, movesMap, stepsLimit, distanceTable)
+    region = elementDistancesMap.keys()
+    regionValueIterationMap = { location: valueIterationMap[location] for location in region }
+
+    return valueIterationFunction(regionValueIterationMap,
+                                  getRegionMovesMap(movesMap, elementDistancesMap),
+                                  region,
+                                  moveReward,
+                                  epsilon,
+                                  discountFactor,
+                                  backup=backup,
+                                  discountsMap=getDistanceDiscountsMap(elementDistancesMap, discountFactor))
+
+
 def valueIterationFunction(oldValueIterationMap, 
                            movesMap, 
                            updatableLocations, 
                            moveReward, 
                            epsilon, 
-                           discountFactor):
+                           discountFactor,
+                           successorLocations=None,
+                           statistics=None,
+                           inPlace=False,
+                           deadline=None,
+                           backup=MDPAgent.MAX_BACKUP,
+                           discountsMap=None,
+                           includeNoMove=False):
     '''
     Update the value of each updatable location in the map
     using an iterative process which stops when the max update
     is less than a given threshold (epsilon).
+    The utilities of the moves of a location are combined as chosen
+    by backup (see selectUtility), and, if includeNoMove is True, the
+    value of staying in the location is combined with them.
+    If a discountsMap { location: discount } is given, the utility of 
+    each location is discounted by its own factor rather than by 
+    discountFactor (e.g. by discountFactor ^ distance from Pacman).
+    If the successorLocations of the world model are given, the landing
+    locations are looked up there instead of being computed at every update.
+    If a statistics dict is given, the number of sweeps performed 
+    is stored in it under 'sweeps', whether the values converged
+    under 'converged', the max update of the last sweep under 'maxUpdate'
+    and the number of location updates under 'backups'.
+    If inPlace is True (Gauss-Seidel) each new value is written in the map
+    straight away, and is used by the following updates of the same sweep,
+    in the order of updatableLocations.
+    If a deadline (as returned by time.time()) is given, the iteration stops 
+    after the first sweep that ends past the deadline, even if it has not 
+    converged, so the values of the last sweep are returned.
     '''
     maxUpdate = epsilon + 1
+    sweeps = 0
 
-    while maxUpdate > epsilon:
+    while maxUpdate > epsilon and not isPastDeadline(deadline, sweeps):
+        sweeps += 1
 
         # initialise the next value iteration map
         newValueIterationMap = {}
@@ -444,13 +1405,20 @@ def valueIterationFunction(oldValueIterationMap,
         
         # update the value of each updatable location
         for updatableLocation in updatableLocations:
-            locationValue = bellmanEquation(moveReward, 
-                                            updatableLocation, 
-                                            oldValueIterationMap, 
-                                            movesMap,  
-                                            discountFactor)    
+            locationDiscountFactor = discountFactor if discountsMap is None else discountsMap[updatableLocation]
+            locationValue = locationBellmanEquation(moveReward, 
+                                                    updatableLocation, 
+                                                    oldValueIterationMap, 
+                                                    movesMap,  
+                                                    locationDiscountFactor,
+                                                    successorLocations,
+                                                    backup,
+                                                    includeNoMove)
             locationValueUpdate = abs(locationValue - oldValueIterationMap[updatableLocation])
-            newValueIterationMap[updatableLocation] = locationValue
+            if inPlace:
+                oldValueIterationMap[updatableLocation] = locationValue
+            else:
+                newValueIterationMap[updatableLocation] = locationValue
 
             maxUpdate = max(maxUpdate, locationValueUpdate)
 
@@ -458,18 +1426,220 @@ def valueIterationFunction(oldValueIterationMap,
         for key, newValue in newValueIterationMap.items():
             oldValueIterationMap[key] = newValue
 
+    if statistics is not None:
+        statistics['sweeps'] = sweeps
+        statistics['converged'] = maxUpdate <= epsilon
+        statistics['maxUpdate'] = maxUpdate
+        statistics['backups'] = sweeps * len(updatableLocations)
+
     return oldValueIterationMap 
 
 
+def prioritizedSweepingFunction(oldValueIterationMap, 
+                                sweepingModel,
+                                updatableLocations, 
+                                moveReward, 
+                                epsilon, 
+                                discountFactor,
+                                statistics=None,
+                                deadline=None,
+                                backup=MDPAgent.MAX_BACKUP):
+    '''
+    Solve the map with prioritized sweeping: rather than updating every
+    location at each sweep, the locations are kept in a priority queue 
+    and only the one whose value is expected to change the most is updated.
+
+    The priority of a location is a bound on the change of its value
+    (its Bellman residual): it is computed exactly for all the locations
+    at the beginning, and when a location changes value by some amount, 
+    the locations depending on it (its predecessors) can change at most 
+    by discountFactor * probability of landing on it * amount. The process 
+    stops when no location can change by more than epsilon, the same 
+    condition as valueIterationFunction, or when the deadline (if any) is past
+    (which is checked only after the first backup).
+    The bound holds for all the backups, as neither the average nor 
+    the worst utility of the moves can change more than the utility of a move.
+    The map is numbered as in getSweepingModel, and the values are kept 
+    in a list by location id during the solve, as looking them up by id
+    is faster than by location. Only the values of the updatable locations
+    are written back to the map. A location already in the queue is pushed
+    again only when its bound has grown REQUEUE_FACTOR times since it was
+    pushed, so the queue holds few entries per location and the order of
+    the backups only approximates the order of the bounds. The queue costs
+    more per backup than a sweep, so it only saves time when few locations
+    change, e.g. on originalClassic but not on the large mazes (see
+    benchmark-scripts/solver_timing.py).
+
+    If a statistics dict is given, the number of locations popped and
+    backed up is stored in it under 'backups', and as the equivalent 
+    number of full sweeps under 'sweeps', whether the values converged 
+    under 'converged', and the largest change any location can still 
+    have (the largest bound left) under 'maxUpdate'.
+    '''
+    locations, locationIds, successorIds, predecessorIds = sweepingModel
+
+    # the backups are inlined (rather than calling locationBellmanEquation)
+    # as they are most of the work, with the same arithmetic
+    if backup == MDPAgent.MAX_BACKUP:
+        selectBackup = max
+    elif backup == MDPAgent.MIN_BACKUP:
+        selectBackup = min
+    else:
+        selectBackup = lambda utilities: sum(utilities) / float(len(utilities))
+
+    # the map may only hold the locations the backups read (e.g. within a radius)
+    values = [0.0] * len(locations)
+    for location, value in oldValueIterationMap.items():
+        values[locationIds[location]] = value
+    updatableIds = [locationIds[location] for location in updatableLocations]
+    # the locations which are not updatable have no pending update
+    pendingUpdates = [None] * len(locations)
+    queuedUpdates = [None] * len(locations)
+    queue = []
+
+    for locationId in updatableIds:
+        locationValue = moveReward + discountFactor * selectBackup([values[main] * .8 + values[traversal1] * .1 + values[traversal2] * .1
+                                                                    for main, traversal1, traversal2 in successorIds[locationId]])
+        pendingUpdate = abs(locationValue - values[locationId])
+        pendingUpdates[locationId] = pendingUpdate
+
+        # the heap pops the lowest priority first, so the update is negated
+        if pendingUpdate > epsilon:
+            queue.append((-pendingUpdate, locationId))
+            queuedUpdates[locationId] = pendingUpdate
+
+    heapq.heapify(queue)
+
+    # only the locations popped and backed up count, not the residuals
+    # computed above, and the deadline is only checked every few backups
+    backups = 0
+
+    while len(queue) > 0:
+        negatedUpdate, locationId = heapq.heappop(queue)
+        # skip the entries replaced by a later push, or already backed up
+        if queuedUpdates[locationId] != -negatedUpdate:
+            continue
+        queuedUpdates[locationId] = None
+
+        locationValue = moveReward + discountFactor * selectBackup([values[main] * .8 + values[traversal1] * .1 + values[traversal2] * .1
+                                                                    for main, traversal1, traversal2 in successorIds[locationId]])
+        backups += 1
+
+        locationValueUpdate = abs(locationValue - values[locationId])
+        values[locationId] = locationValue
+        pendingUpdates[locationId] = 0
+
+        for predecessorId, probability in predecessorIds[locationId]:
+            pendingUpdate = pendingUpdates[predecessorId]
+            if pendingUpdate is None:
+                continue
+            newPendingUpdate = pendingUpdate + discountFactor * probability * locationValueUpdate
+            pendingUpdates[predecessorId] = newPendingUpdate
+            queuedUpdate = queuedUpdates[predecessorId]
+            if newPendingUpdate > epsilon and (queuedUpdate is None or newPendingUpdate > MDPAgent.REQUEUE_FACTOR * queuedUpdate):
+                queuedUpdates[predecessorId] = newPendingUpdate
+                heapq.heappush(queue, (-newPendingUpdate, predecessorId))
+
+        if backups % MDPAgent.DEADLINE_CHECK_BACKUPS == 0 and isPastDeadline(deadline, backups):
+            break
+
+    for locationId in updatableIds:
+        oldValueIterationMap[locations[locationId]] = values[locationId]
+
+    if statistics is not None:
+        maxUpdate = max([pendingUpdates[locationId] for locationId in updatableIds] or [0])
+        statistics['backups'] = backups
+        statistics['sweeps'] = backups / float(max(len(updatableIds), 1))
+        statistics['converged'] = maxUpdate <= epsilon
+        statistics['maxUpdate'] = maxUpdate
+
+    return oldValueIterationMap
+
+
+def getSweepingModel(movesMap):
+    '''
+    Return the map numbered for prioritizedSweepingFunction, as a tuple
+    (locations, locationIds, successorIds, predecessorIds): the locations
+    in the order of their ids, the id of each location, and for each id 
+    the ids of the landing locations of each move (main, traversal, 
+    traversal) and the (id, probability) pairs of its predecessors 
+    (see getPredecessorsMap). It is built once per world.
+    '''
+    locations = list(movesMap)
+    locationIds = { location: locationId for locationId, location in enumerate(locations) }
+    predecessorsMap = getPredecessorsMap(movesMap)
+
+    successorIds = []
+    predecessorIds = []
+    for location in locations:
+        locationSuccessorIds = []
+        for move in MDPAgent.moves:
+            outcomes = [move] + MDPAgent.traversalMoves[move]
+            locationSuccessorIds.append(tuple(locationIds[sumTuples(location, operatedMove if operatedMove in movesMap[location] else (0, 0))]
+                                              for operatedMove in outcomes))
+        successorIds.append(locationSuccessorIds)
+        predecessorIds.append([(locationIds[predecessor], probability) for predecessor, probability in predecessorsMap[location]])
+
+    return locations, locationIds, successorIds, predecessorIds
+
+
+def isPastDeadline(deadline, updates):
+    '''
+    Return True if there is a deadline and it is past. As the values
+    computed before any update are just the rewards, the deadline is 
+    ignored until at least one update has been done.
+    '''
+    return deadline is not None and updates > 0 and time.time() > deadline
+
+
+def getPredecessorsMap(movesMap, moves=MDPAgent.moves):
+    '''
+    Return a dict { location: [(predecessor, probability)] } with the locations 
+    from which each location can be reached in one move (whether intended or not), 
+    i.e. the locations whose value depends on the value of each location,
+    and the highest probability, among all the moves of the predecessor, 
+    of landing on the location. A change in the value of a location changes
+    the value of a predecessor by at most discountFactor * probability * change.
+    '''
+    predecessorsMap = { location: [] for location in movesMap }
+
+    for predecessor in movesMap:
+        landingProbabilities = {}
+        for move in moves:
+            moveProbabilities = {}
+            outcomes = [(move, .8)] + [(traversalMove, .1) for traversalMove in MDPAgent.traversalMoves[move]]
+            for operatedMove, probability in outcomes:
+                if operatedMove not in movesMap[predecessor]:
+                    operatedMove = (0, 0)
+                landingLocation = sumTuples(predecessor, operatedMove)
+                moveProbabilities[landingLocation] = moveProbabilities.get(landingLocation, 0) + probability
+            for landingLocation, probability in moveProbabilities.items():
+                landingProbabilities[landingLocation] = max(landingProbabilities.get(landingLocation, 0), probability)
+
+        for landingLocation, probability in landingProbabilities.items():
+            predecessorsMap[landingLocation].append((predecessor, probability))
+
+    return predecessorsMap
+
+
 def getBestNextMove(moves, 
                     pacman, 
                     valueIterationMap, 
                     movesMap,
-                    distancesMap):
+                    distancesMap,
+                    successorLocations=None,
+                    statistics=None,
+                    landingPenalties=None):
     '''
     Given Pacman's location and the valueIterationMap,
     Calculate and return the best move for Pacman.
         e.g. If the best move is NORTH the function returns (0, 1)
+    The optional successorLocations of the world model are used, if given,
+    to look up the landing locations (they must list the moves in the same order).
+    If a statistics dict is given, how much better the best move is than 
+    the second best one (the margin of the choice) is stored in it under 'margin'.
+    If landingPenalties { location: penalty } are given, the penalty of the 
+    location a move lands on (if it succeeds) is added to its utility.
     '''
 
     # this is a list containing all the policies in the 
@@ -478,8 +1648,15 @@ def getBestNextMove(moves,
 
     # this loop aims to populate the policies list, as such, we consider all the moves
     # here, even if they would result in Pacman hitting the wall.
-    for move in moves:
-        expectedUtility = getMoveUtility(pacman, move, valueIterationMap, movesMap)
+    for moveIndex, move in enumerate(moves):
+        if successorLocations is None:
+            expectedUtility = getMoveUtility(pacman, move, valueIterationMap, movesMap)
+        else:
+            expectedUtility = getSuccessorsUtility(successorLocations[pacman][moveIndex], valueIterationMap)
+
+        if landingPenalties is not None:
+            landingLocation = sumTuples(pacman, move) if move in movesMap[pacman] else pacman
+            expectedUtility += landingPenalties.get(landingLocation, 0)
 
         policies.append((expectedUtility, move))
 
@@ -487,7 +1664,11 @@ def getBestNextMove(moves,
     # policy [0th], which is a 
     # tuple (score, move), and from it get the second element [1], 
     # which is the best move
-    bestMove = sorted(policies, reverse=True)[0][1]
+    sortedPolicies = sorted(policies, reverse=True)
+    bestMove = sortedPolicies[0][1]
+
+    if statistics is not None:
+        statistics['margin'] = sortedPolicies[0][0] - sortedPolicies[1][0]
 
     return bestMove
 
@@ -497,9 +1678,12 @@ def bellmanEquation(reward,
                     valueIterationMap, 
                     movesMap, 
                     discountFactor,
-                    moves=MDPAgent.moves):
+                    moves=MDPAgent.moves,
+                    backup=MDPAgent.MAX_BACKUP,
+                    includeNoMove=False):
     '''
-    Return the result of Bellman's equation.
+    Return the result of Bellman's equation, with the utilities 
+    of the moves combined as chosen by backup.
     '''
     utilities = []
     
@@ -507,11 +1691,85 @@ def bellmanEquation(reward,
     for move in moves:
         moveUtility = getMoveUtility(location, move, valueIterationMap, movesMap)
         utilities.append(moveUtility)
+
+    # staying still is certain, so its utility is the value of the location
+    if includeNoMove:
+        utilities.append(valueIterationMap[location])
     
-    expectedUtility = max(utilities)
+    expectedUtility = selectUtility(utilities, backup)
     return reward + discountFactor * expectedUtility
 
 
+def locationBellmanEquation(reward, 
+                            location, 
+                            valueIterationMap, 
+                            movesMap, 
+                            discountFactor,
+                            successorLocations=None,
+                            backup=MDPAgent.MAX_BACKUP,
+                            includeNoMove=False):
+    '''
+    Return the result of Bellman's equation in the given location, using
+    the successorLocations of the world model if given.
+    '''
+    if successorLocations is None:
+        return bellmanEquation(reward, location, valueIterationMap, movesMap, discountFactor, 
+                               backup=backup, includeNoMove=includeNoMove)
+    noMoveUtility = valueIterationMap[location] if includeNoMove else None
+    return successorsBellmanEquation(reward, successorLocations[location], valueIterationMap, discountFactor, 
+                                     backup, noMoveUtility)
+
+
+def successorsBellmanEquation(reward,
+                              locationSuccessors,
+                              valueIterationMap,
+                              discountFactor,
+                              backup=MDPAgent.MAX_BACKUP,
+                              noMoveUtility=None):
+    '''
+    Return the result of Bellman's equation, given the landing
+    locations of each move as stored in the world model, and the 
+    utility of staying still if it is one of the options.
+    '''
+    utilities = [getSuccessorsUtility(moveSuccessors, valueIterationMap) for moveSuccessors in locationSuccessors]
+    if noMoveUtility is not None:
+        utilities.append(noMoveUtility)
+    return reward + discountFactor * selectUtility(utilities, backup)
+
+
+def selectUtility(utilities, backup=MDPAgent.MAX_BACKUP):
+    '''
+    Combine the utilities of the moves of a location as chosen by backup:
+    'max' takes the best one (as in Bellman's equation), 'avg' their 
+    average and 'min' the worst one.
+    '''
+    if backup == MDPAgent.MAX_BACKUP:
+        return max(utilities)
+    if backup == MDPAgent.MIN_BACKUP:
+        return min(utilities)
+    return sum(utilities) / float(len(utilities))
+
+
+def getSuccessorsUtility(moveSuccessors, valueIterationMap):
+    '''
+    Given the landing locations of a move (main, traversal, traversal)
+    return the expected utility of that move. The sum is performed in 
+    the same order as getMoveUtility.
+    '''
+    mainLocation, traversalLocation1, traversalLocation2 = moveSuccessors
+    return (valueIterationMap[mainLocation] * .8
+            + valueIterationMap[traversalLocation1] * .1
+            + valueIterationMap[traversalLocation2] * .1)
+
+
+def getSuccessorLocations(worldModel):
+    '''
+    Return the landing locations stored in the world model,
+    or None if there is no model (numpy is not installed).
+    '''
+    return None if worldModel is None else worldModel.successorLocations
+
+
 def getMoveUtility(location, move, valueIterationMap, movesMap):
     '''
     Given a location and a move, calculate the values you would obtain
@@ -599,6 +1857,7 @@ def getNonWallLocations(walls, state):
     '''
     width, height = getVisitableWidthAndHeight(state)
     nonPerimeterLocations = getNonPerimeterLocations(height, width)
+    walls = set(walls)
     return [x for x in nonPerimeterLocations if x not in walls]
 
 
@@ -620,4 +1879,5 @@ def getMapMoves(accessibleMap):
         e.g. { (6, 5): [(1, 0), (-1, 0)]} 
         the only moves are EAST and WEST
     '''
-    return {location: getLegalMoves(accessibleMap, location) for location in accessibleMap}
\ No newline at end of file
+    accessibleLocations = set(accessibleMap)
+    return {location: getLegalMoves(accessibleLocations, location) for location in accessibleMap}
\ No newline at end of file
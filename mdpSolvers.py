@@ -0,0 +1,692 @@
+# mdpSolvers.py
+#
+# Array based versions of the value iteration used by the MDPAgent
+# in mdpAgents.py.
+#
+# The dict based functions in mdpAgents.py back up one location at a
+# time, calling bellmanEquation -> getMoveUtility -> getLocationUtility
+# for every (location, move) pair. Here the map is compiled once into
+# integer index arrays, so that each sweep of value iteration becomes a
+# handful of NumPy operations over the whole map. The compiled map
+# (WorldModel) is built once per layout and shared by every solver.
+#
+# The arithmetic is performed in the same order as the dict version,
+# so both produce the same values (and so the same move choice).
+
+import time
+
+import numpy as np
+
+# the policies are evaluated with a sparse solve if scipy is available,
+# and with a dense one otherwise
+try:
+    import scipy.sparse
+    import scipy.sparse.linalg
+except ImportError:
+    scipy = None
+
+# probability of performing the intended move and
+# of slipping into each of the two traversal moves
+MAIN_MOVE_PROBABILITY = 0.8
+TRAVERSAL_MOVE_PROBABILITY = 0.1
+
+# the min improvement for policy iteration to change the move of a location
+POLICY_TOLERANCE = 1e-9
+
+# the max locations of a policy evaluated with a dense solve when scipy
+# is available, as below that the dense solve is faster than the sparse one
+MAX_DENSE_EVALUATION_SIZE = 250
+
+# the max fraction of the moves of a policy changed from the previous one
+# for its dense system to be solved through its inverse, updated from the
+# one of the previous system, rather than solved as it is
+MAX_UPDATED_POLICY_FRACTION = 1 / 3.0
+
+# how the utilities of the moves of a location are combined in its backup,
+# as in MDPAgent.BACKUPS: the best one, their average or the worst one
+MAX_BACKUP = 'max'
+AVERAGE_BACKUP = 'avg'
+MIN_BACKUP = 'min'
+
+
+# the models already built, keyed by the accessible locations of their
+# world, so that games played on the same layout share the same model
+worldModels = {}
+
+
+class WorldModel:
+    '''
+    The stochastic transition model of a world stored as arrays.
+
+    Each accessible location is given an integer id (its position
+    in the locations list), and successors[id, moveIndex, outcome]
+    holds the id of the location Pacman lands on when trying to perform
+    moves[moveIndex]. The outcome 0 is the intended move, outcomes 1 and 2
+    are the traversal moves, and probabilities[outcome] is the chance of
+    each outcome. A move towards a wall lands on the starting location itself.
+
+    The same landing locations are also kept as tuples in successorLocations
+    { location: [(main, traversal, traversal) for each move] } for the code
+    working on dicts.
+
+    If the successors array is given (e.g. loaded from disk, see 
+    compiledWorlds.py) it is used as it is, and movesMap is not needed.
+    '''
+
+    def __init__(self, accessibleMap, movesMap, moves, traversalMoves, successors=None):
+        self.locations = list(accessibleMap)
+        self.locationIds = { location: locationId for locationId, location in enumerate(self.locations) }
+        self.moves = list(moves)
+        self.probabilities = np.array([MAIN_MOVE_PROBABILITY, 
+                                       TRAVERSAL_MOVE_PROBABILITY, 
+                                       TRAVERSAL_MOVE_PROBABILITY])
+
+        if successors is None:
+            successors = np.empty((len(self.locations), len(self.moves), 3), dtype=np.int32)
+
+            for locationId, location in enumerate(self.locations):
+                for moveIndex, move in enumerate(self.moves):
+                    outcomes = [move] + traversalMoves[move]
+                    for outcome, operatedMove in enumerate(outcomes):
+                        successors[locationId, moveIndex, outcome] = self.getLandingId(location, operatedMove, movesMap)
+
+        self.successors = successors
+        self.successorLocations = { location: [tuple(self.locations[landingId] for landingId in outcomes) 
+                                               for outcomes in successors[locationId].tolist()]
+                                    for locationId, location in enumerate(self.locations) }
+
+    def getLandingId(self, location, move, movesMap):
+        '''
+        Return the id of the location reached performing
+        the given move from the given location.
+        '''
+        if move not in movesMap[location]:
+            return self.locationIds[location]
+        return self.locationIds[(location[0] + move[0], location[1] + move[1])]
+
+    def toArray(self, valueMap):
+        '''
+        Convert a dict { location: value } into an array indexed by location id.
+        An array is returned as a copy.
+        '''
+        if isinstance(valueMap, np.ndarray):
+            return valueMap.astype(np.float64)
+        return np.array([valueMap[location] for location in self.locations], dtype=np.float64)
+
+    def toMap(self, values):
+        '''
+        Convert an array indexed by location id into a dict { location: value }.
+        '''
+        return dict(zip(self.locations, values.tolist()))
+
+    def toIds(self, locations):
+        '''
+        Return the array of the ids of the given locations.
+        '''
+        return np.array([self.locationIds[location] for location in locations], dtype=np.int32)
+
+    def toMask(self, locations):
+        '''
+        Return a boolean array which is True for the given locations only.
+        A boolean array is returned as it is.
+        '''
+        if isinstance(locations, np.ndarray):
+            return locations
+        mask = np.zeros(len(self.locations), dtype=bool)
+        mask[self.toIds(locations)] = True
+        return mask
+
+    def toLocations(self, mask):
+        '''
+        Return the list of the locations which are True in a boolean array.
+        '''
+        return [self.locations[locationId] for locationId in np.flatnonzero(mask).tolist()]
+
+
+def getWorldModel(accessibleMap, movesMap, moves, traversalMoves):
+    '''
+    Return the model of the world with the given accessible locations,
+    building it only the first time the world is seen.
+    '''
+    key = tuple(accessibleMap)
+    if key not in worldModels:
+        worldModels[key] = WorldModel(accessibleMap, movesMap, moves, traversalMoves)
+    return worldModels[key]
+
+
+class HaloKernels:
+    '''
+    The halos getGradientMap in mdpAgents.py builds around an element
+    (a ghost or a dead end), computed once for every location of the world.
+
+    The halo of a location is stored as the ids of the locations within
+    the distance limit and their weights (discountFactor ^ distance), so
+    that the halo of an element with a given reward is added to an array
+    of values indexed by location id with a single scatter-add.
+    '''
+
+    def __init__(self, worldModel, distanceTable, limit, discountFactor):
+        self.worldModel = worldModel
+        self.kernels = {}
+
+        for location in worldModel.locations:
+            halo = distanceTable.getLocationsWithinDistance(location, limit)
+            # the weights are computed as in getGradientMap to get the same values
+            self.kernels[location] = (np.array([worldModel.locationIds[haloLocation] for haloLocation, _ in halo], dtype=np.int32),
+                                      np.array([discountFactor**distance for _, distance in halo], dtype=np.float64))
+
+    def addHalo(self, values, element, reward):
+        '''
+        Add to the values the halo of an element with the given reward.
+        '''
+        ids, weights = self.kernels[element]
+        # the ids of a halo are all different, so this is a scatter-add
+        values[ids] += weights * reward
+
+    def addHaloToMap(self, valueMap, element, reward):
+        '''
+        Add the halo of an element with the given reward to the values of
+        a dict { location: value }, only for the locations already in it
+        (e.g. the ones within a radius).
+        '''
+        ids, weights = self.kernels[element]
+        for locationId, weight in zip(ids.tolist(), weights.tolist()):
+            location = self.worldModel.locations[locationId]
+            if location in valueMap:
+                valueMap[location] += weight * reward
+
+    def getLayer(self, elements, reward):
+        '''
+        Return the array holding the sum of the halos 
+        of the given elements, all with the same reward.
+        '''
+        values = np.zeros(len(self.worldModel.locations), dtype=np.float64)
+        for element in elements:
+            self.addHalo(values, element, reward)
+        return values
+
+
+def getMovesUtilities(values, worldModel, locationIds=None):
+    '''
+    Return an array (nLocations x nMoves) with the expected utility
+    of each move from each location, given the current values.
+    If locationIds is given, only the rows of those locations are returned.
+    If the values are a batch of maps (nMaps x nLocations), the utilities
+    of each map are returned (nMaps x nLocations x nMoves).
+    '''
+    successors = worldModel.successors if locationIds is None else worldModel.successors[locationIds]
+    landingValues = np.take(values, successors, axis=-1)
+    probabilities = worldModel.probabilities
+
+    # the outcomes are summed one at a time (rather than with a dot product)
+    # to keep the same rounding as the dict version
+    return (landingValues[..., 0] * probabilities[0]
+            + landingValues[..., 1] * probabilities[1]
+            + landingValues[..., 2] * probabilities[2])
+
+
+def getExpectedUtilities(values, worldModel, locationIds=None, backup=MAX_BACKUP, includeNoMove=False):
+    '''
+    Return the array of the utilities of the moves of each location 
+    combined as chosen by backup, as selectUtility does in mdpAgents.py.
+    If includeNoMove is True, the value of each location (the utility 
+    of staying still) is combined with the utilities of its moves.
+    If locationIds is given, only the entries of those locations are returned.
+    The values can also be a batch of maps, as in getMovesUtilities.
+    '''
+    movesUtilities = getMovesUtilities(values, worldModel, locationIds)
+    if includeNoMove:
+        locationValues = values if locationIds is None else values[..., locationIds]
+        movesUtilities = np.concatenate((movesUtilities, locationValues[..., np.newaxis]), axis=-1)
+
+    return combineUtilities(movesUtilities, backup)
+
+
+def combineUtilities(utilities, backup=MAX_BACKUP):
+    '''
+    Return the utilities along the last axis of the array combined 
+    as chosen by backup, as selectUtility does in mdpAgents.py.
+    '''
+    if backup == MAX_BACKUP:
+        return utilities.max(axis=-1)
+    if backup == MIN_BACKUP:
+        return utilities.min(axis=-1)
+
+    # the utilities are summed one at a time to keep the same rounding as sum()
+    totalUtilities = utilities[..., 0]
+    for index in range(1, utilities.shape[-1]):
+        totalUtilities = totalUtilities + utilities[..., index]
+    return totalUtilities / float(utilities.shape[-1])
+
+
+def vectorizedValueIterationFunction(oldValueIterationMap,
+                                     worldModel,
+                                     updatableLocations,
+                                     moveReward,
+                                     epsilon,
+                                     discountFactor,
+                                     statistics=None,
+                                     sweepBlocks=None,
+                                     deadline=None,
+                                     backup=MAX_BACKUP,
+                                     discountsMap=None,
+                                     includeNoMove=False,
+                                     updateMap=False,
+                                     asArray=False):
+    '''
+    Same as valueIterationFunction in mdpAgents.py, but every sweep
+    backs up all the updatable locations at once (and only them, so that
+    solving a few locations, e.g. within a radius, costs little). The 
+    result is returned as a dict { location: value } like the dict version.
+    The starting map and the updatable locations can also be given as
+    arrays indexed by location id (the latter as a boolean mask), and
+    so can the discount of each location (discountsMap).
+
+    If updateMap is True and the starting map is a dict, the values of the
+    updatable locations (the only ones which change) are stored in it and
+    it is returned, so that only the locations the sweeps read are converted
+    to and from the arrays, rather than the whole map. If asArray is True,
+    the values are returned as an array indexed by location id instead.
+
+    If sweepBlocks (a list of lists of updatable locations) is given, each 
+    sweep updates the blocks in place one after the other (block Gauss-Seidel): 
+    the locations of a block are updated together, using the values
+    already updated by the previous blocks of the same sweep.
+
+    If a deadline (as returned by time.time()) is given, the iteration stops 
+    after the first sweep that ends past the deadline.
+
+    The statistics are the same as the ones of valueIterationFunction.
+    '''
+    updatable = worldModel.toMask(updatableLocations)
+    updatableIds = np.flatnonzero(updatable)
+    updatesMap = updateMap and not asArray and isinstance(oldValueIterationMap, dict)
+
+    if updatesMap:
+        values = getReadValues(oldValueIterationMap, worldModel, updatableIds)
+    else:
+        values = worldModel.toArray(oldValueIterationMap)
+    discountFactors = discountFactor if discountsMap is None else worldModel.toArray(discountsMap)
+
+    maxUpdate = epsilon + 1
+    sweeps = 0
+    backups = 0
+
+    # with nothing to update the map is already the solution
+    if not updatable.any():
+        maxUpdate = 0
+
+    if sweepBlocks is not None:
+        blocksIds = [np.array([worldModel.locationIds[location] for location in block]) 
+                     for block in sweepBlocks if len(block) > 0]
+
+    while maxUpdate > epsilon and not (deadline is not None and sweeps > 0 and time.time() > deadline):
+        sweeps += 1
+
+        if sweepBlocks is None:
+            expectedUtilities = getExpectedUtilities(values, worldModel, updatableIds, backup, includeNoMove)
+            updatableDiscountFactors = discountFactors if discountsMap is None else discountFactors[updatableIds]
+            newValues = moveReward + updatableDiscountFactors * expectedUtilities
+
+            maxUpdate = np.abs(newValues - values[updatableIds]).max()
+            values[updatableIds] = newValues
+            backups += len(updatableIds)
+        else:
+            maxUpdate = 0
+            for blockIds in blocksIds:
+                expectedUtilities = getExpectedUtilities(values, worldModel, blockIds, backup, includeNoMove)
+                blockDiscountFactors = discountFactors if discountsMap is None else discountFactors[blockIds]
+                blockValues = moveReward + blockDiscountFactors * expectedUtilities
+
+                maxUpdate = max(maxUpdate, np.abs(blockValues - values[blockIds]).max())
+                values[blockIds] = blockValues
+                backups += len(blockIds)
+
+    if statistics is not None:
+        statistics['sweeps'] = sweeps
+        statistics['converged'] = maxUpdate <= epsilon
+        statistics['maxUpdate'] = maxUpdate
+        statistics['backups'] = backups
+
+    if asArray:
+        return values
+
+    if updatesMap:
+        return storeUpdatedValues(oldValueIterationMap, worldModel, updatableIds, values)
+
+    return worldModel.toMap(values)
+
+
+def getReadValues(valueMap, worldModel, updatableIds):
+    '''
+    Return the array of the values a solver reads from a dict: the ones of
+    the updatable locations and of the locations they can land on. Only 
+    those are converted (the others are left 0), so the dict may only hold
+    them, e.g. the locations within a radius and the ones just outside it.
+    '''
+    readIds = np.union1d(updatableIds, worldModel.successors[updatableIds].ravel())
+    values = np.zeros(len(worldModel.locations), dtype=np.float64)
+    values[readIds] = [valueMap[worldModel.locations[locationId]] for locationId in readIds.tolist()]
+    return values
+
+
+def storeUpdatedValues(valueMap, worldModel, updatableIds, values):
+    '''
+    Store in a dict the values of the updatable locations (the only
+    ones a solver changes) and return it.
+    '''
+    for locationId, value in zip(updatableIds.tolist(), values[updatableIds].tolist()):
+        valueMap[worldModel.locations[locationId]] = value
+    return valueMap
+
+
+def batchedValueIterationFunction(rewardsBatch,
+                                  worldModel,
+                                  updatableBatch,
+                                  moveReward,
+                                  epsilon,
+                                  discountFactor,
+                                  statistics=None,
+                                  deadline=None,
+                                  backup=MAX_BACKUP):
+    '''
+    Same as vectorizedValueIterationFunction (without sweep blocks), but 
+    solving a batch of maps of the same world together, e.g. one for each 
+    place the ghosts might be in. rewardsBatch (nMaps x nLocations) holds 
+    the starting values of each map, and updatableBatch the boolean mask 
+    of the updatable locations of each map. Each sweep backs up all the
+    maps at once (only the locations updatable in some map), until none 
+    of them changes more than epsilon.
+    The values of the maps are returned as an array (nMaps x nLocations).
+    '''
+    values = np.array(rewardsBatch, dtype=np.float64)
+    updatable = np.asarray(updatableBatch, dtype=bool)
+    updatableIds = np.flatnonzero(updatable.any(axis=0))
+    updatableColumns = updatable[:, updatableIds]
+
+    maxUpdate = epsilon + 1
+    sweeps = 0
+
+    # with nothing to update the maps are already the solution
+    if not updatable.any():
+        maxUpdate = 0
+
+    while maxUpdate > epsilon and not (deadline is not None and sweeps > 0 and time.time() > deadline):
+        sweeps += 1
+
+        expectedUtilities = getExpectedUtilities(values, worldModel, updatableIds, backup)
+        columnValues = values[:, updatableIds]
+        newValues = np.where(updatableColumns, moveReward + discountFactor * expectedUtilities, columnValues)
+
+        maxUpdate = np.abs(newValues - columnValues)[updatableColumns].max()
+        values[:, updatableIds] = newValues
+
+    if statistics is not None:
+        statistics['sweeps'] = sweeps
+        statistics['converged'] = maxUpdate <= epsilon
+        statistics['maxUpdate'] = maxUpdate
+        statistics['backups'] = sweeps * np.count_nonzero(updatable)
+
+    return values
+
+
+def getProperPolicy(worldModel, updatable, updatableIds, policy, movesUtilities):
+    '''
+    Return the policy (the index of the move of each updatable location)
+    changed so that every location following it eventually reaches a non
+    updatable location (e.g. food or a ghost), as without discount the
+    values of a policy are only finite if it does. The locations which
+    already reach one keep their moves. Each of the others, once next to
+    a location which reaches one, takes the best of the moves leading to
+    such locations, given the utilities of its moves (movesUtilities).
+    '''
+    rows = np.arange(len(updatableIds))
+    successors = worldModel.successors[updatableIds]
+    policy = policy.copy()
+    reaches = ~updatable
+
+    while not reaches[updatableIds].all():
+        pending = ~reaches[updatableIds]
+        # the locations whose move can land on a location which reaches one
+        reached = pending & reaches[successors[rows, policy]].any(axis=1)
+
+        if not reached.any():
+            leadsToReaching = pending[:, np.newaxis] & reaches[successors[:, :, 0]]
+            reached = leadsToReaching.any(axis=1)
+            # the remaining locations cannot reach any non updatable location
+            if not reached.any():
+                break
+            policy[reached] = np.where(leadsToReaching[reached], movesUtilities[reached], -np.inf).argmax(axis=1)
+
+        reaches[updatableIds[reached]] = True
+
+    return policy
+
+
+class PolicyEvaluator:
+    '''
+    Evaluates the policies of a solve, solving the linear system
+        value = moveReward + discountFactor * (expected value of the landing location)
+    over the updatable locations, where the values of the non updatable
+    locations are fixed. The parts which do not depend on the policy (where
+    each move lands, and the expected value of the non updatable locations it
+    lands on) are computed once per solve.
+
+    Each location lands on at most three others, so if scipy is available
+    the systems of more than MAX_DENSE_EVALUATION_SIZE locations are solved
+    as sparse ones. The others (and all of them without scipy) are solved as
+    dense ones. As the last policies of a solve change the moves of few 
+    locations, once a policy changes at most MAX_UPDATED_POLICY_FRACTION of
+    the moves of the previous one, the inverse of its system is computed, and
+    the inverse of the next ones is updated with the rows of the locations
+    whose move changed only (Woodbury formula), solving a system as large as
+    the number of moves changed rather than the whole system.
+    '''
+
+    def __init__(self, values, worldModel, updatableIds, moveReward, discountFactor):
+        self.size = len(updatableIds)
+        self.rows = np.arange(self.size)
+
+        # the position of each location among the updatable ones, -1 if not updatable
+        positions = np.full(len(worldModel.locations), -1, dtype=np.int32)
+        positions[updatableIds] = self.rows
+
+        # (locations x moves x outcomes) like worldModel.successors
+        successors = worldModel.successors[updatableIds]
+        self.landingPositions = positions[successors]
+        self.probabilities = discountFactor * worldModel.probabilities
+
+        fixedValues = np.where(self.landingPositions < 0, values[successors], 0)
+        self.constants = moveReward + (fixedValues * self.probabilities).sum(axis=-1)
+
+        self.isDense = scipy is None or self.size <= MAX_DENSE_EVALUATION_SIZE
+        # the dense system of the last policy evaluated and its inverse
+        self.coefficients = None
+        self.inverse = None
+        self.policy = None
+
+    def evaluate(self, policy):
+        '''
+        Return the values of the updatable locations following the policy.
+        '''
+        constants = self.constants[self.rows, policy]
+        if not self.isDense:
+            coefficientRows, coefficientColumns, coefficientValues = self.getCoefficients(policy)
+            # the values of the repeated triplets (a location landing on the
+            # same location with more than one outcome) are summed
+            coefficients = scipy.sparse.csc_matrix((coefficientValues, (coefficientRows, coefficientColumns)), 
+                                                   shape=(self.size, self.size))
+            return scipy.sparse.linalg.spsolve(coefficients, constants)
+
+        changedRows = self.rows if self.policy is None else np.flatnonzero(policy != self.policy)
+        self.policy = policy.copy()
+
+        # most of the system changed, so it is solved as it is
+        if len(changedRows) > MAX_UPDATED_POLICY_FRACTION * self.size:
+            self.coefficients = self.getDenseRows(self.rows, policy)
+            self.inverse = None
+            return np.linalg.solve(self.coefficients, constants)
+
+        changedCoefficients = self.getDenseRows(changedRows, policy)
+        if self.inverse is None:
+            self.coefficients[changedRows] = changedCoefficients
+            self.inverse = np.linalg.inv(self.coefficients)
+        elif len(changedRows) > 0:
+            rowChanges = changedCoefficients - self.coefficients[changedRows]
+            changesByInverse = rowChanges.dot(self.inverse)
+            capacitance = np.identity(len(changedRows)) + changesByInverse[:, changedRows]
+            self.inverse -= self.inverse[:, changedRows].dot(np.linalg.solve(capacitance, changesByInverse))
+            self.coefficients[changedRows] = changedCoefficients
+
+        return self.inverse.dot(constants)
+
+    def getDenseRows(self, rows, policy):
+        '''
+        Return the array of the given rows of the system of the policy.
+        '''
+        coefficients = np.zeros((len(rows), self.size))
+        positions = np.arange(len(rows))
+        coefficients[positions, rows] = 1
+
+        # each outcome sets one entry per row, and a location may land on 
+        # the same location with more than one outcome, so they are added in turn
+        landingPositions = self.landingPositions[rows, policy[rows]]
+        for outcome in range(landingPositions.shape[1]):
+            isUpdatable = landingPositions[:, outcome] >= 0
+            coefficients[positions[isUpdatable], landingPositions[isUpdatable, outcome]] -= self.probabilities[outcome]
+        return coefficients
+
+    def getCoefficients(self, policy):
+        '''
+        Return the coefficients of the system of the policy as (row, column, value) 
+        triplets: the identity, and an entry for each outcome landing on an 
+        updatable location.
+        '''
+        coefficientRows = [self.rows]
+        coefficientColumns = [self.rows]
+        coefficientValues = [np.ones(self.size)]
+
+        landingPositions = self.landingPositions[self.rows, policy]
+        for outcome in range(landingPositions.shape[1]):
+            isUpdatable = landingPositions[:, outcome] >= 0
+            coefficientRows.append(self.rows[isUpdatable])
+            coefficientColumns.append(landingPositions[isUpdatable, outcome])
+            coefficientValues.append(np.full(np.count_nonzero(isUpdatable), -self.probabilities[outcome]))
+
+        return np.concatenate(coefficientRows), np.concatenate(coefficientColumns), np.concatenate(coefficientValues)
+
+
+def policyIterationFunction(oldValueIterationMap,
+                            worldModel,
+                            updatableLocations,
+                            moveReward,
+                            epsilon,
+                            discountFactor,
+                            statistics=None,
+                            evaluationSweeps=None,
+                            deadline=None,
+                            updateMap=False):
+    '''
+    Solve the same MDP as vectorizedValueIterationFunction with policy 
+    iteration: the values of a policy are computed, then each location 
+    takes the move which is best given those values, until no move changes.
+    The first policy is the best one given the starting values, with no
+    discount changed to reach a non updatable location from every location
+    (see getProperPolicy). Without discount, the values of a policy are then 
+    only finite if moving has a cost (moveReward is negative), and as every
+    improvement keeps reaching those locations, so are the ones of the next.
+
+    If evaluationSweeps is None, each policy is evaluated exactly solving a 
+    linear system (see PolicyEvaluator), which without discount requires a
+    negative moveReward. Otherwise (modified policy iteration) the values 
+    are improved with a value iteration sweep, followed by evaluationSweeps - 1 
+    sweeps which keep the moves fixed, until the max update of the value 
+    iteration sweeps is below epsilon.
+
+    As in vectorizedValueIterationFunction, the starting map and the
+    updatable locations can also be given as arrays, and if updateMap is
+    True the values of the updatable locations are stored in the starting
+    map (a dict) rather than converting the whole map.
+
+    The statistics count a policy evaluation (or any sweep of modified
+    policy iteration) as a sweep, updating all the updatable locations,
+    and give as 'maxUpdate' the change a value iteration sweep would still 
+    make to the final values. If a deadline is given, the iteration 
+    stops after the first policy that ends past the deadline.
+    '''
+    # moving forever among the updatable locations would be worth as much as
+    # reaching the others, and the system of such a policy has no single solution
+    if evaluationSweeps is None and discountFactor >= 1 and moveReward >= 0:
+        raise Exception('Policy iteration without discount requires a negative move reward')
+
+    updatable = worldModel.toMask(updatableLocations)
+    updatableIds = np.flatnonzero(updatable)
+    rows = np.arange(len(updatableIds))
+    updatesMap = updateMap and isinstance(oldValueIterationMap, dict)
+    if updatesMap:
+        values = getReadValues(oldValueIterationMap, worldModel, updatableIds)
+    else:
+        values = worldModel.toArray(oldValueIterationMap)
+
+    converged = True
+    sweeps = 0
+
+    if len(updatableIds) > 0:
+        movesUtilities = getMovesUtilities(values, worldModel, updatableIds)
+        policy = movesUtilities.argmax(axis=1)
+        if evaluationSweeps is None:
+            if discountFactor >= 1:
+                policy = getProperPolicy(worldModel, updatable, updatableIds, policy, movesUtilities)
+            evaluator = PolicyEvaluator(values, worldModel, updatableIds, moveReward, discountFactor)
+        converged = False
+
+    while not converged and not (deadline is not None and sweeps > 0 and time.time() > deadline):
+
+        if evaluationSweeps is None:
+            sweeps += 1
+            values[updatableIds] = evaluator.evaluate(policy)
+
+            movesUtilities = getMovesUtilities(values, worldModel, updatableIds)
+            bestPolicy = movesUtilities.argmax(axis=1)
+
+            # a move is only changed if it is worse than the best one, 
+            # otherwise equivalent moves could keep replacing each other
+            isWorse = movesUtilities[rows, policy] < movesUtilities[rows, bestPolicy] - POLICY_TOLERANCE
+            policy = np.where(isWorse, bestPolicy, policy)
+            converged = not isWorse.any()
+        else:
+            sweeps += 1
+            movesUtilities = getMovesUtilities(values, worldModel, updatableIds)
+            policy = movesUtilities.argmax(axis=1)
+            newValues = moveReward + discountFactor * movesUtilities[rows, policy]
+
+            maxUpdate = np.abs(newValues - values[updatableIds]).max()
+            values[updatableIds] = newValues
+            converged = maxUpdate <= epsilon
+
+            if converged:
+                continue
+
+            policySuccessors = worldModel.successors[updatableIds, policy]
+            probabilities = worldModel.probabilities
+            for evaluationSweep in range(evaluationSweeps - 1):
+                sweeps += 1
+                landingValues = values[policySuccessors]
+                policyUtilities = (landingValues[:, 0] * probabilities[0]
+                                   + landingValues[:, 1] * probabilities[1]
+                                   + landingValues[:, 2] * probabilities[2])
+                values[updatableIds] = moveReward + discountFactor * policyUtilities
+
+    if statistics is not None:
+        statistics['sweeps'] = sweeps
+        statistics['converged'] = converged
+        statistics['backups'] = sweeps * len(updatableIds)
+        statistics['maxUpdate'] = 0
+        if len(updatableIds) > 0:
+            newValues = moveReward + discountFactor * getMovesUtilities(values, worldModel, updatableIds).max(axis=1)
+            statistics['maxUpdate'] = np.abs(newValues - values[updatableIds]).max()
+
+    if updatesMap:
+        return storeUpdatedValues(oldValueIterationMap, worldModel, updatableIds, values)
+
+    return worldModel.toMap(values)
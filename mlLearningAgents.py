@@ -25,19 +25,54 @@
 
 from pacman import Directions
 from game import Agent
+import os
 import random
-from collections import defaultdict
+import stateEncoders
+import qTables
+
+# experience replay and the ApproximateQAgent require numpy
+try:
+    import replayBuffers
+    import featureExtractors
+except ImportError:
+    replayBuffers = None
+    featureExtractors = None
 
 # QLearnAgent
 #
 class QLearnAgent(Agent):
 
     # Constructor, called when we start running the game
-    def __init__(self, alpha=0.2, epsilon=0.1, gamma=0.8, numTraining=10):
+    def __init__(self, alpha=0.2, epsilon=0.1, gamma=0.8, numTraining=10, encoder=stateEncoders.EXACT_ENCODER,
+                 qTable=qTables.DICT_Q_TABLE, qTableFile=None, checkpoint=0, mmap=False,
+                 replay=0, batchSize=32, replayRatio=1, traceDecay=0, traceThreshold=0.01):
         # alpha       - learning rate
         # epsilon     - exploration rate
         # gamma       - discount factor
         # numTraining - number of training episodes
+        # encoder     - how states are turned into the keys of the Q-table:
+        #               'exact' tells apart the same states GameState does,
+        #               'compact' only keeps the locations of the agents,
+        #               which ghosts are scared and the food and capsules left
+        # qTable      - how the Q-table is stored: 'dict' keeps a value for
+        #               each state-action pair, 'array' (requires numpy)
+        #               keeps the values of each state in a row of an array
+        # qTableFile  - file the Q-table is saved to (requires numpy) when
+        #               the training is over. If it exists, the Q-table
+        #               is loaded from it, so the training goes on from there
+        # checkpoint  - if above 0, the Q-table is also saved to the
+        #               qTableFile every checkpoint training episodes
+        # mmap        - if True, the Q-table is memory-mapped read-only from 
+        #               the qTableFile, and the agent plays without learning
+        # replay      - if above 0, the number of transitions kept to learn
+        #               from again (experience replay, requires qTable=array)
+        # batchSize   - transitions learnt from again at once with replay
+        # replayRatio - batches learnt from again after each move with replay
+        #               (e.g. 0.25 for a batch every 4 moves)
+        # traceDecay  - lambda of Q(lambda): if above 0, each update also
+        #               updates the state-action pairs visited before,
+        #               their share decaying by gamma * traceDecay a move
+        # traceThreshold - the share under which a pair stops being updated
         #
         # These values are either passed from the command line or are
         # set to the default values above. We need to create and set
@@ -51,17 +86,72 @@ class QLearnAgent(Agent):
 
         # These variables are used for the Q Learning of the agent
         # 
-        # The values of state-action pairs stored as a dict.
-        # If an action has never been performed from a given state,
-        # then its value is 0
-        self.QTable = defaultdict(int)
+        # The values of state-action pairs stored in a Q-table (see
+        # qTables.py), where each state is stored as the integer key
+        # given by the encoder. If an action has never been performed 
+        # from a given state, then its value is 0
+        self.qTableFile = qTableFile
+        self.checkpoint = int(checkpoint)
+        # whether the Q-table changed since it was loaded or saved
+        self.QTableChanged = False
+        self.mmap = str(mmap).lower() in ['true', '1', 'yes']
+
+        if self.mmap:
+            if qTableFile is None:
+                raise Exception('A memory-mapped Q-table needs a qTableFile')
+            self.QTable = qTables.MappedQTable(qTableFile)
+        elif qTableFile is not None and os.path.exists(qTableFile):
+            self.QTable = qTables.loadQTable(qTable, qTableFile)
+        else:
+            self.QTable = qTables.getQTable(qTable)
+        self.stateEncoder = stateEncoders.getStateEncoder(encoder)
 
         # Keep track of the score of Pacman from the previous state
-        # as well as the last state-action pair, i.e. the previous state 
-        # and the action that was performed from such a state.
+        # as well as the last state-action pair, i.e. the key of the 
+        # previous state and the action that was performed from such a state.
         # These values are both None upon the beginning of a game.
         self.previousScore = None
         self.previousStateActionPair = None
+        # Whether the last action was picked at random and is worse than
+        # the best one (exploring), which cuts the traces of Q(lambda) 
+        # before its update
+        self.actionExplored = False
+
+        # The transitions the Q-table was updated with, as 
+        # (previous state key, action, reward, state key, legal actions,
+        # whether the action was exploring) tuples, if they are recorded
+        # (i.e. if this is a list)
+        self.transitions = None
+
+        # The buffer of the transitions to learn from again, if any,
+        # and the batches to learn from (the fractional part of the
+        # replay ratio adds up over the moves)
+        self.replayBuffer = None
+        self.batchSize = int(batchSize)
+        self.replayRatio = float(replayRatio)
+        self.replayCredit = 0.0
+        if int(replay) > 0:
+            if not isinstance(self.QTable, qTables.ArrayQTable) or self.mmap:
+                raise Exception('Experience replay requires qTable=array')
+            self.replayBuffer = replayBuffers.ReplayBuffer(int(replay))
+
+        # The eligibility traces of Q(lambda), if used: the share of each
+        # update each recently visited state-action pair gets, as a dict
+        # { (state key, action): trace }. The traces under the threshold
+        # are dropped, so the dict only holds the last few pairs
+        self.traceDecay = float(traceDecay)
+        self.traceThreshold = float(traceThreshold)
+        # with gamma * traceDecay >= 1 the traces would never decay
+        if self.traceDecay < 0 or self.gamma * self.traceDecay >= 1:
+            raise Exception('traceDecay must be at least 0 and below 1 / gamma')
+        if self.traceThreshold <= 0:
+            raise Exception('traceThreshold must be above 0')
+        self.traces = {} if self.traceDecay > 0 else None
+
+        # A memory-mapped Q-table cannot be updated, 
+        # so the agent only picks the best actions
+        if self.mmap:
+            self.stopExploration()
     
 
     ########################
@@ -104,13 +194,14 @@ class QLearnAgent(Agent):
     # This is called by the game after a win or a loss.
     def final(self, state):     
         
-        self.updateQTable(state, gameIsOver=True)
+        self.updateQTable(state, self.stateEncoder.encode(state), gameIsOver=True)
 
         # Game is over and Q-table was updated already,
         # so reset the values about to the previous state
         # as the next move will be the first one of a new game.
         self.previousStateActionPair = None
         self.previousScore = None
+        self.stateEncoder.reset()
         
         # Game (episode) is over, so increase the count
         # episodes performed so far 
@@ -119,21 +210,29 @@ class QLearnAgent(Agent):
             # The agent has finished its training. From now on
             # it should always pick the best action
             self.stopExploration()
+
+        if self.shouldSaveQTable():
+            qTables.saveQTable(self.QTable, self.qTableFile)
+            self.QTableChanged = False
     
     
     # The main method required by the game. Called every time that
     # Pacman is expected to move
     def getAction(self, state):
+
+        # The state is encoded once, and its key
+        # is used for all the lookups in the Q-table
+        stateKey = self.stateEncoder.encode(state)
         
         # If this is not the agent's first move
         # then update the Q-table
         if self.previousStateActionPair != None:
-            self.updateQTable(state)
+            self.updateQTable(state, stateKey)
 
 
-        action = self.nextAction(state)
+        action = self.nextAction(state, stateKey)
 
-        self.previousStateActionPair = (state, action)
+        self.previousStateActionPair = (stateKey, action)
         self.previousScore = state.getScore()
         # We have to return an action
         return action
@@ -168,20 +267,16 @@ class QLearnAgent(Agent):
     # ----------
     # state: game.GameStateData
     #   the current state of the game
+    #
+    # stateKey: int
+    #   the key of the current state in the Q-table
     # 
     # Return
     # ------
     # The best action that the agent can perform
     # in the current state
-    def bestAction(self, state):
-        bestReward = None
-        bestAction = None
-
-        for action in self.getLegalActions(state):
-            actionReward = self.QTable[(state, action)]
-            if bestReward == None or bestReward < actionReward:
-                bestAction = action  
-                bestReward = actionReward          
+    def bestAction(self, state, stateKey):
+        bestAction, _ = self.QTable.getBestAction(stateKey, self.getLegalActions(state))
         return bestAction
             
 
@@ -195,17 +290,26 @@ class QLearnAgent(Agent):
     # ----------
     # state: game.GameStateData 
     #   the current state of the game
+    #
+    # stateKey: int
+    #   the key of the current state in the Q-table
     # 
     # Return
     # ------
     # the next action the agent should perform
-    def nextAction(self, state):
+    def nextAction(self, state, stateKey):
         agentShouldExplore = random.random() < self.epsilon
+        self.actionExplored = False
 
         if agentShouldExplore:
-            return self.randomAction(state)
+            action = self.randomAction(state)
+            # the random action may be (as good as) the best one, 
+            # and then it is not exploring
+            _, maxQValue = self.QTable.getBestAction(stateKey, self.getLegalActions(state))
+            self.actionExplored = self.QTable.getValue(stateKey, action) < maxQValue
+            return action
         else:
-            return self.bestAction(state) 
+            return self.bestAction(state, stateKey) 
 
     
     # Given the current state, update the value in the Q-table 
@@ -228,6 +332,9 @@ class QLearnAgent(Agent):
     #   state: game.GameStateData
     #       the current state of the game
     #
+    #   stateKey: int
+    #       the key of the current state in the Q-table
+    #
     #   gameIsOver: Boolean
     #       flag that indicates whether the game is over. 
     #       If True, agent is in a terminal state and will 
@@ -239,21 +346,167 @@ class QLearnAgent(Agent):
     #  
     # The update formula is taken from slide 46 from week 9 - "Reinforcement Learning 2".
     # [https://keats.kcl.ac.uk/pluginfile.php/6784507/mod_resource/content/11/rl2.pdf]
-    def updateQTable(self, state, gameIsOver=False):
+    def updateQTable(self, state, stateKey, gameIsOver=False):
+
+        # with a learning rate of 0 (e.g. once the training is over)
+        # the values would not change, so the Q-table is left as it is
+        if self.alpha == 0:
+            return
 
-        currentQValue = self.QTable[self.previousStateActionPair]
+        previousStateKey, previousAction = self.previousStateActionPair
         reward = state.getScore() - self.previousScore
 
         # if the game is over the agent cannot select any actions
-        # from here, so the bestAction is just set to be None
-        bestAction = None if gameIsOver else self.bestAction(state)
+        # from here, so there are no actions to take the max Q-value of
+        actions = None if gameIsOver else self.getLegalActions(state)
+
+        self.updateQValue(previousStateKey, previousAction, reward, stateKey, actions, self.actionExplored)
 
-        maxQValue = self.QTable[(state, bestAction)]
+
+    # Update the value in the Q-table of a state-action pair given
+    # the transition that followed it, with the formula above. The
+    # transition is also recorded if the agent keeps track of them
+    # (see parallelTraining.py).
+    #
+    # Parameters
+    # ----------
+    #   previousStateKey: int
+    #       the key of the state the action was performed from
+    #
+    #   previousAction: str
+    #       the action performed
+    #
+    #   reward: float
+    #       the change in the score caused by the action
+    #
+    #   stateKey: int
+    #       the key of the state the action led to
+    #
+    #   actions: list
+    #       the legal actions in the state the action led to,
+    #       None if the game is over
+    #
+    #   explored: Boolean
+    #       whether the action was picked at random and is worse than
+    #       the best one. If True, the traces are dropped before the 
+    #       update, as the values of the pairs visited before are learnt
+    #       for the best actions, which were not followed
+    def updateQValue(self, previousStateKey, previousAction, reward, stateKey, actions, explored=False):
+        if self.transitions is not None:
+            self.transitions.append((previousStateKey, previousAction, reward, stateKey, actions, explored))
+
+        if self.traces is not None and explored:
+            self.traces.clear()
+
+        currentQValue = self.QTable.getValue(previousStateKey, previousAction)
+
+        # if the game is over the max Q-value is just set to be 0
+        if actions is None:
+            maxQValue = 0
+        else:
+            _, maxQValue = self.QTable.getBestAction(stateKey, actions)
         
-        self.QTable[self.previousStateActionPair] = currentQValue + (self.alpha * (reward + self.gamma * maxQValue - currentQValue))
+        self.QTableChanged = True
+        difference = reward + self.gamma * maxQValue - currentQValue
+
+        if self.traces is None:
+            self.QTable.setValue(previousStateKey, previousAction, currentQValue + (self.alpha * difference))
+        else:
+            self.updateTracedQValues(previousStateKey, previousAction, difference, actions is None)
+
+        if self.replayBuffer is not None:
+            self.replayTransitions(previousStateKey, previousAction, reward, stateKey, actions)
+
+
+    # Update the values of the state-action pairs with a trace by
+    # their share of the difference between the value of the given
+    # pair and its target (Watkins's Q(lambda)), so that a reward 
+    # reaches all the pairs which led to it at once:
+    #
+    # e[s,a] <- 1
+    # Q[s',a'] <- Q[s',a'] + alpha * difference * e[s',a']   for each traced s',a'
+    # e[s',a'] <- gamma * lambda * e[s',a']
+    #
+    # Parameters
+    # ----------
+    #   previousStateKey: int
+    #       the key of the state the action was performed from
+    #
+    #   previousAction: str
+    #       the action performed
+    #
+    #   difference: float
+    #       the target of the value of the pair minus its value
+    #
+    #   gameIsOver: Boolean
+    #       if True, the traces are dropped after the update
+    def updateTracedQValues(self, previousStateKey, previousAction, difference, gameIsOver):
+        self.traces[(previousStateKey, previousAction)] = 1.0
+        decay = self.gamma * self.traceDecay
+
+        for (stateKey, action), trace in self.traces.items():
+            self.QTable.setValue(stateKey, action, self.QTable.getValue(stateKey, action) + self.alpha * difference * trace)
+
+            if trace * decay < self.traceThreshold:
+                del self.traces[(stateKey, action)]
+            else:
+                self.traces[(stateKey, action)] = trace * decay
+
+        if gameIsOver:
+            self.traces.clear()
+
+
+    # Store the given transition in the replay buffer, then learn 
+    # again from batches of the transitions stored, as many as 
+    # the replay ratio says. The parameters are as in updateQValue
+    def replayTransitions(self, previousStateKey, previousAction, reward, stateKey, actions):
+        nextActionsMask = [False] * len(stateEncoders.directions)
+        for action in actions or []:
+            nextActionsMask[stateEncoders.directionIds[action]] = True
+
+        self.replayBuffer.add(self.QTable.getRowId(previousStateKey), stateEncoders.directionIds[previousAction], 
+                              reward, self.QTable.getRowId(stateKey), nextActionsMask, actions is None)
+
+        self.replayCredit += self.replayRatio
+        while self.replayCredit >= 1:
+            self.replayBuffer.replay(self.QTable, self.batchSize, self.alpha, self.gamma)
+            self.replayCredit -= 1
 
 
     
+    # Replace the Q-table with the given one (e.g. a snapshot of the
+    # Q-table of another agent). The transitions in the replay buffer
+    # refer to their states by their row in the Q-table, so they are
+    # moved to the rows of the same states in the new one
+    #
+    # Parameters
+    # ----------
+    #   qTable: object
+    #       the new Q-table, an array one if the agent uses replay
+    def setQTable(self, qTable):
+        if self.replayBuffer is not None:
+            stateKeys, _ = self.QTable.getRows()
+            self.replayBuffer.moveRows([qTable.getRowId(stateKey) for stateKey in stateKeys])
+        self.QTable = qTable
+
+
+    # Decide whether the Q-table should be saved to the 
+    # qTableFile at the end of the current episode: when 
+    # the training is over, and every checkpoint episodes,
+    # if it changed since it was loaded or last saved
+    #
+    # Return
+    # ------
+    # True if the Q-table should be saved
+    def shouldSaveQTable(self):
+        if self.qTableFile is None or not self.QTableChanged:
+            return False
+        if self.getEpisodesSoFar() == self.getNumTraining():
+            return True
+        return self.checkpoint > 0 and self.getEpisodesSoFar() < self.getNumTraining() \
+            and self.getEpisodesSoFar() % self.checkpoint == 0
+
+
     # Return all the action that the agent can
     # perform from the current state excluding 
     # the non-move action (i.e. the agent does
@@ -279,4 +532,107 @@ class QLearnAgent(Agent):
     # and only picks the best actions
     def stopExploration(self):
         self.setAlpha(0)
-        self.setEpsilon(0)
\ No newline at end of file
+        self.setEpsilon(0)
+
+
+# ApproximateQAgent
+#
+# A Q-learning agent which, rather than storing the value of each
+# state-action pair, estimates it as a weighted sum of the features
+# of the action (see featureExtractors.py), and learns the weights. 
+# So it learns what it sees in a state for the states never seen, 
+# and it keeps a weight for each feature whatever the layout and 
+# however long it trains.
+#
+# It requires numpy, e.g.
+#
+#   python pacman.py -p ApproximateQAgent -x 100 -n 110 -l mediumClassic -q
+#
+class ApproximateQAgent(QLearnAgent):
+
+    # Constructor, called when we start running the game
+    def __init__(self, alpha=0.01, epsilon=0.05, gamma=0.8, numTraining=10):
+        # alpha       - learning rate
+        # epsilon     - exploration rate
+        # gamma       - discount factor
+        # numTraining - number of training episodes
+        if featureExtractors is None:
+            raise Exception('The ApproximateQAgent requires numpy')
+
+        self.alpha = float(alpha)
+        self.epsilon = float(epsilon)
+        self.gamma = float(gamma)
+        self.numTraining = int(numTraining)
+        # Count the number of games we have played
+        self.episodesSoFar = 0
+
+        # The weight of each feature, the value of an action
+        # being the sum of its features times their weights
+        self.featureExtractor = featureExtractors.FeatureExtractor()
+        self.weights = self.featureExtractor.getInitialWeights()
+
+        # Keep track of the score of Pacman from the previous state
+        # as well as the features of the action performed from it.
+        # These values are both None upon the beginning of a game.
+        self.previousScore = None
+        self.previousFeatures = None
+
+
+    # This is called by the game after a win or a loss.
+    def final(self, state):
+
+        # Pacman cannot perform any more actions, so the
+        # value of the state it ended up in is 0
+        if self.previousFeatures is not None:
+            self.updateWeights(state.getScore() - self.previousScore, 0)
+
+        self.previousFeatures = None
+        self.previousScore = None
+
+        self.incrementEpisodesSoFar()
+        if self.getEpisodesSoFar() == self.getNumTraining():
+            self.stopExploration()
+
+
+    # The main method required by the game. Called every time that
+    # Pacman is expected to move
+    def getAction(self, state):
+        actions = self.getLegalActions(state)
+
+        # The features and the values of all the legal actions at once,
+        # used both to learn from the previous move and to pick the next one
+        features = self.featureExtractor.getFeatures(state, actions)
+        qValues = features.dot(self.weights)
+
+        if self.previousFeatures is not None:
+            self.updateWeights(state.getScore() - self.previousScore, qValues.max())
+
+        if random.random() < self.epsilon:
+            action = random.choice(actions)
+        else:
+            action = actions[int(qValues.argmax())]
+
+        self.previousFeatures = features[actions.index(action)]
+        self.previousScore = state.getScore()
+        return action
+
+
+    # Update the weights given the reward of the previous action,
+    # moving each weight in proportion to its feature:
+    #
+    # w <- w + alpha * (reward + gamma * max_over_a'( Q[s',a'] ) - Q[s,a]) * f(s,a)
+    #
+    # Parameters
+    # ----------
+    #   reward: float
+    #       the change in the score caused by the previous action
+    #
+    #   maxQValue: float
+    #       the highest value of the actions in the current state,
+    #       0 if the game is over
+    def updateWeights(self, reward, maxQValue):
+        if self.alpha == 0:
+            return
+
+        difference = reward + self.gamma * maxQValue - self.previousFeatures.dot(self.weights)
+        self.weights = self.weights + self.alpha * difference * self.previousFeatures
@@ -0,0 +1,158 @@
+# parallelTraining.py
+#
+# Train the QLearnAgent of mlLearningAgents.py with several processes.
+#
+# The training episodes are played by worker processes (actors), each
+# with its own games and its own copy of the agent, exploring as the
+# agent does. The process running this script owns the Q-table (the
+# learner): every round it saves a snapshot of the Q-table, which each
+# worker loads to play its share of the next episodes, learning from
+# them as it plays. The workers send back the transitions they learnt
+# from, and the learner updates its Q-table with all of them, worker
+# after worker, before the next round. Each transition records whether
+# its action was exploring, so with Q(lambda) the learner cuts the traces
+# where the worker did. Once the training is over, the
+# test games are played as pacman.py does.
+#
+# It takes the options of pacman.py, plus the number of workers and
+# the episodes each worker plays between two snapshots, e.g.
+#
+#   python parallelTraining.py --workers=4 --syncEpisodes=50 -p QLearnAgent -x 2000 -n 2010 -l smallGrid -q
+#
+# The snapshots are saved as in qTables.saveQTable, so it requires numpy.
+
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import pacman
+import qTables
+from mlLearningAgents import QLearnAgent
+
+# the episodes each worker plays between two snapshots by default
+SYNC_EPISODES = 50
+
+# the components of the games of the worker, set up when it starts
+workerArgs = None
+
+
+def setUpWorker(argv):
+    '''
+    Set up the games and the agent of a worker from the options of pacman.py.
+    '''
+    global workerArgs
+    workerArgs = pacman.readCommand(argv)
+    # only the learner saves the Q-table
+    workerArgs['pacman'].qTableFile = None
+
+
+def runEpisodes(task):
+    '''
+    Play the given number of training episodes from the snapshot of the
+    Q-table, and return the transitions the agent learnt from.
+    '''
+    snapshotPath, qTableName, episodes, seed = task
+    agent = workerArgs['pacman']
+    agent.setQTable(qTables.loadQTable(qTableName, snapshotPath))
+    agent.transitions = []
+    random.seed(seed)
+
+    pacman.runGames(workerArgs['layout'], agent, workerArgs['ghosts'], workerArgs['display'], episodes, False,
+                    numTraining=episodes, catchExceptions=workerArgs['catchExceptions'], timeout=workerArgs['timeout'])
+    return agent.transitions
+
+
+def getQTableName(qTable):
+    '''
+    Return the name of the kind of the given Q-table, as in qTables.getQTable.
+    '''
+    for name, qTableClass in qTables.qTables.items():
+        if qTable.__class__ is qTableClass:
+            return name
+    raise Exception('Parallel training does not support ' + qTable.__class__.__name__)
+
+
+def trainInParallel(args, argv, workers, syncEpisodes):
+    '''
+    Train the agent in the given game components (as returned by
+    pacman.readCommand from argv) for its training episodes.
+    '''
+    agent = args['pacman']
+    if not isinstance(agent, QLearnAgent):
+        raise Exception('Parallel training requires the QLearnAgent')
+    if agent.mmap:
+        raise Exception('A memory-mapped Q-table cannot be trained')
+
+    numTraining = args.get('numTraining', 0)
+    qTableName = getQTableName(agent.QTable)
+    snapshotFolder = tempfile.mkdtemp()
+    snapshotPath = os.path.join(snapshotFolder, 'snapshot.npy')
+    pool = multiprocessing.Pool(workers, initializer=setUpWorker, initargs=(argv,))
+
+    start = time.time()
+    episodes = 0
+    try:
+        while episodes < numTraining:
+            qTables.saveQTable(agent.QTable, snapshotPath)
+
+            # the episodes of the round, split among the workers
+            roundEpisodes = min(workers * syncEpisodes, numTraining - episodes)
+            tasks = [(snapshotPath, qTableName, roundEpisodes // workers + int(worker < roundEpisodes % workers),
+                      random.randrange(sys.maxint))
+                     for worker in range(workers)]
+
+            for transitions in pool.map(runEpisodes, [task for task in tasks if task[2] > 0]):
+                for transition in transitions:
+                    agent.updateQValue(*transition)
+            episodes += roundEpisodes
+    finally:
+        pool.terminate()
+        shutil.rmtree(snapshotFolder)
+
+    trainingTime = time.time() - start
+    print 'Trained %d episodes with %d workers in %.2fs (%.1f episodes/s)' % \
+        (numTraining, workers, trainingTime, numTraining / max(trainingTime, 1e-9))
+
+    # the training is over, as if the agent had played the episodes
+    agent.episodesSoFar = numTraining
+    agent.stopExploration()
+    if agent.shouldSaveQTable():
+        qTables.saveQTable(agent.QTable, agent.qTableFile)
+
+
+def readParallelOptions(argv):
+    '''
+    Return the number of workers, the episodes between two snapshots
+    and the options of pacman.py in the given command line.
+    '''
+    workers = multiprocessing.cpu_count()
+    syncEpisodes = SYNC_EPISODES
+    pacmanArgv = []
+
+    for argument in argv:
+        if argument.startswith('--workers='):
+            workers = int(argument[len('--workers='):])
+        elif argument.startswith('--syncEpisodes='):
+            syncEpisodes = int(argument[len('--syncEpisodes='):])
+        else:
+            pacmanArgv.append(argument)
+
+    if workers < 1 or syncEpisodes < 1:
+        raise Exception('The workers and the episodes between two snapshots must be at least 1')
+    return workers, syncEpisodes, pacmanArgv
+
+
+if __name__ == '__main__':
+    workers, syncEpisodes, argv = readParallelOptions(sys.argv[1:])
+    args = pacman.readCommand(argv)
+    trainInParallel(args, argv, workers, syncEpisodes)
+
+    # the test games, played as pacman.py does
+    testGames = args['numGames'] - args.get('numTraining', 0)
+    if testGames > 0:
+        pacman.runGames(args['layout'], args['pacman'], args['ghosts'], args['display'], testGames, args['record'],
+                        catchExceptions=args['catchExceptions'], timeout=args['timeout'])
@@ -0,0 +1,303 @@
+# qTables.py
+#
+# The Q-tables the QLearnAgent in mlLearningAgents.py can store the values
+# of its state-action pairs in. Both are keyed by the integer keys of the
+# states given by the encoders in stateEncoders.py, and give 0 as the
+# value of a pair never updated.
+#
+#   dict   - a dict { (state, action): value }, the original Q-table
+#   array  - a NumPy array of float32 with a row for each state and a
+#            column for each direction, so that each entry takes 4 bytes
+#            and all the values of a state are read with one lookup.
+#            The row of each state is given the first time its values
+#            are updated, and the array doubles when it runs out of rows.
+#
+# The two are compared in memory and speed by
+#
+#     python benchmark-scripts/qtable_benchmark.py
+#
+# Either can be saved to a file and loaded back (requires numpy), so that
+# training can go on from where a run left it, or memory-mapped read-only
+# as a MappedQTable to play with what was learnt, without loading it all:
+#
+#   qTables.saveQTable(qTable, path)
+#   qTable = qTables.loadQTable(qTables.ARRAY_Q_TABLE, path)
+#   qTable = qTables.MappedQTable(path)
+#
+# The file is a .npy array with a record for each state, sorted by key:
+# the key, as a big-endian byte string as wide as the widest key, and the
+# values of the state, one for each direction, as stored by the Q-table
+# (float64 for the dict Q-table, float32 for the array one).
+
+import binascii
+import os
+import tempfile
+
+from stateEncoders import directionIds, directions
+
+# the array Q-table needs numpy, the dict one works without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# the rows the array Q-table starts with
+INITIAL_ROWS = 1024
+
+
+class DictQTable:
+    '''
+    The values of the state-action pairs stored in a dict.
+    '''
+
+    def __init__(self):
+        self.values = {}
+
+    def getValue(self, stateKey, action):
+        return self.values.get((stateKey, action), 0)
+
+    def setValue(self, stateKey, action, value):
+        self.values[(stateKey, action)] = value
+
+    def getBestAction(self, stateKey, actions):
+        '''
+        Return the action with the highest value among the given ones,
+        the first one if more have the same value, and its value.
+        '''
+        bestValue = None
+        bestAction = None
+
+        for action in actions:
+            actionValue = self.values.get((stateKey, action), 0)
+            if bestValue == None or bestValue < actionValue:
+                bestAction = action
+                bestValue = actionValue
+        return bestAction, bestValue
+
+    def getStateCount(self):
+        return len(set(stateKey for stateKey, _ in self.values))
+
+    def getRows(self):
+        '''
+        Return the keys of the states and an array with their values, 
+        a row for each state and a column for each direction.
+        '''
+        rowIds = {}
+        for stateKey, _ in self.values:
+            rowIds.setdefault(stateKey, len(rowIds))
+
+        values = np.zeros((len(rowIds), len(directions)))
+        for (stateKey, action), value in self.values.items():
+            values[rowIds[stateKey], directionIds[action]] = value
+
+        return sorted(rowIds, key=rowIds.get), values
+
+    def setRows(self, stateKeys, values):
+        '''
+        Set the values of the given states, as returned by getRows.
+        '''
+        for stateKey, row in zip(stateKeys, values.tolist()):
+            for directionId, value in enumerate(row):
+                # the values never updated are 0 anyway
+                if value != 0:
+                    self.values[(stateKey, directions[directionId])] = value
+
+
+class ArrayQTable:
+    '''
+    The values of the state-action pairs stored in a growable array,
+    with a row for each state and a column for each direction.
+    '''
+
+    def __init__(self, initialRows=INITIAL_ROWS):
+        self.rowIds = {}
+        self.values = np.zeros((initialRows, len(directions)), dtype=np.float32)
+        # the values of a state which has no row yet
+        self.emptyRow = np.zeros(len(directions), dtype=np.float32)
+
+    def getRow(self, stateKey):
+        '''
+        Return the values of the given state, without giving it a row.
+        '''
+        rowId = self.rowIds.get(stateKey)
+        return self.emptyRow if rowId is None else self.values[rowId]
+
+    def getValue(self, stateKey, action):
+        return self.getRow(stateKey).item(directionIds[action])
+
+    def getRowId(self, stateKey):
+        '''
+        Return the row of the given state, giving it one if it has none.
+        '''
+        rowId = self.rowIds.get(stateKey)
+
+        if rowId is None:
+            rowId = len(self.rowIds)
+            if rowId == len(self.values):
+                self.values = np.concatenate((self.values, np.zeros_like(self.values)))
+            self.rowIds[stateKey] = rowId
+
+        return rowId
+
+    def setValue(self, stateKey, action, value):
+        # the row first, as giving one can replace the array
+        rowId = self.getRowId(stateKey)
+        self.values[rowId, directionIds[action]] = value
+
+    def getBestAction(self, stateKey, actions):
+        '''
+        Return the action with the highest value among the given ones,
+        the first one if more have the same value, and its value.
+        '''
+        # a list of 5 floats is faster to compare in Python than to index with numpy
+        rowValues = self.getRow(stateKey).tolist()
+        actionValues = [rowValues[directionIds[action]] for action in actions]
+        bestValue = max(actionValues)
+        return actions[actionValues.index(bestValue)], bestValue
+
+    def getStateCount(self):
+        return len(self.rowIds)
+
+    def getRows(self):
+        '''
+        Return the keys of the states and an array with their values, 
+        a row for each state and a column for each direction.
+        '''
+        return sorted(self.rowIds, key=self.rowIds.get), self.values[:len(self.rowIds)]
+
+    def setRows(self, stateKeys, values):
+        '''
+        Set the values of the given states, as returned by getRows.
+        '''
+        for stateKey in stateKeys:
+            self.rowIds.setdefault(stateKey, len(self.rowIds))
+
+        if len(self.rowIds) > len(self.values):
+            self.values = np.concatenate((self.values, np.zeros((len(self.rowIds), len(directions)), dtype=np.float32)))
+        self.values[[self.rowIds[stateKey] for stateKey in stateKeys]] = values
+
+
+class MappedQTable(ArrayQTable):
+    '''
+    The values of the state-action pairs saved by saveQTable, memory-mapped 
+    read-only: the row of each state is found with a binary search on the
+    sorted keys, so only the parts of the file which are read are loaded.
+    '''
+
+    def __init__(self, path):
+        self.records = loadRecords(path, mmapMode='r')
+        self.keys = self.records['key']
+        self.values = self.records['values']
+        self.keyWidth = self.keys.dtype.itemsize
+        self.emptyRow = np.zeros(len(directions), dtype=self.values.dtype)
+
+    def getRow(self, stateKey):
+        keyBytes = encodeKey(stateKey, self.keyWidth)
+        if keyBytes is None:
+            return self.emptyRow
+
+        # the keys are compared padded with null bytes, so between the left
+        # and the right insertion point there is the key, if it is saved
+        rowId = self.keys.searchsorted(keyBytes)
+        if rowId == self.keys.searchsorted(keyBytes, side='right'):
+            return self.emptyRow
+        return self.values[rowId]
+
+    def getRowId(self, stateKey):
+        raise Exception('A memory-mapped Q-table is read-only')
+
+    def getStateCount(self):
+        return len(self.keys)
+
+    def getRows(self):
+        return decodeKeys(self.keys, self.keyWidth), self.values
+
+
+DICT_Q_TABLE = 'dict'
+ARRAY_Q_TABLE = 'array'
+
+qTables = { DICT_Q_TABLE: DictQTable,
+            ARRAY_Q_TABLE: ArrayQTable }
+
+
+def getQTable(name):
+    '''
+    Return a new empty Q-table of the given kind: 'dict' or 'array'.
+    '''
+    if name not in qTables:
+        raise Exception('Unknown Q-table ' + name + ', choose one of ' + ', '.join(sorted(qTables)))
+    if name == ARRAY_Q_TABLE and np is None:
+        raise Exception('The ' + name + ' Q-table requires numpy')
+    return qTables[name]()
+
+
+def encodeKey(stateKey, width):
+    '''
+    Return the given key as a big-endian byte string of the given width, 
+    or None if it does not fit. The negative keys are mapped to the odd
+    numbers and the others to the even ones, so that all are non negative.
+    '''
+    number = 2 * stateKey if stateKey >= 0 else -2 * stateKey - 1
+    hexadecimal = '%x' % number
+    if len(hexadecimal) > 2 * width:
+        return None
+    return binascii.unhexlify(hexadecimal.rjust(2 * width, '0'))
+
+
+def decodeKeys(keys, width):
+    '''
+    Return the keys encoded by encodeKey in the given array of byte strings.
+    '''
+    stateKeys = []
+    # numpy strips the trailing null bytes of the strings
+    for keyBytes in keys.tolist():
+        number = int(binascii.hexlify(keyBytes.ljust(width, '\0')), 16)
+        stateKeys.append(number // 2 if number % 2 == 0 else -(number + 1) // 2)
+    return stateKeys
+
+
+def saveQTable(qTable, path):
+    '''
+    Save the given Q-table to a file. The records are written in a 
+    temporary file which then replaces the file, so that the file is 
+    never partly written, even when the Q-table is saved as it trains.
+    '''
+    if np is None:
+        raise Exception('Saving a Q-table requires numpy')
+
+    stateKeys, values = qTable.getRows()
+    # the encoded keys are at most twice as large as the keys
+    width = max([1] + [((2 * abs(stateKey)).bit_length() + 7) // 8 for stateKey in stateKeys])
+
+    records = np.zeros(len(stateKeys), dtype=[('key', 'S%d' % width), ('values', values.dtype, (len(directions),))])
+    records['key'] = [encodeKey(stateKey, width) for stateKey in stateKeys]
+    records['values'] = values
+    records.sort(order='key')
+
+    folder = os.path.dirname(os.path.abspath(path))
+    temporaryFile, temporaryPath = tempfile.mkstemp(dir=folder)
+    with os.fdopen(temporaryFile, 'wb') as qTableFile:
+        np.save(qTableFile, records)
+
+    # the temporary file is only readable by its owner
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(temporaryPath, 0o666 & ~umask)
+    os.rename(temporaryPath, path)
+
+
+def loadRecords(path, mmapMode=None):
+    if np is None:
+        raise Exception('Loading a Q-table requires numpy')
+    return np.load(path, mmap_mode=mmapMode)
+
+
+def loadQTable(name, path):
+    '''
+    Return a Q-table of the given kind, 'dict' or 'array', 
+    with the values saved in the given file.
+    '''
+    records = loadRecords(path)
+    qTable = getQTable(name)
+    qTable.setRows(decodeKeys(records['key'], records['key'].dtype.itemsize), records['values'])
+    return qTable
@@ -0,0 +1,99 @@
+# replayBuffers.py
+#
+# Experience replay for the QLearnAgent in mlLearningAgents.py.
+#
+# Without replay the agent learns from each transition once, as it
+# happens, and then forgets it. With replay the transitions are also
+# kept in a ring buffer of fixed capacity (the oldest ones replaced
+# first), and after each move the agent learns again from minibatches
+# of transitions sampled from it, so that it needs far fewer episodes
+# (which are what training costs) to learn the same.
+#
+# The transitions are stored in preallocated arrays over the rows of
+# the states in the array Q-table (qTables.ArrayQTable), so that a whole
+# minibatch is learnt from with a few array operations:
+#
+#   replayBuffer = replayBuffers.ReplayBuffer(capacity)
+#   replayBuffer.add(stateRowId, actionId, reward, nextStateRowId, nextActionsMask, done)
+#   replayBuffer.replay(qTable, batchSize, alpha, gamma)
+#
+# When the agent replaces its Q-table (QLearnAgent.setQTable), the rows
+# of the transitions are moved to the rows of their states in the new one.
+
+import random
+
+import numpy as np
+
+from stateEncoders import directions
+
+
+class ReplayBuffer:
+    '''
+    The last transitions seen, as (state, action, reward, next state,
+    legal actions in the next state, whether the game is over) with the
+    states as rows of the array Q-table and the actions as directions.
+    '''
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.stateRowIds = np.zeros(capacity, dtype=np.int64)
+        self.actionIds = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity)
+        self.nextStateRowIds = np.zeros(capacity, dtype=np.int64)
+        self.nextActionsMasks = np.zeros((capacity, len(directions)), dtype=bool)
+        self.dones = np.zeros(capacity, dtype=bool)
+
+        # the slot of the next transition and the number of transitions stored
+        self.position = 0
+        self.size = 0
+
+        # seeded from the random module, so that a fixed seed (-f) fixes the samples too
+        self.random = np.random.RandomState(random.randrange(2 ** 32))
+
+    def add(self, stateRowId, actionId, reward, nextStateRowId, nextActionsMask, done):
+        '''
+        Store a transition, replacing the oldest one if the buffer is full.
+        '''
+        self.stateRowIds[self.position] = stateRowId
+        self.actionIds[self.position] = actionId
+        self.rewards[self.position] = reward
+        self.nextStateRowIds[self.position] = nextStateRowId
+        self.nextActionsMasks[self.position] = nextActionsMask
+        self.dones[self.position] = done
+
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def moveRows(self, newRowIds):
+        '''
+        Move the states of the transitions stored to other rows, e.g. of
+        another Q-table, given the new row of each row (a list or array).
+        '''
+        newRowIds = np.asarray(newRowIds, dtype=np.int64)
+        self.stateRowIds[:self.size] = newRowIds[self.stateRowIds[:self.size]]
+        self.nextStateRowIds[:self.size] = newRowIds[self.nextStateRowIds[:self.size]]
+
+    def replay(self, qTable, batchSize, alpha, gamma):
+        '''
+        Update the values of the given array Q-table with a minibatch
+        of transitions sampled from the buffer, all at once:
+
+        Q[s,a] <- Q[s,a] + alpha * (reward + gamma * max_over_a'( Q[s',a'] ) - Q[s,a])
+
+        with the max over the legal actions in s', 0 if the game is over.
+        All the targets are computed from the values before the update,
+        so a pair sampled more than once only moves towards its target once.
+        '''
+        if self.size < batchSize:
+            return
+
+        samples = self.random.randint(0, self.size, batchSize)
+        stateRowIds = self.stateRowIds[samples]
+        actionIds = self.actionIds[samples]
+
+        nextValues = np.where(self.nextActionsMasks[samples], qTable.values[self.nextStateRowIds[samples]], -np.inf)
+        maxNextValues = np.where(self.dones[samples], 0, nextValues.max(axis=1))
+
+        currentValues = qTable.values[stateRowIds, actionIds]
+        targets = self.rewards[samples] + gamma * maxNextValues
+        qTable.values[stateRowIds, actionIds] = currentValues + alpha * (targets - currentValues)
@@ -0,0 +1,459 @@
+# rewardLayouts.py
+#
+# Reward layouts laying out the rewards of the map the MDPAgent in
+# mdpAgents.py solves at every move, and choosing the locations which keep
+# their reward (fixed) rather than being updated by the solver:
+#
+#   halos           - (default) the food rewards its own location, the ghosts
+#                     and the dead ends give a halo of negative rewards fading
+#                     with the distance, and Pacman's location is penalised so
+#                     that he keeps moving. The food and the ghosts are fixed.
+#   smallGridHalos  - the halos, with the food only fixed on the small grid,
+#                     where Pacman and the dead ends are no longer penalised
+#                     once one food is left (SMALL_GRID_MAX_BELLMAN.py).
+#   points          - each food, ghost and dead end only rewards its own
+#                     location. The ghosts are only fixed on the small grid,
+#                     and the last food is fixed and worth LAST_FOOD_REWARD
+#                     (mdpAgentsSMALLGrid.py).
+#   scaledFood      - the points, with the food worth more as less of it is
+#                     left, Pacman's location penalised and the ghosts always
+#                     fixed ("mdpAgents AVG fixed ghosts.py").
+#   ghostDistances  - the scaled food, with every location without food worth
+#                     NO_FOOD_REWARD, Pacman's location and the ones he can
+#                     land on penalised the more the closer a ghost is, and
+#                     the move rewards from Pacman taken back from the values
+#                     solved (mdpAgentsMEDIUMCLASSIC.py).
+#   ghostsDetection - the map is kept between the moves, the food and the
+#                     ghosts setting their location to their reward, and the
+#                     moves are penalised the more the closer they lead Pacman
+#                     to a ghost (mdpAgentsDEBUGGABLE.py and
+#                     mdpAgentsWorkingButWithGhostsDetection.py).
+#
+# The rewards are read from the constants of the agent (e.g. FOOD_REWARD),
+# so each version of the agent only sets its own, e.g.
+#
+#   python pacman.py -p MDPAgent -l smallGrid -a rewardLayout=points,backup=avg
+#
+# Only the halos can be assembled in the arrays of the agent (with numpy),
+# or solved for each place the ghosts might be in (ghostScenarios), the
+# other layouts are built as a dict.
+
+import mdpAgents
+
+# the distance of a ghost which is not within the steps searched
+NO_GHOST_FOUND = -1
+
+
+class RewardLayout:
+    '''
+    Lay out the rewards of the map the agent solves at every move, with
+    the halos (the default layout): the food rewards its own location,
+    and the ghosts and the dead ends give a halo of negative rewards to
+    the locations within ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE,
+    EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE and DEADEND_MIN_ALLOWED_DISTANCE
+    steps, fading by HALO_DISCOUNT_FACTOR a step. Pacman's location is
+    penalised so that he keeps moving. The food and the ghosts are fixed.
+    The layout is created for an agent, and can keep what it needs
+    from a move to the next one.
+    '''
+
+    # whether the rewards are made of the halos, which the agent can also
+    # assemble in its arrays from the rewards and the fixed locations of
+    # the move (see getRewards and getFixedLocations)
+    HALOS = True
+
+    def getFoodReward(self, agent, food):
+        '''
+        Return the reward of each food this move. The last food
+        of the small grid is worth LAST_FOOD_REWARD.
+        '''
+        if agent.isSmallGrid and len(food) == 1:
+            return agent.LAST_FOOD_REWARD
+        return agent.FOOD_REWARD
+
+    def getRewards(self, agent, pacman, food):
+        '''
+        Return the rewards of this move as (foodReward, activeGhostReward,
+        edibleGhostReward, deadEndReward, pacmanReward). The dead ends are
+        not penalised when one is next to Pacman, as it could be wrong to
+        tell him to leave.
+        '''
+        deadEndReward = agent.DEAD_END_REWARD
+        if any(agent.distancesMap[deadEnd] == 1 for deadEnd in agent.deadEnds):
+            deadEndReward = 0
+
+        return (self.getFoodReward(agent, food), agent.ACTIVE_GHOST_REWARD, agent.EDIBLE_GHOST_REWARD, 
+                deadEndReward, agent.PACMAN_REWARD)
+
+    def getFixedLocations(self, agent, activeGhosts, edibleGhosts, food):
+        '''
+        Return the locations which keep their reward: the ghosts and the food.
+        '''
+        return edibleGhosts + activeGhosts + list(food)
+
+    def getRewardsMap(self, agent, pacman, activeGhosts, edibleGhosts, food):
+        '''
+        Return the map the solver starts from { location: reward } and
+        the locations it updates, as (rewardsMap, updatableLocations).
+        '''
+        foodReward, activeGhostReward, edibleGhostReward, deadEndReward, pacmanReward = self.getRewards(agent, pacman, food)
+
+        rewardsMap = { location: 0 for location in agent.accessibleMap }
+
+        # active ghosts, edible ghosts and dead ends are dangerous for Pacman,
+        # so each of them gives a halo of negative rewards which is weaker
+        # the further the location is from the dangerous element
+        halos = [(activeGhosts, activeGhostReward, agent.ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE),
+                 (edibleGhosts, edibleGhostReward, agent.EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE),
+                 (agent.deadEnds, deadEndReward, agent.DEADEND_MIN_ALLOWED_DISTANCE)]
+
+        for elements, reward, stepsLimit in halos:
+            for element in elements:
+                haloMap = mdpAgents.getGradientMap(element,
+                                                   reward,
+                                                   agent.movesMap,
+                                                   stepsLimit,
+                                                   agent.HALO_DISCOUNT_FACTOR,
+                                                   agent.distanceTable)
+                for location in haloMap:
+                    rewardsMap[location] += haloMap[location]
+
+        for foodLocation in food: rewardsMap[foodLocation] += foodReward
+        rewardsMap[pacman] += pacmanReward
+
+        fixedLocations = self.getFixedLocations(agent, activeGhosts, edibleGhosts, food)
+        return rewardsMap, getUpdatableLocations(agent.accessibleMap, fixedLocations)
+
+    def adjustValues(self, agent, valueIterationMap):
+        '''
+        Return the values the move is chosen from, given the values solved.
+        '''
+        return valueIterationMap
+
+    def getLandingPenalties(self, agent, pacman):
+        '''
+        Return the penalty of each location Pacman can land on this move
+        { location: penalty }, added to the utility of the moves landing
+        there, or None if the moves are only chosen from their utilities.
+        '''
+        return None
+
+
+class SmallGridHalosRewardLayout(RewardLayout):
+    '''
+    The halos, with the food only fixed on the small grid, where Pacman
+    and the dead ends are no longer penalised once one food is left.
+    Elsewhere the food is solved like the other locations, so its reward
+    is only where value iteration starts from.
+    '''
+
+    def getRewards(self, agent, pacman, food):
+        foodReward, activeGhostReward, edibleGhostReward, deadEndReward, pacmanReward = \
+            RewardLayout.getRewards(self, agent, pacman, food)
+
+        if agent.isSmallGrid and len(food) == 1:
+            deadEndReward = 0
+            pacmanReward = 0
+
+        return foodReward, activeGhostReward, edibleGhostReward, deadEndReward, pacmanReward
+
+    def getFixedLocations(self, agent, activeGhosts, edibleGhosts, food):
+        if agent.isSmallGrid:
+            return RewardLayout.getFixedLocations(self, agent, activeGhosts, edibleGhosts, food)
+        return edibleGhosts + activeGhosts
+
+
+class PointsRewardLayout(RewardLayout):
+    '''
+    Each food, ghost and dead end only rewards its own location. The
+    ghosts are only fixed on the small grid, and the last food is fixed
+    and worth LAST_FOOD_REWARD.
+    '''
+
+    HALOS = False
+
+    def getFoodReward(self, agent, food):
+        # if there is only one piece of food left its value increases
+        if len(food) == 1:
+            return agent.LAST_FOOD_REWARD
+        return agent.FOOD_REWARD
+
+    def getRewardsMap(self, agent, pacman, activeGhosts, edibleGhosts, food):
+        rewardsMap = { location: 0 for location in agent.accessibleMap }
+
+        fixedLocations = edibleGhosts + activeGhosts if agent.isSmallGrid else []
+        if len(food) == 1:
+            fixedLocations += list(food)
+
+        addPointRewards(rewardsMap, agent, activeGhosts, edibleGhosts, food, self.getFoodReward(agent, food))
+
+        return rewardsMap, getUpdatableLocations(agent.accessibleMap, fixedLocations)
+
+
+class ScaledFoodRewardLayout(RewardLayout):
+    '''
+    Each food, ghost and dead end only rewards its own location, the food
+    is worth more as less of it is left (see getScaledFoodReward) and
+    Pacman's location is penalised. The ghosts are fixed, and so is the
+    last food of the small grid, worth LAST_FOOD_REWARD.
+    '''
+
+    HALOS = False
+
+    def getFoodReward(self, agent, food):
+        if agent.isSmallGrid and len(food) == 1:
+            return agent.LAST_FOOD_REWARD
+        return getScaledFoodReward(agent, food)
+
+    def getRewardsMap(self, agent, pacman, activeGhosts, edibleGhosts, food):
+        rewardsMap = { location: 0 for location in agent.accessibleMap }
+
+        fixedLocations = edibleGhosts + activeGhosts
+        if agent.isSmallGrid and len(food) == 1:
+            fixedLocations += list(food)
+
+        addPointRewards(rewardsMap, agent, activeGhosts, edibleGhosts, food, self.getFoodReward(agent, food))
+
+        # Pacman should try to always change location
+        rewardsMap[pacman] += agent.PACMAN_REWARD
+
+        return rewardsMap, getUpdatableLocations(agent.accessibleMap, fixedLocations)
+
+
+class GhostDistancesRewardLayout(RewardLayout):
+    '''
+    Every location without food is worth NO_FOOD_REWARD, and each food,
+    ghost and dead end adds its reward to its own location, the food
+    worth more as less of it is left (see getScaledFoodReward). Pacman's
+    location and the ones he can land on are penalised by the closest
+    ghost within ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE (or, if edible,
+    EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE) steps, by its reward divided by
+    its distance, and then Pacman's location is set to PACMAN_REWARD.
+    The ghosts are fixed. The value of each location solved is raised
+    by the move rewards of the steps from Pacman to it.
+    '''
+
+    HALOS = False
+
+    def getFoodReward(self, agent, food):
+        return getScaledFoodReward(agent, food)
+
+    def getRewardsMap(self, agent, pacman, activeGhosts, edibleGhosts, food):
+        rewardsMap = { location: agent.NO_FOOD_REWARD for location in agent.accessibleMap }
+
+        fixedLocations = edibleGhosts + activeGhosts
+
+        addPointRewards(rewardsMap, agent, activeGhosts, edibleGhosts, food, self.getFoodReward(agent, food))
+
+        NO_MOVE = (0, 0)
+        # reduce the reward of the locations next to Pacman (and of Pacman's
+        # location itself) based on how close they are to the ghosts
+        for move in agent.movesMap[pacman] + [NO_MOVE]:
+            location = mdpAgents.sumTuples(pacman, move)
+            activeGhostDistance = mdpAgents.findDistanceToClosestGhostWithinAllowedSteps(location,
+                                                                                         agent.movesMap,
+                                                                                         activeGhosts,
+                                                                                         agent.ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE,
+                                                                                         agent.distanceTable)
+            edibleGhostDistance = mdpAgents.findDistanceToClosestGhostWithinAllowedSteps(location,
+                                                                                         agent.movesMap,
+                                                                                         edibleGhosts,
+                                                                                         agent.EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE,
+                                                                                         agent.distanceTable)
+            rewardsMap[location] += min(getGhostRewardBasedOnDistance(activeGhostDistance, agent.ACTIVE_GHOST_REWARD),
+                                        getGhostRewardBasedOnDistance(edibleGhostDistance, agent.EDIBLE_GHOST_REWARD))
+
+        # Pacman should try to always change location
+        rewardsMap[pacman] = agent.PACMAN_REWARD
+
+        return rewardsMap, getUpdatableLocations(agent.accessibleMap, fixedLocations)
+
+    def adjustValues(self, agent, valueIterationMap):
+        adjustedMap = dict(valueIterationMap)
+        for location, distance in agent.distancesMap.items():
+            adjustedMap[location] -= distance * agent.MOVE_REWARD
+        return adjustedMap
+
+
+class GhostsDetectionRewardLayout(RewardLayout):
+    '''
+    The map is kept between the moves (and the games): at every move the
+    food and the ghosts set their location to FOOD_REWARD and
+    ACTIVE_GHOST_REWARD and are fixed, and the other locations start from
+    the values of the previous move. On the small grid the traps (the
+    TRAP_LOCATIONS of the agent, or the dead ends if None) are set to
+    ACTIVE_GHOST_REWARD too, unless the last food is left, Pacman is next
+    to a trap or the ghost is close to him.
+    Each move is penalised by the closest ghost within
+    ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE steps from where it lands, by twice
+    ACTIVE_GHOST_REWARD divided by its distance. Once Pacman has been in a
+    trap, only the ghosts within TRAPPED_GHOSTS_DISTANCE steps are searched.
+    '''
+
+    HALOS = False
+
+    # the steps the ghosts are searched within once Pacman has been in a trap
+    TRAPPED_GHOSTS_DISTANCE = 4
+    # the distance below which the ghost keeps the traps from being penalised
+    TRAP_GHOST_DISTANCE = 4
+
+    def __init__(self):
+        # the map kept between the moves
+        self.valueIterationMap = None
+        # the steps the ghosts penalising the moves are searched within
+        self.ghostsDistance = None
+
+    def getRewardsMap(self, agent, pacman, activeGhosts, edibleGhosts, food):
+        if self.valueIterationMap is None:
+            self.valueIterationMap = { location: 0 for location in agent.accessibleMap }
+            self.ghostsDistance = agent.ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE
+
+        valueIterationMap = self.valueIterationMap
+        # the positions of the ghosts as they are, the ones amid
+        # two locations (edible) are not on the map
+        ghosts = [ghostState[0] for ghostState in agent.ghostsStates]
+        ghostsOnMap = [ghost for ghost in ghosts if ghost in valueIterationMap]
+
+        for foodLocation in food: valueIterationMap[foodLocation] = agent.FOOD_REWARD
+        for ghost in ghostsOnMap: valueIterationMap[ghost] = agent.ACTIVE_GHOST_REWARD
+
+        if agent.isSmallGrid:
+            traps = agent.deadEnds if agent.TRAP_LOCATIONS is None else agent.TRAP_LOCATIONS
+            riskyGhosts = getRiskyGhosts(agent)
+
+            onePieceOfFoodLeft = len(food) <= 1
+            ghostIsTooCloseToPacman = len(riskyGhosts) > 0 and riskyGhosts[ghosts[0]] < self.TRAP_GHOST_DISTANCE
+            trapIsTooCloseToPacman = any(agent.distancesMap[trap] < 2 for trap in traps)
+
+            # due to the stochasticism, the traps are very dangerous and
+            # Pacman should avoid them, unless he has no other choice
+            if not (onePieceOfFoodLeft or ghostIsTooCloseToPacman or trapIsTooCloseToPacman):
+                for trap in traps: valueIterationMap[trap] = agent.ACTIVE_GHOST_REWARD
+
+            # once in a trap, not to have him stuck there, only
+            # the ghosts close enough affect his moves
+            if pacman in traps:
+                self.ghostsDistance = self.TRAPPED_GHOSTS_DISTANCE
+
+        fixedLocations = list(food) + ghostsOnMap
+        return valueIterationMap, getUpdatableLocations(agent.accessibleMap, fixedLocations)
+
+    def adjustValues(self, agent, valueIterationMap):
+        # the next move starts from these values
+        self.valueIterationMap = valueIterationMap
+        return valueIterationMap
+
+    def getLandingPenalties(self, agent, pacman):
+        ghosts = [ghostState[0] for ghostState in agent.ghostsStates]
+        riskyGhosts = getRiskyGhosts(agent)
+
+        # the distance of the closest ghost from each location Pacman can land on,
+        # where he is only the risky ghosts are considered
+        ghostsDistances = { pacman: min(riskyGhosts.values()) if len(riskyGhosts) > 0 else NO_GHOST_FOUND }
+        for move in agent.movesMap[pacman]:
+            location = mdpAgents.sumTuples(pacman, move)
+            ghostsDistances[location] = mdpAgents.findDistanceToClosestGhostWithinAllowedSteps(location,
+                                                                                               agent.movesMap,
+                                                                                               ghosts,
+                                                                                               self.ghostsDistance,
+                                                                                               agent.distanceTable)
+
+        penalties = {}
+        for location, ghostDistance in ghostsDistances.items():
+            # a move ending up in a ghost location is terrible
+            if ghostDistance == 0:
+                penalties[location] = agent.ACTIVE_GHOST_REWARD * 2
+            elif ghostDistance != NO_GHOST_FOUND:
+                penalties[location] = agent.ACTIVE_GHOST_REWARD * 2 / ghostDistance
+        return penalties
+
+
+def getUpdatableLocations(accessibleMap, fixedLocations):
+    '''
+    Return the locations of the map which are not fixed, in the order of the map.
+    '''
+    fixedLocations = set(fixedLocations)
+    return [ location for location in accessibleMap if location not in fixedLocations ]
+
+
+def addPointRewards(rewardsMap, agent, activeGhosts, edibleGhosts, food, foodReward):
+    '''
+    Add the reward of each food, ghost and dead end to its own location.
+    '''
+    for foodLocation in food: rewardsMap[foodLocation] += foodReward
+    for ghost in activeGhosts: rewardsMap[ghost] += agent.ACTIVE_GHOST_REWARD
+    for ghost in edibleGhosts: rewardsMap[ghost] += agent.EDIBLE_GHOST_REWARD
+    for deadEnd in agent.deadEnds: rewardsMap[deadEnd] += agent.DEAD_END_REWARD
+
+
+def getScaledFoodReward(agent, food):
+    '''
+    Return the reward of the food, multiplied by how many times
+    less food is left than there was at the start of the game.
+    '''
+    return agent.FOOD_REWARD * (agent.initialFoodCount / float(len(food)))
+
+
+def getGhostRewardBasedOnDistance(distance, reward):
+    '''
+    Return the reward associated to a ghost adjusted according
+    to its distance. If the distance is -1 (that is, the ghost is not
+    located or too distant) the reward is 0.
+    '''
+    # ghost is not close enough
+    if distance == NO_GHOST_FOUND:
+        return 0
+    elif distance == 0:
+        # ghost is on the location; to avoid division by 0
+        # we set it 0 + epsilon (an arbitrarily small number)
+        distance = 0.01
+
+    return reward / distance
+
+
+def getRiskyGhosts(agent):
+    '''
+    Return a dict { ghostPosition: distanceFromPacman } of the ghosts within
+    ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE steps from Pacman, or if edible within
+    EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE steps. An edible ghost amid 2 locations
+    is as far as the closest of them.
+    '''
+    riskyGhosts = {}
+    IS_EDIBLE = 1
+
+    for ghost, status in agent.ghostsStates:
+        if status == IS_EDIBLE:
+            ghostDistance = min(agent.distancesMap[location]
+                                for location in mdpAgents.getAdjacentGhostLocationsIfLocationNotOnMap(ghost))
+            if ghostDistance <= agent.EDIBLE_GHOSTS_MIN_ALLOWED_DISTANCE:
+                riskyGhosts[ghost] = ghostDistance
+        else:
+            ghostDistance = agent.distancesMap[ghost]
+            if ghostDistance <= agent.ACTIVE_GHOSTS_MIN_ALLOWED_DISTANCE:
+                riskyGhosts[ghost] = ghostDistance
+
+    return riskyGhosts
+
+
+HALOS_LAYOUT = 'halos'
+SMALL_GRID_HALOS_LAYOUT = 'smallGridHalos'
+POINTS_LAYOUT = 'points'
+SCALED_FOOD_LAYOUT = 'scaledFood'
+GHOST_DISTANCES_LAYOUT = 'ghostDistances'
+GHOSTS_DETECTION_LAYOUT = 'ghostsDetection'
+
+layouts = { HALOS_LAYOUT: RewardLayout,
+            SMALL_GRID_HALOS_LAYOUT: SmallGridHalosRewardLayout,
+            POINTS_LAYOUT: PointsRewardLayout,
+            SCALED_FOOD_LAYOUT: ScaledFoodRewardLayout,
+            GHOST_DISTANCES_LAYOUT: GhostDistancesRewardLayout,
+            GHOSTS_DETECTION_LAYOUT: GhostsDetectionRewardLayout }
+
+
+def getRewardLayout(name):
+    '''
+    Return a new reward layout of the given kind (see the top of this file).
+    '''
+    if name not in layouts:
+        raise Exception('Unknown reward layout ' + name + ', choose one of ' + ', '.join(sorted(layouts)))
+    return layouts[name]()
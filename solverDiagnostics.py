@@ -0,0 +1,209 @@
+# solverDiagnostics.py
+#
+# Records of how the solver of the MDPAgent converged in each move,
+# so that settings like the epsilon or the discount factor can be
+# compared on how fast they are and on how they play.
+#
+# For every move the agent records the sweeps the solver took, the
+# max update of its last sweep (how far the values are from converging),
+# the number of location updates, the time spent solving (in milliseconds)
+# and the margin of the chosen move (how much better it was than the
+# second best one). The records are sent to a sink:
+#
+#   memory        keeps the last records in a ring buffer
+#   <file>.csv    appends them to a CSV file
+#   <file>.jsonl  appends them to a file with a JSON object per line
+#
+# and summarized in a table printed at the end of the games, e.g.
+#
+#   python pacman.py -p MDPAgent -l mediumClassic -q -n 10 -a diagnostics=moves.csv
+
+import collections
+import csv
+import json
+
+# the fields of each record, in the order of the CSV columns
+FIELDS = ['game', 'move', 'sweeps', 'maxUpdate', 'backups', 'time', 'margin', 'converged']
+
+# the number of records kept by the memory sink
+RING_BUFFER_CAPACITY = 10000
+
+MEMORY_SINK = 'memory'
+
+# the min width of the columns of the summary table
+SUMMARY_COLUMN_WIDTH = 9
+
+
+class RingBufferSink:
+    '''
+    Keep the last records in memory, e.g. for a script running the games.
+    '''
+
+    def __init__(self, capacity=RING_BUFFER_CAPACITY):
+        self.records = collections.deque(maxlen=capacity)
+
+    def write(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+
+class FileSink:
+    '''
+    Append the records to a file. The records are kept in memory until
+    they are flushed (at the end of each game), so that the file is
+    not kept open while the games are played.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.pendingRecords = []
+
+        # the records of the previous runs are discarded
+        with open(self.path, 'w') as sinkFile:
+            self.writeHeader(sinkFile)
+
+    def write(self, record):
+        self.pendingRecords.append(record)
+
+    def flush(self):
+        with open(self.path, 'a') as sinkFile:
+            self.writeRecords(sinkFile, self.pendingRecords)
+        self.pendingRecords = []
+
+    def writeHeader(self, sinkFile):
+        pass
+
+
+class CsvSink(FileSink):
+    '''
+    Append the records to a CSV file, with a column for each field.
+    '''
+
+    def writeHeader(self, sinkFile):
+        csv.writer(sinkFile).writerow(FIELDS)
+
+    def writeRecords(self, sinkFile, records):
+        writer = csv.writer(sinkFile)
+        for record in records:
+            writer.writerow([record[field] for field in FIELDS])
+
+
+class JsonLinesSink(FileSink):
+    '''
+    Append the records to a file, each as a JSON object on its own line.
+    '''
+
+    def writeRecords(self, sinkFile, records):
+        for record in records:
+            sinkFile.write(json.dumps(collections.OrderedDict((field, record[field]) for field in FIELDS)) + '\n')
+
+
+def getSink(name):
+    '''
+    Return the sink with the given name: 'memory', or
+    the path of a file ending with .csv or .jsonl.
+    '''
+    if name == MEMORY_SINK:
+        return RingBufferSink()
+    if name.endswith('.csv'):
+        return CsvSink(name)
+    if name.endswith('.jsonl'):
+        return JsonLinesSink(name)
+    raise Exception('Unknown diagnostics sink ' + name + ', choose ' + MEMORY_SINK + ' or a .csv or .jsonl file')
+
+
+class Diagnostics:
+    '''
+    Send the records of the moves to a sink, and keep
+    a summary of each game to print at the end of the games.
+    '''
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.game = 1
+        self.gameRecords = []
+        # the summary of each game, as returned by getSummary
+        self.summaries = []
+
+    def record(self, sweeps, maxUpdate, backups, time, margin, converged):
+        '''
+        Record a move of the current game.
+        '''
+        record = { 'game': self.game,
+                   'move': len(self.gameRecords) + 1,
+                   'sweeps': sweeps,
+                   'maxUpdate': float(maxUpdate),
+                   'backups': int(backups),
+                   'time': time,
+                   'margin': float(margin),
+                   'converged': bool(converged) }
+        self.sink.write(record)
+        self.gameRecords.append(record)
+
+    def endGame(self):
+        '''
+        Summarize the moves of the current game, and start the next one.
+        '''
+        if len(self.gameRecords) > 0:
+            self.summaries.append(getSummary(str(self.game), self.gameRecords))
+        self.sink.flush()
+        self.game += 1
+        self.gameRecords = []
+
+    def printSummary(self):
+        '''
+        Print a table with the summary of each game and of all the games.
+        '''
+        if len(self.summaries) == 0:
+            return
+
+        # the columns of the table (the key of the summary and the label,
+        # which tells how the moves are combined) and how they are formatted
+        columns = [('game', 'game', 's'), ('moves', 'moves', 'd'), ('sweeps', 'avgSweeps', '.2f'),
+                   ('maxUpdate', 'maxUpdate', '.2e'), ('backups', 'totBackups', 'd'),
+                   ('time', 'avgTime', '.2f'), ('maxTime', 'maxTime', '.2f'), ('margin', 'avgMargin', '.3f'),
+                   ('unconverged', 'unconverged', 'd')]
+        widths = [max(len(label), SUMMARY_COLUMN_WIDTH) for _, label, _ in columns]
+
+        print 'Solver diagnostics (time in milliseconds, avg: average per move,'
+        print 'max: largest in a move, tot: total of the moves):'
+        print ' '.join(label.rjust(width) for (_, label, _), width in zip(columns, widths))
+        for summary in self.summaries + [combineSummaries(self.summaries)]:
+            print ' '.join(('%' + str(width) + format) % summary[name] for (name, _, format), width in zip(columns, widths))
+
+
+def getSummary(game, records):
+    '''
+    Return the summary of the given records: the number of moves, the
+    average sweeps, time and margin, the largest max update and time,
+    the total backups and the number of moves which did not converge.
+    '''
+    moves = len(records)
+    return { 'game': game,
+             'moves': moves,
+             'sweeps': sum(record['sweeps'] for record in records) / float(moves),
+             'maxUpdate': max(record['maxUpdate'] for record in records),
+             'backups': sum(record['backups'] for record in records),
+             'time': sum(record['time'] for record in records) / float(moves),
+             'maxTime': max(record['time'] for record in records),
+             'margin': sum(record['margin'] for record in records) / float(moves),
+             'unconverged': len([record for record in records if not record['converged']]) }
+
+
+def combineSummaries(summaries):
+    '''
+    Return the summary of all the moves of the given summaries.
+    '''
+    moves = sum(summary['moves'] for summary in summaries)
+    average = lambda name: sum(summary[name] * summary['moves'] for summary in summaries) / float(moves)
+    return { 'game': 'all',
+             'moves': moves,
+             'sweeps': average('sweeps'),
+             'maxUpdate': max(summary['maxUpdate'] for summary in summaries),
+             'backups': sum(summary['backups'] for summary in summaries),
+             'time': average('time'),
+             'maxTime': max(summary['maxTime'] for summary in summaries),
+             'margin': average('margin'),
+             'unconverged': sum(summary['unconverged'] for summary in summaries) }
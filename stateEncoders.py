@@ -0,0 +1,173 @@
+# stateEncoders.py
+#
+# Encoders turning the state of the game into the integer the
+# QLearnAgent in mlLearningAgents.py uses as the key of its Q-table.
+#
+# Using the GameState itself as the key, every lookup in the Q-table
+# hashed all the agent states and walked the whole food grid, and the
+# Q-table kept every visited state alive. An encoder packs what matters
+# of the state into a single integer, a field after the other:
+#
+#   exact    - the same information GameState compares (where each agent
+#              is and where it is heading, the scared timers, the food,
+#              the capsules and the score), so that two states get the
+#              same key exactly when they are equal, and the agent learns
+#              the same values it learnt with the GameState as the key.
+#   compact  - only Pacman's location, the location of each ghost and
+#              whether it is scared, the food and the capsules, so that
+#              the agent learns the same value for states which only
+#              differ in the score, the timers or the directions.
+#
+# The food is kept as a bitmask with a bit for each location, updated
+# as the food is eaten rather than read from the whole grid every move,
+# so an encoder expects the states of a game in the order they are
+# played, and must be reset at the end of each game.
+
+from game import Directions
+
+# the field of the directions, in the order they are numbered
+directions = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST, Directions.STOP]
+directionIds = { direction: directionId for directionId, direction in enumerate(directions) }
+
+# bits needed by a direction and by a scared timer (at most pacman.SCARED_TIME = 40)
+DIRECTION_BITS = 3
+SCARED_TIMER_BITS = 6
+
+
+class StateEncoder:
+    '''
+    Encode the states of a layout as integers. The locations of the layout
+    are numbered column by column, each with a bit in the food and capsules
+    bitmasks. Ghosts can be amid two locations (when they are scared),
+    so their positions are numbered on a grid twice as fine.
+    '''
+
+    def __init__(self):
+        self.size = None
+        self.reset()
+
+    def reset(self):
+        '''
+        Forget the food of the previous state, to encode the state
+        of a new game (or a state not following the previous one).
+        '''
+        self.foodMask = None
+        self.foodCount = None
+
+    def setUpLayout(self, walls):
+        '''
+        Set the width of each field for a layout as large as the given walls.
+        '''
+        self.size = (walls.width, walls.height)
+        self.height = walls.height
+        self.locationBits = (walls.width * walls.height).bit_length()
+        self.positionBits = (4 * walls.width * walls.height).bit_length()
+        self.maskBits = walls.width * walls.height
+        self.reset()
+
+    def getLocationId(self, location):
+        x, y = location
+        return int(x) * self.height + int(y)
+
+    def getPositionId(self, position):
+        # twice as fine as the locations, so (x.5, y) is numbered too
+        x, y = position
+        return int(round(2 * x)) * 2 * self.height + int(round(2 * y))
+
+    def getFoodMask(self, state):
+        '''
+        Return the bitmask of the food in the given state. As only Pacman
+        eats food, one location per move, the mask of the previous state
+        only changes in Pacman's location when one food is missing.
+        '''
+        foodCount = state.getNumFood()
+
+        if self.foodMask is None or foodCount < self.foodCount - 1 or foodCount > self.foodCount:
+            food = state.getFood()
+            self.foodMask = sum(1 << (x * self.height + y)
+                                for x in range(food.width) for y in range(food.height) if food[x][y])
+        elif foodCount == self.foodCount - 1:
+            self.foodMask &= ~(1 << self.getLocationId(state.getPacmanPosition()))
+
+        self.foodCount = foodCount
+        return self.foodMask
+
+    def getCapsulesMask(self, state):
+        return sum(1 << self.getLocationId(capsule) for capsule in state.getCapsules())
+
+    def encode(self, state):
+        '''
+        Return the key of the given state.
+        '''
+        # each state holds its own copy of the layout, 
+        # but the fields only depend on its size
+        walls = state.getWalls()
+        if (walls.width, walls.height) != self.size:
+            self.setUpLayout(walls)
+
+        key = 0
+        for value, bits in self.getFields(state):
+            key = (key << bits) | value
+        return key
+
+    def getFields(self, state):
+        '''
+        Return the fields of the key as (value, bits) pairs, each
+        value being a non negative integer lower than 2 ^ bits, but
+        the first one, which can be any integer as no field is before it.
+        '''
+        raise NotImplementedError
+
+
+class ExactStateEncoder(StateEncoder):
+    '''
+    Encode everything GameState compares, so that two
+    states have the same key if and only if they are equal.
+    '''
+
+    def getFields(self, state):
+        # the score is not bounded, so it is the first field
+        fields = [(int(state.getScore()), 0),
+                  (self.getFoodMask(state), self.maskBits),
+                  (self.getCapsulesMask(state), self.maskBits)]
+
+        for agentState in state.data.agentStates:
+            fields.append((self.getPositionId(agentState.getPosition()), self.positionBits))
+            fields.append((directionIds[agentState.getDirection()], DIRECTION_BITS))
+            fields.append((agentState.scaredTimer, SCARED_TIMER_BITS))
+
+        return fields
+
+
+class CompactStateEncoder(StateEncoder):
+    '''
+    Encode where Pacman and the ghosts are, which ghosts are
+    scared, and the food and capsules left.
+    '''
+
+    def getFields(self, state):
+        fields = [(self.getFoodMask(state), self.maskBits),
+                  (self.getCapsulesMask(state), self.maskBits),
+                  (self.getLocationId(state.getPacmanPosition()), self.locationBits)]
+
+        for ghostState in state.getGhostStates():
+            fields.append((self.getPositionId(ghostState.getPosition()), self.positionBits))
+            fields.append((int(ghostState.scaredTimer > 0), 1))
+
+        return fields
+
+
+EXACT_ENCODER = 'exact'
+COMPACT_ENCODER = 'compact'
+
+encoders = { EXACT_ENCODER: ExactStateEncoder, 
+             COMPACT_ENCODER: CompactStateEncoder }
+
+
+def getStateEncoder(name):
+    '''
+    Return a new encoder of the given kind: 'exact' or 'compact'.
+    '''
+    if name not in encoders:
+        raise Exception('Unknown state encoder ' + name + ', choose one of ' + ', '.join(sorted(encoders)))
+    return encoders[name]()
@@ -0,0 +1,74 @@
+# Check that the eligibility traces of QLearnAgent (Q(lambda)) are only
+# cut by the random actions worse than the best one.
+#
+# Run from the root of the project:
+#
+#     python -m unittest discover tests
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import layout
+import pacman
+from mlLearningAgents import QLearnAgent
+
+
+def getStartingState(layoutName):
+    world = layout.getLayout(layoutName)
+    state = pacman.GameState()
+    state.initialize(world, world.getNumGhosts())
+    return state
+
+
+class QLambdaTracesTest(unittest.TestCase):
+
+    def setUp(self):
+        # the agent always explores, and the test chooses its random actions
+        self.agent = QLearnAgent(epsilon=1.0, traceDecay=0.5)
+        self.state = getStartingState('smallGrid')
+        self.stateKey = self.agent.stateEncoder.encode(self.state)
+
+    def play(self, action):
+        self.agent.randomAction = lambda state: action
+        return self.agent.getAction(self.state)
+
+    def testBestRandomActionKeepsTraces(self):
+        self.agent.QTable.setValue(self.stateKey, 'West', 1.0)
+
+        self.play('East')
+        self.play('West')
+        self.assertFalse(self.agent.actionExplored)
+        # updates West, which follows East without cutting its trace
+        self.play('West')
+
+        self.assertIn((self.stateKey, 'East'), self.agent.traces)
+        self.assertIn((self.stateKey, 'West'), self.agent.traces)
+
+    def testTiedRandomActionKeepsTraces(self):
+        # every action is worth 0, so any of them is as good as the best one
+        self.play('East')
+        self.play('West')
+        self.assertFalse(self.agent.actionExplored)
+        self.play('West')
+
+        self.assertIn((self.stateKey, 'East'), self.agent.traces)
+        self.assertIn((self.stateKey, 'West'), self.agent.traces)
+
+    def testWorseRandomActionCutsTraces(self):
+        self.agent.QTable.setValue(self.stateKey, 'West', 1.0)
+
+        self.play('West')
+        self.play('East')
+        self.assertTrue(self.agent.actionExplored)
+        # updates East, which drops the trace of West first
+        self.play('West')
+
+        self.assertNotIn((self.stateKey, 'West'), self.agent.traces)
+        self.assertIn((self.stateKey, 'East'), self.agent.traces)
+
+
+if __name__ == '__main__':
+    unittest.main()